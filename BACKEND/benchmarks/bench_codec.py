@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: stdlib json vs the codec layer on realistic session bodies
+
+Usage: python benchmarks/bench_codec.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec  # noqa: E402
+
+PREAMBLE = r"""\documentclass[letterpaper,11pt]{article}
+\usepackage{latexsym}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage[hidelinks]{hyperref}
+\usepackage{tabularx}
+\begin{document}
+"""
+
+def make_resume(items: int) -> str:
+    """LaTeX resume with `items` bullet points spread over experience entries"""
+    lines = [PREAMBLE, r"\section{Experience}", r"\resumeSubHeadingListStart"]
+    for i in range(items):
+        if i % 5 == 0:
+            lines.append(rf"\resumeSubheading{{Company {i // 5}}}{{City, ST}}{{Software Engineer}}{{2019 -- 2023}}")
+        lines.append(rf"\resumeItem{{Built service {i} handling 10,000+ requests/day with Python, Redis and PostgreSQL, cutting p95 latency by 35\%}}")
+    lines += [r"\resumeSubHeadingListEnd", r"\end{document}"]
+    return "\n".join(lines)
+
+def make_session(items: int) -> dict:
+    job_post = "We are looking for a Senior Software Engineer. " * 60
+    return {
+        "resume_text": make_resume(items),
+        "job_post": job_post,
+        "questions": [f"Question {i} about your experience with distributed systems?" for i in range(3)],
+        "answers": [f"Answer {i}: I led a team of 4 engineers building a payments platform." for i in range(3)],
+        "current_question_index": 3,
+        "created_at": "2024-01-01T12:00:00",
+        "suggestions": [
+            {
+                "id": str(uuid.uuid4()),
+                "type": "update_item_in_section",
+                "target_section_header": "Experience",
+                "context_text_before": "Built service",
+                "context_text_after": "",
+                "original_latex_snippet": r"\resumeItem{Built service 1}",
+                "suggested_latex_snippet": r"\resumeItem{Built service 1 serving 1M+ users}",
+                "description": "Quantify impact",
+            }
+            for _ in range(10)
+        ],
+    }
+
+def bench(fn, iterations: int) -> float:
+    seconds = min(timeit.repeat(fn, number=iterations, repeat=5)) / iterations
+    return seconds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    backend = "orjson" if codec.HAS_ORJSON else "stdlib fallback"
+    print(f"codec backend: {backend}")
+    print(f"{'size':>10} {'op':<8} {'json (us)':>10} {'codec (us)':>11} {'speedup':>8}")
+    for items in (20, 100, 500):
+        session = make_session(items)
+        encoded_json = json.dumps(session)
+        encoded_codec = codec.dumps(session)
+        size = f"{len(encoded_codec) / 1024:.1f} KB"
+        rows = [
+            ("dumps", lambda: json.dumps(session), lambda: codec.dumps(session)),
+            ("loads", lambda: json.loads(encoded_json), lambda: codec.loads(encoded_codec)),
+        ]
+        for op, baseline, candidate in rows:
+            base_us = bench(baseline, args.iterations)
+            codec_us = bench(candidate, args.iterations)
+            print(f"{size:>10} {op:<8} {base_us:>10.1f} {codec_us:>11.1f} {base_us / codec_us:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
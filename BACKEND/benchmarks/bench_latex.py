@@ -0,0 +1,169 @@
+"""
+Micro-benchmarks for AIService.parse_resume_latex / apply_suggestion / serialize_resume_latex
+on generated resumes of 1-20 pages with 1-200 suggestions.
+
+Each case records the median wall time and the peak traced memory, and fails when
+either exceeds the stored baseline by more than the allowed tolerance. Baselines are
+machine-specific: the first run (or any run with BENCH_UPDATE_BASELINE=1) writes them.
+
+Usage:
+  python -m pytest benchmarks/bench_latex.py -q
+  BENCH_UPDATE_BASELINE=1 python -m pytest benchmarks/bench_latex.py -q
+
+Environment:
+  BENCH_LATEX_BASELINE    baseline file (default benchmarks/latex_baseline.json, gitignored)
+  BENCH_TIME_TOLERANCE    allowed relative slowdown (default 0.5)
+  BENCH_MEMORY_TOLERANCE  allowed relative peak-memory growth (default 0.25)
+  BENCH_REPEAT            timed runs per case, median is kept (default 3)
+"""
+
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Settings reads these at import; the LLM clients are built lazily on the first call, which never happens here
+os.environ.setdefault("OPEN_ROUTER_URL", "http://127.0.0.1:8900")
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+
+pytest.importorskip("fastapi")
+from models import Suggestion  # noqa: E402
+from services.ai_service import ai_service  # noqa: E402
+
+BASELINE_PATH = os.getenv("BENCH_LATEX_BASELINE", os.path.join(BENCH_DIR, "latex_baseline.json"))
+UPDATE_BASELINE = os.getenv("BENCH_UPDATE_BASELINE", "").lower() in ("1", "true")
+TIME_TOLERANCE = float(os.getenv("BENCH_TIME_TOLERANCE", "0.5"))
+MEMORY_TOLERANCE = float(os.getenv("BENCH_MEMORY_TOLERANCE", "0.25"))
+REPEAT = int(os.getenv("BENCH_REPEAT", "3"))
+
+# Roughly what fits on one page of the Jake's-resume style template the parser targets
+ENTRIES_PER_PAGE = 4
+ITEMS_PER_ENTRY = 5
+SECTIONS = ["Experience", "Projects", "Leadership", "Research"]
+
+PAGES = [1, 5, 20]
+SUGGESTION_COUNTS = [1, 50, 200]
+
+results = {}
+
+def make_resume(pages: int) -> str:
+    lines = [r"\documentclass[letterpaper,11pt]{article}", r"\begin{document}"]
+    entries = pages * ENTRIES_PER_PAGE
+    for s, section in enumerate(SECTIONS):
+        lines += [rf"\section{{{section}}}", r"\resumeSubHeadingListStart"]
+        for e in range(s, entries, len(SECTIONS)):
+            lines.append(rf"\resumeSubheading{{Company {e}}}{{City {e}, ST}}{{Engineer {e}}}{{20{e % 24:02d} -- 2024}}")
+            lines.append(r"\resumeItemListStart")
+            for i in range(ITEMS_PER_ENTRY):
+                lines.append(rf"\resumeItem{{Built service {e}.{i} handling {1000 * (i + 1)} requests per second with Python and Redis}}")
+            lines.append(r"\resumeItemListEnd")
+        lines.append(r"\resumeSubHeadingListEnd")
+    lines.append(r"\end{document}")
+    return "\n".join(lines)
+
+def make_suggestions(parsed, count: int):
+    """A realistic mix: exact-context inserts, in-place updates, and paraphrased
+    contexts that fall through to the fuzzy difflib match"""
+    items = [(section["section"], sub["content"]) for section in parsed for sub in section["subheadings"] if sub["type"] == "item"]
+    suggestions = []
+    for n in range(count):
+        section, content = items[(n * 7) % len(items)]
+        kind = n % 10
+        if kind < 5:
+            s_type, before, original = "add_item_to_section", content, ""
+        elif kind < 9:
+            s_type, before, original = "update_item_in_section", "", content
+        else:
+            s_type, before, original = "add_item_to_section", content.replace("handling", "serving").replace("with", "using"), ""
+        suggestions.append(Suggestion(
+            id=str(uuid.uuid4()),
+            type=s_type,
+            target_section_header=section,
+            context_text_before=before,
+            context_text_after="",
+            original_latex_snippet=original,
+            suggested_latex_snippet=f"Reduced p95 latency of pipeline {n} by {n % 50}\\% through batching",
+            description=f"Suggestion {n}",
+        ))
+    return suggestions
+
+def measure(fn, setup):
+    """Median time over REPEAT runs and peak memory of one traced run; setup() is excluded from both"""
+    times = []
+    for _ in range(REPEAT):
+        arg = setup()
+        started = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - started)
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+def load_baseline() -> dict:
+    if UPDATE_BASELINE or not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+baseline = load_baseline()
+
+def check(name: str, seconds: float, peak_bytes: int) -> None:
+    results[name] = {"seconds": seconds, "peak_bytes": peak_bytes}
+    base = baseline.get(name)
+    if base is None:
+        return
+    assert seconds <= base["seconds"] * (1 + TIME_TOLERANCE), (
+        f"{name}: {seconds * 1000:.2f} ms vs baseline {base['seconds'] * 1000:.2f} ms (> +{TIME_TOLERANCE:.0%})"
+    )
+    assert peak_bytes <= base["peak_bytes"] * (1 + MEMORY_TOLERANCE), (
+        f"{name}: peak {peak_bytes / 1024:.0f} KiB vs baseline {base['peak_bytes'] / 1024:.0f} KiB (> +{MEMORY_TOLERANCE:.0%})"
+    )
+
+@pytest.fixture(scope="module", autouse=True)
+def write_baseline():
+    """Record results as the new baseline when updating, or when none exists yet"""
+    yield
+    if results and (UPDATE_BASELINE or not baseline):
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\n📝 Wrote LaTeX benchmark baseline to {BASELINE_PATH}")
+
+@pytest.mark.parametrize("pages", PAGES)
+def test_parse(pages):
+    latex = make_resume(pages)
+    seconds, peak = measure(ai_service.parse_resume_latex, lambda: latex)
+    check(f"parse[pages={pages}]", seconds, peak)
+
+@pytest.mark.parametrize("pages", PAGES)
+def test_serialize(pages):
+    parsed = ai_service.parse_resume_latex(make_resume(pages))
+    seconds, peak = measure(ai_service.serialize_resume_latex, lambda: parsed)
+    check(f"serialize[pages={pages}]", seconds, peak)
+
+@pytest.mark.parametrize("count", SUGGESTION_COUNTS)
+@pytest.mark.parametrize("pages", PAGES)
+def test_apply(pages, count):
+    parsed = ai_service.parse_resume_latex(make_resume(pages))
+    suggestions = make_suggestions(parsed, count)
+
+    def apply_all(resume):
+        for suggestion in suggestions:
+            ai_service.apply_suggestion(resume, suggestion)
+
+    # apply_suggestion mutates the parsed resume, so every run gets a fresh copy
+    seconds, peak = measure(apply_all, lambda: copy.deepcopy(parsed))
+    check(f"apply[pages={pages},suggestions={count}]", seconds, peak)
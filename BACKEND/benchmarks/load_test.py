@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline load test: drives start -> answer -> suggestions -> apply -> export
+at a fixed concurrency and reports throughput and p50/p95/p99 per endpoint.
+
+By default it starts the stub LLM server and the API itself (on fakeredis);
+pass --target to benchmark an already running deployment instead.
+
+Usage:
+  python benchmarks/load_test.py --users 20 --flows 200
+  python benchmarks/load_test.py --target http://localhost:8000 --duration 60 --json run.json
+  python benchmarks/load_test.py --compare baseline.json --tolerance 0.25   # exit 1 on p95 regression
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_codec import make_resume  # noqa: E402
+from stub_llm_server import start_stub  # noqa: E402
+
+JOB_POST = "We are hiring a Senior Backend Engineer with Python, Redis, AWS and distributed systems experience. " * 20
+ANSWER = "I led a team of 4 engineers migrating a payments platform to AWS, cutting p95 latency by 40%."
+
+class Recorder:
+    """Collects per-endpoint latencies and failures"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(lambda: defaultdict(int))
+        self.flows = 0
+        self.elapsed = 0.0
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.failures[label][type(e).__name__] += 1
+            return None
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            self.failures[label][str(response.status_code)] += 1
+            return None
+        self.latencies[label].append(elapsed)
+        return response
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+async def run_flow(client: httpx.AsyncClient, rec: Recorder, flow_id: int, export: bool) -> None:
+    """One user session through the whole pipeline; stops at the first failed step"""
+    # A unique resume per flow, so /start single-flight does not coalesce the load away
+    # (the near-duplicate question cache is disabled on the spawned server for the same reason)
+    resume = make_resume(20).replace("Company 0", f"Company {flow_id}-{time.time_ns()}")
+    response = await rec.call(client, "POST /session/start", "POST", "/session/start",
+                              json={"resume_text": resume, "job_post": JOB_POST})
+    if response is None:
+        return
+    start = response.json()
+    session_id = start["session_id"]
+
+    for i in range(start["total_questions"]):
+        final = i == start["total_questions"] - 1
+        label = "POST /session/answer (final)" if final else "POST /session/answer"
+        response = await rec.call(client, label, "POST", "/session/answer",
+                                  json={"session_id": session_id, "answer": ANSWER})
+        if response is None:
+            return
+
+    response = await rec.call(client, "POST /session/suggestions/{id}", "POST", f"/session/suggestions/{session_id}")
+    if response is None:
+        return
+    suggestions = response.json()["suggestions"]
+
+    response = await rec.call(client, "POST /session/apply_suggestions/{id}", "POST", f"/session/apply_suggestions/{session_id}",
+                              json={"resume_latex": resume, "accepted_suggestions": suggestions[:3]})
+    if response is None:
+        return
+
+    if export:
+        response = await rec.call(client, "POST /export/pdf", "POST", "/export/pdf",
+                                  json={"latex_code": response.json()["updated_resume_latex"]})
+        if response is None:
+            return
+    rec.flows += 1
+
+async def run_load(target: str, users: int, flows: int, duration: float, export: bool, timeout: float) -> Recorder:
+    rec = Recorder()
+    counter = iter(range(flows if flows else sys.maxsize))
+    deadline = time.perf_counter() + duration if duration else None
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        async def user():
+            for flow_id in counter:
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                await run_flow(client, rec, flow_id, export)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(users)))
+        rec.elapsed = time.perf_counter() - started
+    return rec
+
+def summarize(rec: Recorder) -> dict:
+    endpoints = {}
+    for label in sorted(set(rec.latencies) | set(rec.failures)):
+        values = rec.latencies.get(label, [])
+        endpoints[label] = {
+            "ok": len(values),
+            "failed": dict(rec.failures.get(label, {})),
+            "rps": len(values) / rec.elapsed,
+            "p50_ms": percentile(values, 50) * 1000 if values else None,
+            "p95_ms": percentile(values, 95) * 1000 if values else None,
+            "p99_ms": percentile(values, 99) * 1000 if values else None,
+        }
+    return {"elapsed_s": rec.elapsed, "flows": rec.flows, "flows_per_s": rec.flows / rec.elapsed, "endpoints": endpoints}
+
+def print_report(summary: dict) -> None:
+    print(f"\n📊 {summary['flows']} complete flows in {summary['elapsed_s']:.1f}s ({summary['flows_per_s']:.2f} flows/s)\n")
+    print(f"{'endpoint':<40}{'ok':>7}{'fail':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, s in summary["endpoints"].items():
+        fmt = lambda v: f"{v:10.1f}" if v is not None else f"{'-':>10}"
+        print(f"{label:<40}{s['ok']:>7}{sum(s['failed'].values()):>7}{s['rps']:>9.2f}"
+              f"{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}")
+        if s["failed"]:
+            print(f"{'':<40}failures: {s['failed']}")
+
+def compare(summary: dict, baseline_path: str, tolerance: float) -> bool:
+    """True when no endpoint's p95 regressed by more than `tolerance` against the baseline"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    ok = True
+    for label, base in baseline["endpoints"].items():
+        current = summary["endpoints"].get(label)
+        if not current or base.get("p95_ms") is None or current["p95_ms"] is None:
+            continue
+        change = current["p95_ms"] / base["p95_ms"] - 1
+        if change > tolerance:
+            ok = False
+            print(f"❌ {label}: p95 {base['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms (+{change:.0%})")
+    if ok:
+        print(f"✅ No p95 regression beyond {tolerance:.0%} against {baseline_path}")
+    return ok
+
+def wait_until_up(target: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ API process exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{target}/openapi.json", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit("❌ API did not come up in time")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="benchmark a running API instead of starting one")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--flows", type=int, default=100, help="total flows to run (0 = until --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="stop starting new flows after this many seconds")
+    parser.add_argument("--no-export", action="store_true", help="skip the PDF export step")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--redis", choices=["local", "fake", "none"], default="fake", help="storage for the spawned API")
+    parser.add_argument("--port", type=int, default=8010, help="port for the spawned API")
+    parser.add_argument("--llm-port", type=int, default=8900)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="write the summary to this file (usable as a --compare baseline)")
+    parser.add_argument("--compare", help="baseline summary JSON to check p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95 increase")
+    args = parser.parse_args()
+
+    export = not args.no_export
+    if export and not args.target and not shutil.which("pdflatex"):
+        print("⚠️ pdflatex not found - skipping the export step")
+        export = False
+
+    proc = None
+    target = args.target
+    if not target:
+        start_stub(args.llm_port, args.llm_latency_ms, args.llm_tokens_per_second, error_rate=args.llm_error_rate)
+        env = dict(
+            os.environ,
+            OPEN_ROUTER_URL=f"http://127.0.0.1:{args.llm_port}",
+            LLM_API_KEY="stub",
+            LLM_FALLBACK_API_URL="",
+            # The limiter protects the real provider; do not let it shape the benchmark
+            LLM_REQUESTS_PER_MINUTE=os.getenv("LLM_REQUESTS_PER_MINUTE", "1000000"),
+            LLM_TOKENS_PER_MINUTE=os.getenv("LLM_TOKENS_PER_MINUTE", "1000000000"),
+            LLM_MAX_CONCURRENCY=os.getenv("LLM_MAX_CONCURRENCY", str(max(8, args.users * 2))),
+            LLM_MAX_QUEUE=os.getenv("LLM_MAX_QUEUE", str(args.users * 4)),
+            # Flow resumes differ in one line, which the semantic cache would serve without an LLM call
+            SEMANTIC_CACHE_ENABLED="false",
+        )
+        target = f"http://127.0.0.1:{args.port}"
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(BENCH_DIR, "serve_app.py"), "--port", str(args.port), "--redis", args.redis],
+            env=env, cwd=os.path.dirname(BENCH_DIR)
+        )
+        wait_until_up(target, proc)
+
+    try:
+        print(f"🚚 {args.users} users against {target} (export={'on' if export else 'off'})")
+        rec = asyncio.run(run_load(target, args.users, args.flows, args.duration, export, args.timeout))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    summary = summarize(rec)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.compare and not compare(summary, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Run the API for benchmarking with a chosen storage backend
+
+  --redis local   use the Redis at localhost:6379 (the normal behaviour)
+  --redis fake    use an in-process fakeredis server (pip install "fakeredis[lua]")
+  --redis none    force the in-memory fallback
+
+Usage: OPEN_ROUTER_URL=http://127.0.0.1:8900 python benchmarks/serve_app.py --redis fake
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings  # noqa: E402
+
+def use_storage(mode: str) -> None:
+    """Point the shared Redis clients at the requested backend (before the app is imported)"""
+    from redis_client import redis_clients
+    if mode == "fake":
+        import fakeredis
+        server = fakeredis.FakeServer()
+        redis_clients.use(fakeredis.FakeRedis(server=server, decode_responses=True), fakeredis.FakeRedis(server=server))
+    elif mode == "none":
+        # An unreachable port keeps every check (startup and reconnect monitor) on the fallback
+        settings.REDIS_PORT = 1
+    elif not redis_clients.check():
+        raise SystemExit("❌ --redis local requested but Redis is not reachable")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--redis", choices=["local", "fake", "none"], default="fake")
+    args = parser.parse_args()
+
+    use_storage(args.redis)
+    import uvicorn
+    from main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
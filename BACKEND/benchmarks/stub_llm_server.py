@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stub LLM server for offline benchmarks
+
+Answers /chat/completions with canned but well-formed output for each
+AIService operation (questions, enhance, suggestions, rewrite, edit), after a
+simulated delay of `latency + completion_tokens / token_rate`.
+
+Usage: python benchmarks/stub_llm_server.py [--port 8900] [--latency-ms 300] [--tokens-per-second 80]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REWRITTEN_RESUME = r"""\documentclass[11pt]{article}
+\begin{document}
+\section*{Experience}
+\begin{itemize}
+%s
+\end{itemize}
+\end{document}
+"""
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def questions_reply(_: str) -> str:
+    return json.dumps([
+        "Which of the required cloud platforms have you deployed production services on?",
+        "Can you quantify the impact of your most relevant project (latency, cost, users)?",
+        "Have you led or mentored other engineers, and how large was the team?",
+    ])
+
+def enhance_reply(_: str) -> str:
+    return "\n".join(
+        rf"\resumeItem{{Improved throughput of service {i} by {10 + i}\% using async I/O and caching}}"
+        for i in range(6)
+    )
+
+def suggestions_reply(prompt: str) -> str:
+    section = "Experience" if "Experience" in prompt else "Projects"
+    return json.dumps([
+        {
+            "id": str(uuid.uuid4()),
+            "type": "add_item_to_section",
+            "target_section_header": section,
+            "context_text_before": "",
+            "context_text_after": "",
+            "original_latex_snippet": "",
+            "suggested_latex_snippet": rf"Cut p95 latency {i} by {20 + i}\% with Redis caching",
+            "description": f"Highlight measurable performance work ({i})",
+        }
+        for i in range(5)
+    ])
+
+def rewrite_reply(prompt: str) -> str:
+    items = "\n".join(rf"\item Delivered improvement {i} with measurable impact" for i in range(12))
+    return REWRITTEN_RESUME % items
+
+def edit_reply(prompt: str) -> str:
+    """Line edits against the numbered body: tweak the first bullet, add one after it"""
+    match = re.search(r"^\s*(\d+)\| (.*\\resumeItem\{.*)$", prompt, flags=re.MULTILINE)
+    if not match:
+        return "[]"
+    line, original = int(match.group(1)), match.group(2).strip()
+    return json.dumps([
+        {"op": "replace", "line": line, "original": original, "text": original.replace("Built", "Designed and built", 1)},
+        {"op": "insert_after", "line": line, "text": r"\resumeItem{Cut p95 latency by 35\% with Redis caching}"},
+    ])
+
+# Picked by a phrase from each AIService system message
+OPERATIONS = [
+    ("targeted questions", questions_reply),
+    ("actionable suggestions", suggestions_reply),
+    ("rewrite the resume", rewrite_reply),
+    ("targeted line edits", edit_reply),
+    ("Suggest LaTeX snippet", enhance_reply),
+]
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Handles chat completion and model listing requests"""
+
+    server_version = "StubLLM/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = request.get("messages", [])
+        system = " ".join(m["content"] for m in messages if m.get("role") == "system")
+        prompt = " ".join(m["content"] for m in messages if m.get("role") == "user")
+
+        config = self.server.config
+        if random.random() < config["error_rate"]:
+            self._send_json(500, {"error": {"message": "stub injected failure"}})
+            return
+
+        reply = next((fn for phrase, fn in OPERATIONS if phrase in system), lambda _: "OK")(prompt)
+        completion_tokens = estimate_tokens(reply)
+        delay = config["latency"] + completion_tokens / config["token_rate"] + random.uniform(0, config["jitter"])
+        time.sleep(delay)
+
+        prompt_tokens = estimate_tokens(system + prompt)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub-model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+def start_stub(port: int = 8900, latency_ms: float = 300, tokens_per_second: float = 80,
+               jitter_ms: float = 50, error_rate: float = 0.0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread and return the server (call .shutdown() to stop)"""
+    server = ThreadingHTTPServer((host, port), StubLLMHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency": latency_ms / 1000,
+        "token_rate": tokens_per_second,
+        "jitter": jitter_ms / 1000,
+        "error_rate": error_rate,
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="simulated generation speed")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency_ms, args.tokens_per_second, args.jitter_ms, args.error_rate, args.host)
+    print(f"🤖 Stub LLM listening on http://{args.host}:{args.port} (set OPEN_ROUTER_URL to this)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n👋 Stub LLM stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Convert a TRACING_FILE (JSON lines of spans) into folded stacks for flame graphs
+
+The output works with flamegraph.pl, speedscope and inferno. Values are the
+self time of each span (its duration minus its children's) in microseconds.
+
+Usage: python benchmarks/trace_flamegraph.py traces.jsonl > traces.folded
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+def load_spans(path: str) -> dict:
+    spans = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                spans[record["span_id"]] = record
+    return spans
+
+def fold(spans: dict, name_filter: str = None) -> dict:
+    children_time = defaultdict(int)
+    for record in spans.values():
+        if record["parent_id"] in spans:
+            children_time[record["parent_id"]] += record["end_ns"] - record["start_ns"]
+
+    folded = defaultdict(int)
+    for span_id, record in spans.items():
+        stack = []
+        current = record
+        while current is not None:
+            stack.append(current["name"].replace(";", ":"))
+            current = spans.get(current["parent_id"])
+        stack.reverse()
+        if name_filter and name_filter not in stack[0]:
+            continue
+        self_ns = (record["end_ns"] - record["start_ns"]) - children_time[span_id]
+        folded[";".join(stack)] += max(0, self_ns) // 1000
+    return folded
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold exported spans into flame graph stacks")
+    parser.add_argument("trace_file")
+    parser.add_argument("--root", help="only include traces whose root span name contains this, e.g. '/session/answer'")
+    args = parser.parse_args()
+    for stack, micros in sorted(fold(load_spans(args.trace_file), args.root).items()):
+        print(f"{stack} {micros}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Content-addressed, refcounted storage for large texts shared across sessions
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from compression import blob_compressor
+from redis_client import get_redis
+
+# Bumps the refcount and stretches both keys to the longest-lived reference.
+# Returns the new refcount, or -1 (without counting) when the blob is missing.
+TOUCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local refs = redis.call('INCRBY', KEYS[2], ARGV[2])
+local ttl = tonumber(ARGV[1])
+if redis.call('TTL', KEYS[1]) < ttl then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+if redis.call('TTL', KEYS[2]) < ttl then
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return refs
+"""
+
+PUT_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'NX')
+local refs = redis.call('INCR', KEYS[2])
+local ttl = tonumber(ARGV[2])
+if redis.call('TTL', KEYS[1]) < ttl then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+if redis.call('TTL', KEYS[2]) < ttl then
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return refs
+"""
+
+RELEASE_SCRIPT = """
+local refs = redis.call('DECR', KEYS[2])
+if refs <= 0 then
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+return refs
+"""
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the text; used as the blob key and as a cache key for derived work"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """hash -> text store; identical resumes and job posts are kept once per cluster"""
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        # Blobs are immutable, so decoded texts can be cached per worker without invalidation
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._memory: Dict[str, List] = {}
+        self._scripts = {}
+
+    def _script(self, r, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = r.register_script(source)
+        return self._scripts[source]
+
+    @staticmethod
+    def _keys(blob_hash: str) -> List[str]:
+        return [f"blob:{blob_hash}", f"blobref:{blob_hash}"]
+
+    def _remember(self, blob_hash: str, text: str) -> None:
+        self._cache[blob_hash] = text
+        self._cache.move_to_end(blob_hash)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def acquire(self, text: str, ttl: int, blob_hash: Optional[str] = None) -> str:
+        """Add a reference to the text (storing it if new) and return its hash"""
+        blob_hash = blob_hash or content_hash(text)
+        r = get_redis(binary=True)
+        if r is None:
+            entry = self._memory.setdefault(blob_hash, [text, 0])
+            entry[1] += 1
+            return blob_hash
+
+        keys = self._keys(blob_hash)
+        # Only ship the payload when no session references it yet
+        if self._script(r, TOUCH_SCRIPT)(keys=keys, args=[ttl, 1]) == -1:
+            payload = blob_compressor.encode(text.encode("utf-8"))
+            self._script(r, PUT_SCRIPT)(keys=keys, args=[payload, ttl])
+        self._remember(blob_hash, text)
+        return blob_hash
+
+    def refresh(self, blob_hash: str, ttl: int) -> None:
+        """Extend the blob's lifetime to cover a referencing session's new TTL"""
+        r = get_redis(binary=True)
+        if r is not None:
+            self._script(r, TOUCH_SCRIPT)(keys=self._keys(blob_hash), args=[ttl, 0])
+
+    def release(self, blob_hash: str) -> None:
+        """Drop a reference; the blob is deleted with its last reference"""
+        r = get_redis(binary=True)
+        if r is None:
+            entry = self._memory.get(blob_hash)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._memory[blob_hash]
+            return
+        self._script(r, RELEASE_SCRIPT)(keys=self._keys(blob_hash))
+
+    def get(self, blob_hash: str) -> Optional[str]:
+        if blob_hash in self._cache:
+            self._cache.move_to_end(blob_hash)
+            return self._cache[blob_hash]
+        r = get_redis(binary=True)
+        if r is None:
+            entry = self._memory.get(blob_hash)
+            return entry[0] if entry else None
+        stored = r.get(f"blob:{blob_hash}")
+        if stored is None:
+            return None
+        text = blob_compressor.decode(stored).decode("utf-8")
+        self._remember(blob_hash, text)
+        return text
+
+
+# Global blob store instance
+blob_store = BlobStore()
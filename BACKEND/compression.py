@@ -0,0 +1,284 @@
+"""
+Transparent compression for large session payloads stored in Redis
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+from config import settings
+from metrics import SESSION_PAYLOAD_BYTES, SESSION_CODEC_SECONDS
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Frame markers (first byte of every stored value). Compressed frames carry the 4-byte id of
+# their dictionary after the marker.
+RAW = b"J"
+ZLIB = b"z"
+ZSTD = b"s"
+DICT_ID_BYTES = 4
+
+# Resume boilerplate shared by most sessions. Session bodies are JSON, so the dictionary
+# holds the JSON-escaped form; zlib favours matches near its end, so the most common text goes last.
+RESUME_BOILERPLATE = r"""\documentclass[letterpaper,11pt]{article}
+
+\usepackage{latexsym}
+\usepackage[empty]{fullpage}
+\usepackage{titlesec}
+\usepackage{marvosym}
+\usepackage[usenames,dvipsnames]{color}
+\usepackage{verbatim}
+\usepackage{enumitem}
+\usepackage[hidelinks]{hyperref}
+\usepackage{fancyhdr}
+\usepackage[english]{babel}
+\usepackage{tabularx}
+
+\pagestyle{fancy}
+\fancyhf{}
+\fancyfoot{}
+\renewcommand{\headrulewidth}{0pt}
+\renewcommand{\footrulewidth}{0pt}
+
+\addtolength{\oddsidemargin}{-0.5in}
+\addtolength{\evensidemargin}{-0.5in}
+\addtolength{\textwidth}{1in}
+\addtolength{\topmargin}{-.5in}
+\addtolength{\textheight}{1.0in}
+
+\urlstyle{same}
+
+\raggedbottom
+\raggedright
+\setlength{\tabcolsep}{0in}
+
+\titleformat{\section}{
+  \vspace{-4pt}\scshape\raggedright\large
+}{}{0em}{}[\color{black}\titlerule \vspace{-5pt}]
+
+\newcommand{\resumeItem}[1]{
+  \item\small{
+    {#1 \vspace{-2pt}}
+  }
+}
+
+\newcommand{\resumeSubheading}[4]{
+  \vspace{-2pt}\item
+    \begin{tabular*}{0.97\textwidth}[t]{l@{\extracolsep{\fill}}r}
+      \textbf{#1} & #2 \\
+      \textit{\small#3} & \textit{\small #4} \\
+    \end{tabular*}\vspace{-7pt}
+}
+
+\newcommand{\resumeSubItem}[1]{\resumeItem{#1}\vspace{-4pt}}
+
+\renewcommand\labelitemii{$\vcenter{\hbox{\tiny$\bullet$}}$}
+
+\newcommand{\resumeSubHeadingListStart}{\begin{itemize}[leftmargin=0.15in, label={}]}
+\newcommand{\resumeSubHeadingListEnd}{\end{itemize}}
+\newcommand{\resumeItemListStart}{\begin{itemize}}
+\newcommand{\resumeItemListEnd}{\end{itemize}\vspace{-5pt}}
+
+\begin{document}
+\end{document}
+\section{Education}\section{Projects}\section{Technical Skills}\section{Experience}
+\resumeSubHeadingListStart
+    \resumeSubheading
+      {}{}
+      {}{}
+      \resumeItemListStart
+        \resumeItem{Developed }
+        \resumeItem{Built }
+        \resumeItem{Implemented }
+        \resumeItem{Designed }
+        \resumeItem{Led }
+      \resumeItemListEnd
+  \resumeSubHeadingListEnd
+ \textbf{Languages}{: Python, Java, JavaScript, TypeScript, SQL, C++, Go} \\
+ \textbf{Frameworks}{: React, Node.js, Django, Flask, FastAPI, Spring Boot} \\
+ \textbf{Developer Tools}{: Git, Docker, Kubernetes, AWS, GCP, Azure, PostgreSQL, Redis} \\
+We are looking for a Software Engineer with experience in . Responsibilities: Requirements: years of experience
+"""
+
+SESSION_SKELETON = '{"resume_text":"","job_post":"","questions":[],"answers":[],"current_question_index":0,"created_at":"'
+
+DEFAULT_DICTIONARY = (json.dumps(RESUME_BOILERPLATE)[1:-1] + SESSION_SKELETON).encode("utf-8")
+
+# Blobs hold the texts themselves, so their dictionary is the unescaped boilerplate
+BLOB_DICTIONARY = RESUME_BOILERPLATE.encode("utf-8")
+
+
+def dictionary_id(dictionary: bytes) -> bytes:
+    return hashlib.sha256(dictionary).digest()[:DICT_ID_BYTES]
+
+
+def load_dictionaries(paths: Optional[str]) -> List[bytes]:
+    """Dictionaries from an os.pathsep-separated list of files (missing files are skipped).
+
+    The first is used for writing; the rest stay readable, so values written with an
+    older dictionary survive a switch to a new one.
+    """
+    dictionaries = []
+    for path in (paths or "").split(os.pathsep):
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                dictionaries.append(f.read())
+    return dictionaries
+
+
+class CompressionStats:
+    """Counters for compression ratio and codec time"""
+
+    def __init__(self):
+        self.encoded = 0
+        self.compressed = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+        self.decoded = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "values_encoded": self.encoded,
+            "values_compressed": self.compressed,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 3) if self.stored_bytes else None,
+            "compress_seconds": round(self.compress_seconds, 6),
+            "values_decoded": self.decoded,
+            "decompress_seconds": round(self.decompress_seconds, 6),
+        }
+
+
+class PayloadCompressor:
+    """Compresses values above a size threshold with zlib or zstd and a shared dictionary.
+
+    `dictionary` compresses new values; it and every one in `readable` can decode
+    them (frames name their dictionary by id).
+    """
+
+    def __init__(self, codec: str = "zlib", level: int = 6, threshold: int = 1024,
+                 dictionary: bytes = DEFAULT_DICTIONARY, readable: Iterable[bytes] = ()):
+        self.threshold = threshold
+        self.level = level
+        self.stats = CompressionStats()
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary_id(dictionary)
+        self._dictionaries: Dict[bytes, bytes] = {dictionary_id(d): d for d in readable}
+        self._dictionaries[self.dictionary_id] = dictionary
+        self.codec = codec if codec != "zstd" or zstandard is not None else "zlib"
+        self._zstd_dicts: Dict[bytes, object] = {}
+
+    def _zstd_dict(self, dictionary: bytes):
+        key = dictionary_id(dictionary)
+        if key not in self._zstd_dicts:
+            # A trained dictionary carries its own header; anything else is raw content
+            self._zstd_dicts[key] = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_AUTO)
+        return self._zstd_dicts[key]
+
+    def encode(self, data: bytes) -> bytes:
+        """Frame a value for storage, compressing it when it is large enough to pay off"""
+        self.stats.encoded += 1
+        self.stats.raw_bytes += len(data)
+        SESSION_PAYLOAD_BYTES.labels(kind="raw").inc(len(data))
+        if len(data) < self.threshold:
+            self.stats.stored_bytes += len(data) + 1
+            SESSION_PAYLOAD_BYTES.labels(kind="stored").inc(len(data) + 1)
+            return RAW + data
+
+        started = time.perf_counter()
+        if self.codec == "zstd":
+            marker = ZSTD
+            body = zstandard.ZstdCompressor(level=self.level, dict_data=self._zstd_dict(self.dictionary)).compress(data)
+        else:
+            marker = ZLIB
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+            body = compressor.compress(data) + compressor.flush()
+        elapsed = time.perf_counter() - started
+        self.stats.compress_seconds += elapsed
+        SESSION_CODEC_SECONDS.labels(op="compress").observe(elapsed)
+
+        frame = marker + self.dictionary_id + body
+        if len(frame) >= len(data) + 1:
+            self.stats.stored_bytes += len(data) + 1
+            SESSION_PAYLOAD_BYTES.labels(kind="stored").inc(len(data) + 1)
+            return RAW + data
+        self.stats.compressed += 1
+        self.stats.stored_bytes += len(frame)
+        SESSION_PAYLOAD_BYTES.labels(kind="stored").inc(len(frame))
+        return frame
+
+    def decode(self, frame: bytes) -> bytes:
+        """Inverse of encode; values written before compression existed are returned as-is"""
+        marker, body = frame[:1], frame[1:]
+        if marker == RAW:
+            return body
+        if marker not in (ZLIB, ZSTD):
+            return frame
+        dict_id, body = body[:DICT_ID_BYTES], body[DICT_ID_BYTES:]
+        dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            raise RuntimeError(f"Value was compressed with dictionary {dict_id.hex()}, which is not loaded "
+                               "(keep its file listed in the compression DICT_PATH setting)")
+
+        started = time.perf_counter()
+        if marker == ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed sessions")
+            data = zstandard.ZstdDecompressor(dict_data=self._zstd_dict(dictionary)).decompress(body)
+        else:
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            data = decompressor.decompress(body) + decompressor.flush()
+        elapsed = time.perf_counter() - started
+        self.stats.decompress_seconds += elapsed
+        self.stats.decoded += 1
+        SESSION_CODEC_SECONDS.labels(op="decompress").observe(elapsed)
+        return data
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = 16384) -> bytes:
+    """Train a zstd dictionary from sample payloads (e.g. exported session bodies)"""
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to train a dictionary")
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+SESSION_DICTIONARIES = load_dictionaries(settings.SESSION_COMPRESSION_DICT_PATH) or [DEFAULT_DICTIONARY]
+BLOB_DICTIONARIES = load_dictionaries(settings.BLOB_COMPRESSION_DICT_PATH) or [BLOB_DICTIONARY]
+
+# Global compressor for session payloads (JSON bodies)
+session_compressor = PayloadCompressor(
+    codec=settings.SESSION_COMPRESSION_CODEC,
+    level=settings.SESSION_COMPRESSION_LEVEL,
+    threshold=settings.SESSION_COMPRESSION_THRESHOLD,
+    dictionary=SESSION_DICTIONARIES[0],
+    readable=[DEFAULT_DICTIONARY, *SESSION_DICTIONARIES[1:]]
+)
+
+# Global compressor for blob-store texts (raw LaTeX and job posts)
+blob_compressor = PayloadCompressor(
+    codec=settings.SESSION_COMPRESSION_CODEC,
+    level=settings.SESSION_COMPRESSION_LEVEL,
+    threshold=settings.SESSION_COMPRESSION_THRESHOLD,
+    dictionary=BLOB_DICTIONARIES[0],
+    readable=[BLOB_DICTIONARY, *BLOB_DICTIONARIES[1:]]
+)
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python compression.py OUTPUT_DICT SAMPLE_FILE [SAMPLE_FILE ...]")
+        sys.exit(1)
+    samples = []
+    for path in sys.argv[2:]:
+        with open(path, "rb") as f:
+            samples.append(f.read())
+    with open(sys.argv[1], "wb") as f:
+        f.write(train_dictionary(samples))
+    print(f"✅ Wrote dictionary trained on {len(samples)} samples to {sys.argv[1]}")
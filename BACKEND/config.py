@@ -1,7 +1,8 @@
 import os
+import json
+import tempfile
 from typing import Optional
 from dotenv import load_dotenv
-from openai import OpenAI
 
 class Settings:
     """Application settings loaded from environment variables"""
@@ -13,14 +14,159 @@ class Settings:
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "2000"))
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     
+    # Secondary provider used when the primary one fails
+    LLM_FALLBACK_API_URL: Optional[str] = os.getenv("LLM_FALLBACK_API_URL")
+    LLM_FALLBACK_API_KEY: Optional[str] = os.getenv("LLM_FALLBACK_API_KEY")
+    LLM_FALLBACK_MODEL: Optional[str] = os.getenv("LLM_FALLBACK_MODEL")
+    
+    # Per-operation routing ("primary" or "fallback" provider)
+    LLM_QUESTIONS_MODEL: str = os.getenv("LLM_QUESTIONS_MODEL", LLM_MODEL)
+    LLM_QUESTIONS_PROVIDER: str = os.getenv("LLM_QUESTIONS_PROVIDER", "primary")
+    LLM_QUESTIONS_MAX_TOKENS: int = int(os.getenv("LLM_QUESTIONS_MAX_TOKENS", "512"))
+    LLM_ENHANCE_MODEL: str = os.getenv("LLM_ENHANCE_MODEL", LLM_MODEL)
+    LLM_ENHANCE_PROVIDER: str = os.getenv("LLM_ENHANCE_PROVIDER", "primary")
+    LLM_ENHANCE_MAX_TOKENS: int = int(os.getenv("LLM_ENHANCE_MAX_TOKENS", str(LLM_MAX_TOKENS)))
+    LLM_SUGGESTIONS_MODEL: str = os.getenv("LLM_SUGGESTIONS_MODEL", LLM_MODEL)
+    LLM_SUGGESTIONS_PROVIDER: str = os.getenv("LLM_SUGGESTIONS_PROVIDER", "primary")
+    LLM_SUGGESTIONS_MAX_TOKENS: int = int(os.getenv("LLM_SUGGESTIONS_MAX_TOKENS", str(LLM_MAX_TOKENS)))
+    LLM_REWRITE_MODEL: str = os.getenv("LLM_REWRITE_MODEL", LLM_MODEL)
+    LLM_REWRITE_PROVIDER: str = os.getenv("LLM_REWRITE_PROVIDER", "primary")
+    LLM_REWRITE_MAX_TOKENS: int = int(os.getenv("LLM_REWRITE_MAX_TOKENS", str(LLM_MAX_TOKENS)))
+    LLM_EDIT_MODEL: str = os.getenv("LLM_EDIT_MODEL", LLM_REWRITE_MODEL)
+    LLM_EDIT_PROVIDER: str = os.getenv("LLM_EDIT_PROVIDER", LLM_REWRITE_PROVIDER)
+    LLM_EDIT_MAX_TOKENS: int = int(os.getenv("LLM_EDIT_MAX_TOKENS", "1024"))
+    
+    # How accepted suggestions are merged: "diff" (LLM returns line edits, applied locally,
+    # falling back to a full rewrite if they don't apply) or "full" (LLM regenerates the resume)
+    RESUME_UPDATE_MODE: str = os.getenv("RESUME_UPDATE_MODE", "diff")
+    
+    # LLM admission control (limits are cluster-wide when Redis is available)
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+    
+    # USD per 1K tokens, e.g. {"deepseek-chat": {"prompt": 0.00027, "completion": 0.0011}}
+    LLM_MODEL_PRICES: dict = json.loads(os.getenv("LLM_MODEL_PRICES", "{}"))
+    
     # Application Configuration
     APP_NAME: str = "AI Resume Assistant API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     
+    # Logging ("json" or "text"); LLM prompts/responses are only logged at DEBUG, for a sampled fraction of calls
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_PAYLOAD_SAMPLE_RATE: float = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.05"))
+    LOG_PAYLOAD_MAX_CHARS: int = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "4000"))
+    
+    # Redis (connected lazily; re-checked every REDIS_RECONNECT_INTERVAL_SECONDS so the
+    # app moves back to Redis after an outage instead of staying on the in-memory fallback)
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "1.0"))
+    REDIS_RECONNECT_INTERVAL_SECONDS: float = float(os.getenv("REDIS_RECONNECT_INTERVAL_SECONDS", "5"))
+    
     # Session Configuration
     SESSION_TIMEOUT_HOURS: int = int(os.getenv("SESSION_TIMEOUT_HOURS", "24"))
     
+    # Resume version history: a full snapshot every N versions, line deltas in between
+    RESUME_SNAPSHOT_INTERVAL: int = int(os.getenv("RESUME_SNAPSHOT_INTERVAL", "10"))
+    RESUME_MAX_VERSIONS: int = int(os.getenv("RESUME_MAX_VERSIONS", "50"))
+    
+    # Session payload compression ("zlib", or "zstd" when zstandard is installed)
+    SESSION_COMPRESSION_CODEC: str = os.getenv("SESSION_COMPRESSION_CODEC", "zlib")
+    SESSION_COMPRESSION_LEVEL: int = int(os.getenv("SESSION_COMPRESSION_LEVEL", "6"))
+    SESSION_COMPRESSION_THRESHOLD: int = int(os.getenv("SESSION_COMPRESSION_THRESHOLD", "1024"))
+    # One file, or several separated by os.pathsep (the first compresses, all decompress)
+    SESSION_COMPRESSION_DICT_PATH: Optional[str] = os.getenv("SESSION_COMPRESSION_DICT_PATH")
+    # Blob-store texts are raw LaTeX, not JSON, and use their own dictionary (same format)
+    BLOB_COMPRESSION_DICT_PATH: Optional[str] = os.getenv("BLOB_COMPRESSION_DICT_PATH")
+    
+    # PDF export: concurrent pdflatex runs per worker (extra exports queue)
+    PDFLATEX_MAX_CONCURRENCY: int = int(os.getenv("PDFLATEX_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+    PDFLATEX_TIMEOUT_SECONDS: int = int(os.getenv("PDFLATEX_TIMEOUT_SECONDS", "20"))
+    # Per-job sandbox limits (0 disables one); scratch files go to a RAM-backed spool
+    PDFLATEX_CPU_SECONDS: int = int(os.getenv("PDFLATEX_CPU_SECONDS", "15"))
+    PDFLATEX_MEMORY_MB: int = int(os.getenv("PDFLATEX_MEMORY_MB", "1024"))
+    PDFLATEX_MAX_FILE_MB: int = int(os.getenv("PDFLATEX_MAX_FILE_MB", "32"))
+    PDFLATEX_SPOOL_DIR: Optional[str] = os.getenv("PDFLATEX_SPOOL_DIR")
+    # Pre-flight limits; larger documents are rejected before compiling
+    LATEX_MAX_BYTES: int = int(os.getenv("LATEX_MAX_BYTES", str(256 * 1024)))
+    LATEX_MAX_LINES: int = int(os.getenv("LATEX_MAX_LINES", "10000"))
+    # Exports with a session_id reuse that session's compile directory (.aux etc.) and skip
+    # pdflatex when the source is unchanged; idle workspaces are removed after the TTL
+    COMPILE_WORKSPACE_DIR: Optional[str] = os.getenv("COMPILE_WORKSPACE_DIR")
+    COMPILE_WORKSPACE_TTL_SECONDS: float = float(os.getenv("COMPILE_WORKSPACE_TTL_SECONDS", "1800"))
+    COMPILE_WORKSPACE_MAX: int = int(os.getenv("COMPILE_WORKSPACE_MAX", "64"))
+    
+    # Page previews (/export/preview): rendered with pdftoppm or mutool, cached on disk by LaTeX hash + page
+    PREVIEW_CACHE_DIR: str = os.getenv("PREVIEW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "resume-previews"))
+    PREVIEW_CACHE_MAX_MB: int = int(os.getenv("PREVIEW_CACHE_MAX_MB", "256"))
+    PREVIEW_MAX_CONCURRENCY: int = int(os.getenv("PREVIEW_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+    PREVIEW_TIMEOUT_SECONDS: int = int(os.getenv("PREVIEW_TIMEOUT_SECONDS", "10"))
+    PREVIEW_MIN_DPI: int = int(os.getenv("PREVIEW_MIN_DPI", "36"))
+    PREVIEW_MAX_DPI: int = int(os.getenv("PREVIEW_MAX_DPI", "200"))
+    
+    # Local TF-IDF relevance scoring (needs numpy): a requirement counts as covered when its best
+    # resume item scores at least the threshold; suggestions only see the most relevant sections
+    RELEVANCE_COVERAGE_THRESHOLD: float = float(os.getenv("RELEVANCE_COVERAGE_THRESHOLD", "0.2"))
+    RELEVANCE_MAX_KEYWORDS: int = int(os.getenv("RELEVANCE_MAX_KEYWORDS", "15"))
+    RELEVANCE_MAX_REQUIREMENTS: int = int(os.getenv("RELEVANCE_MAX_REQUIREMENTS", "100"))
+    RELEVANCE_PREFILTER: bool = os.getenv("RELEVANCE_PREFILTER", "True").lower() == "true"
+    RELEVANCE_MAX_SECTIONS: int = int(os.getenv("RELEVANCE_MAX_SECTIONS", "4"))
+    
+    # Near-duplicate cache for generated questions: a (resume, job post) pair reuses the questions of
+    # a cached pair when both texts' estimated word-shingle Jaccard similarity is >= the threshold
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "True").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_NUM_PERM: int = int(os.getenv("SEMANTIC_CACHE_NUM_PERM", "128"))
+    SEMANTIC_CACHE_BANDS: int = int(os.getenv("SEMANTIC_CACHE_BANDS", "32"))
+    SEMANTIC_CACHE_SHINGLE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SHINGLE_SIZE", "3"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1024"))
+    SEMANTIC_CACHE_TTL_SECONDS: float = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    
+    # Batch screening (/batch/analyze): resumes analyzed at once per batch, on top of the LLM limiter
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    BATCH_MAX_RESUMES: int = int(os.getenv("BATCH_MAX_RESUMES", "500"))
+    BATCH_MAX_UPLOAD_MB: int = int(os.getenv("BATCH_MAX_UPLOAD_MB", "64"))
+    BATCH_MAX_RETRIES: int = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+    
+    # Tracing (needs opentelemetry-sdk; exporter is "file", "otlp" or "console")
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "file")
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "traces.jsonl")
+    
+    # Background jobs (set JOB_WORKERS=0 when running worker.py processes instead)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_RESULT_TTL_SECONDS: int = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    # A worker whose heartbeat is older than this is presumed dead and its jobs are requeued
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    
+    # Readiness (/ready): dependency probes are refreshed in the background, saturation is read live
+    READY_PROBE_INTERVAL_SECONDS: float = float(os.getenv("READY_PROBE_INTERVAL_SECONDS", "5"))
+    READY_LLM_PROBE_INTERVAL_SECONDS: float = float(os.getenv("READY_LLM_PROBE_INTERVAL_SECONDS", "30"))
+    READY_LLM_TIMEOUT_SECONDS: float = float(os.getenv("READY_LLM_TIMEOUT_SECONDS", "3"))
+    READY_REDIS_MAX_LATENCY_MS: float = float(os.getenv("READY_REDIS_MAX_LATENCY_MS", "50"))
+    READY_REQUIRE_REDIS: bool = os.getenv("READY_REQUIRE_REDIS", "True").lower() == "true"
+    READY_REQUIRE_PDFLATEX: bool = os.getenv("READY_REQUIRE_PDFLATEX", "True").lower() == "true"
+    # Not ready once the LLM wait queue is this full, or more than N exports wait per compile slot
+    READY_LLM_QUEUE_SATURATION: float = float(os.getenv("READY_LLM_QUEUE_SATURATION", "0.8"))
+    READY_COMPILE_QUEUE_PER_SLOT: int = int(os.getenv("READY_COMPILE_QUEUE_PER_SLOT", "4"))
+    
+    # Production serving (python run.py --production / gunicorn -c gunicorn_conf.py main:app)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 2)))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "2000"))
+    SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "200"))
+    # Long enough for an LLM rewrite; workers get this long to finish in-flight requests on recycle
+    SERVER_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_TIMEOUT_SECONDS", "180"))
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "60"))
+    
     @classmethod
     def validate(cls) -> None:
         """Validate required settings"""
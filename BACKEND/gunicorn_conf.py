@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for production serving
+
+Usage: gunicorn -c gunicorn_conf.py main:app   (or: python run.py --production)
+"""
+
+import os
+import tempfile
+
+# Metrics from all workers are aggregated through files in this directory;
+# it must be set before prometheus_client is imported by the preloaded app
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="resume-metrics-")
+
+from uvicorn.workers import UvicornWorker  # noqa: E402
+from config import settings  # noqa: E402
+from redis_client import redis_clients  # noqa: E402
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Uvicorn worker with uvloop and httptools pinned rather than auto-detected"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+worker_class = "gunicorn_conf.ProductionUvicornWorker"
+workers = settings.WEB_CONCURRENCY
+# Sessions, suggestions and the job queue fall back to per-process memory without Redis,
+# so extra workers would not see each other's sessions
+if workers > 1 and not redis_clients.check():
+    print(f"⚠️ Redis not available - running 1 worker instead of {workers} (in-memory sessions are per-process)")
+    workers = 1
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = True
+keepalive = settings.SERVER_KEEPALIVE_SECONDS
+backlog = settings.SERVER_BACKLOG
+# Recycle workers after a jittered number of requests to bound slow memory growth
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+timeout = settings.SERVER_TIMEOUT_SECONDS
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+accesslog = None
+
+
+def post_fork(server, worker):
+    """Each worker opens its own Redis sockets instead of sharing the master's"""
+    redis_clients.reset_connections()
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the multiprocess metrics"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
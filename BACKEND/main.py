@@ -2,10 +2,55 @@
 AI Resume Assistant API - Main Application
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+import codec
 from config import settings
-from routers import session_router, health_router, export_router
+from routers import session_router, health_router, export_router, job_router, metrics_router, batch_router, analysis_router
+from services.job_queue import job_queue
+from services.ai_service import ai_service
+from services.readiness import readiness
+from services.compile_workspace import compile_workspaces
+from redis_client import redis_clients
+from metrics import MetricsMiddleware
+from tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from logging_config import RequestIdMiddleware, configure_logging, stop_logging
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build clients and background tasks per worker at startup; tear them down at shutdown"""
+    print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    app.state.ready = False
+    configure_logging()
+    settings.validate()
+    if setup_tracing():
+        print(f"🔭 Tracing enabled ({settings.TRACING_EXPORTER} exporter)")
+    # The first ping runs off the event loop and is bounded by REDIS_CONNECT_TIMEOUT_SECONDS
+    await asyncio.to_thread(redis_clients.check)
+    redis_clients.start_monitor(settings.REDIS_RECONNECT_INTERVAL_SECONDS)
+    ai_service.router.connect()
+    job_queue.start_workers(settings.JOB_WORKERS)
+    compile_workspaces.start()
+    # First refresh runs immediately; /ready stays 503 until it has completed
+    readiness.start()
+    app.state.ready = True
+
+    yield
+
+    print("👋 Shutting down AI Resume Assistant API")
+    app.state.ready = False
+    await readiness.stop()
+    await job_queue.stop_workers()
+    await compile_workspaces.stop()
+    compile_workspaces.close()
+    await ai_service.router.close()
+    await redis_clients.stop_monitor()
+    redis_clients.close()
+    shutdown_tracing()
+    stop_logging()
 
 # Create FastAPI application
 app = FastAPI(
@@ -13,7 +58,9 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="AI-powered resume assistant that analyzes resumes against job postings",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse if codec.HAS_ORJSON else JSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware for frontend-backend connection
@@ -25,24 +72,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route request latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# One trace span per request (no-op unless TRACING_ENABLED)
+app.add_middleware(TracingMiddleware)
+
+# Outermost: tag every request (and its log records) with an X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(health_router.router)
 app.include_router(session_router.router)
 app.include_router(export_router.router)
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Application startup event"""
-    print(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION}")
-    settings.validate()
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Application shutdown event"""
-    print("👋 Shutting down AI Resume Assistant API")
+app.include_router(job_router.router)
+app.include_router(batch_router.router)
+app.include_router(analysis_router.router)
+app.include_router(metrics_router.router)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # run.py handles development reload and the multi-worker production mode
+    from run import main
+    main() 
\ No newline at end of file
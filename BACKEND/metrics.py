@@ -0,0 +1,203 @@
+"""
+Prometheus metrics for request, LLM, storage and compile latency
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+    class _NoopMetric:
+        """Stand-in used when prometheus_client is not installed"""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs):
+            return self
+
+        def observe(self, *args, **kwargs):
+            pass
+
+        def inc(self, *args, **kwargs):
+            pass
+
+        def dec(self, *args, **kwargs):
+            pass
+
+        def set(self, *args, **kwargs):
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+
+# Buckets spanning sub-millisecond store ops up to long LLM calls and compiles
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["route", "method", "status"], buckets=FAST_BUCKETS + SLOW_BUCKETS[3:]
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "LLM provider call latency per AIService operation",
+    ["operation", "provider", "model", "outcome"], buckets=SLOW_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens used", ["operation", "model", "kind"]
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total", "Estimated LLM spend in USD", ["operation", "model"]
+)
+LLM_QUEUE_ACTIVE = Gauge(
+    "llm_queue_active", "LLM calls holding a concurrency slot", multiprocess_mode="livesum"
+)
+LLM_QUEUE_WAITING = Gauge(
+    "llm_queue_waiting", "LLM calls waiting for a concurrency slot", multiprocess_mode="livesum"
+)
+LLM_REJECTED = Counter(
+    "llm_rejected_total", "LLM calls rejected with 429", ["reason"]
+)
+STORE_OP_SECONDS = Histogram(
+    "session_store_op_duration_seconds", "SessionManager storage operation latency",
+    ["op", "outcome"], buckets=FAST_BUCKETS
+)
+SESSION_PAYLOAD_BYTES = Counter(
+    "session_payload_bytes_total", "Session payload bytes before (raw) and after (stored) compression", ["kind"]
+)
+SESSION_CODEC_SECONDS = Histogram(
+    "session_codec_duration_seconds", "Session payload compression/decompression time",
+    ["op"], buckets=FAST_BUCKETS
+)
+PDFLATEX_COMPILE_SECONDS = Histogram(
+    "pdflatex_compile_duration_seconds", "pdflatex run time", ["outcome"], buckets=SLOW_BUCKETS
+)
+PDFLATEX_CPU_SECONDS = Histogram(
+    "pdflatex_cpu_seconds", "CPU time (user+system) per pdflatex job", buckets=SLOW_BUCKETS
+)
+PDFLATEX_WALL_SECONDS = Histogram(
+    "pdflatex_wall_seconds", "Wall time per sandboxed pdflatex job", buckets=SLOW_BUCKETS
+)
+PDFLATEX_MAX_RSS_BYTES = Histogram(
+    "pdflatex_max_rss_bytes", "Peak resident memory per pdflatex job",
+    buckets=tuple(mb * 1024 * 1024 for mb in (16, 32, 64, 128, 256, 512, 1024, 2048))
+)
+COMPILE_QUEUE_WAIT_SECONDS = Histogram(
+    "compile_queue_wait_seconds", "Time an export waited for a free compile slot", buckets=FAST_BUCKETS + SLOW_BUCKETS[3:]
+)
+COMPILE_QUEUE_DEPTH = Gauge(
+    "compile_queue_depth", "Exports waiting for a compile slot", multiprocess_mode="livesum"
+)
+RESUME_UPDATES = Counter(
+    "resume_updates_total", "Accepted-suggestion resume updates by mode and outcome", ["mode", "outcome"]
+)
+LATEX_OP_SECONDS = Histogram(
+    "latex_op_duration_seconds", "LaTeX parse/apply/serialize time", ["op", "outcome"], buckets=FAST_BUCKETS
+)
+WORKSPACE_COMPILES = Counter(
+    "compile_workspace_exports_total", "Session-workspace exports by result (compiled or reused)", ["result"]
+)
+WORKSPACES_ACTIVE = Gauge(
+    "compile_workspaces_active", "Persistent session compile workspaces on disk", multiprocess_mode="livesum"
+)
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "semantic_cache_lookups_total", "Near-duplicate question cache lookups", ["result"]
+)
+SEMANTIC_CACHE_EVICTIONS = Counter(
+    "semantic_cache_evictions_total", "Near-duplicate question cache evictions", ["reason"]
+)
+SEMANTIC_CACHE_ENTRIES = Gauge(
+    "semantic_cache_entries", "Entries in the near-duplicate question cache", multiprocess_mode="livesum"
+)
+SUGGESTION_SECTIONS = Counter(
+    "suggestion_prompt_sections_total", "Resume sections kept in or pruned from suggestion prompts by relevance", ["kind"]
+)
+BATCH_RESUMES = Counter(
+    "batch_resumes_total", "Resumes processed by /batch/analyze", ["outcome"]
+)
+PREVIEW_CACHE = Counter(
+    "preview_cache_total", "Page preview cache lookups", ["result"]
+)
+PREVIEW_RENDER_SECONDS = Histogram(
+    "preview_render_duration_seconds", "Page rasterization time", ["renderer", "outcome"], buckets=FAST_BUCKETS + SLOW_BUCKETS[3:]
+)
+
+
+@contextmanager
+def observe(histogram, **labels):
+    """Time a block into `histogram`, adding outcome=success|error"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - started)
+
+
+def timed(histogram, **labels):
+    """Decorator form of observe() for sync functions"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with observe(histogram, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_latest() -> bytes:
+    """Exposition text for /metrics, aggregated across workers in multiprocess mode"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client is not installed\n"
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+def route_template(scope) -> str:
+    """Path template of the route an ASGI request will hit (bounded label cardinality)"""
+    from starlette.routing import Match
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by route template, method and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                route=route_template(scope),
+                method=scope["method"],
+                status=str(status["code"])
+            ).observe(time.perf_counter() - started)
@@ -3,7 +3,7 @@ Pydantic models for request/response validation
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 class StartSessionRequest(BaseModel):
@@ -62,6 +62,11 @@ class Suggestion(BaseModel):
     suggested_latex_snippet: str
     description: str
 
+class RelevanceRequest(BaseModel):
+    """Request model for local relevance scoring"""
+    resume_text: str
+    job_post: str
+
 class SuggestionListResponse(BaseModel):
     session_id: str
     suggestions: list[Suggestion]
@@ -73,7 +78,35 @@ class ApplySuggestionRequest(BaseModel):
 class ApplySuggestionResponse(BaseModel):
     updated_resume_latex: str
     suggestions: list[Suggestion] 
+    version: Optional[int] = None  # resume version created by this update
 
 class ApplySuggestionsRequest(BaseModel):
+    # Either the full LaTeX, or a version of the session's history (default: the current one)
+    resume_latex: Optional[str] = None
+    base_version: Optional[int] = None
+    accepted_suggestions: list[Suggestion]
+    mode: Optional[Literal["diff", "full"]] = None  # defaults to RESUME_UPDATE_MODE
+
+class ResumeVersionResponse(BaseModel):
+    """Response model for one resume version"""
+    session_id: str
+    version: int
+    current_version: int
     resume_latex: str
-    accepted_suggestions: list[Suggestion] 
\ No newline at end of file
+
+class JobAcceptedResponse(BaseModel):
+    """Response model for work accepted into the background job queue"""
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+class JobStatusResponse(BaseModel):
+    """Response model for background job status"""
+    job_id: str
+    type: str
+    status: str  # 'queued', 'running', 'completed' or 'failed'
+    result: Optional[dict] = None
+    error: Optional[dict] = None
+    created_at: str
+    updated_at: str
@@ -0,0 +1,117 @@
+"""
+Shared Redis clients with fallback to in-memory storage
+
+Clients are created and pinged lazily (at startup or first use), and a background
+monitor switches between Redis and the in-memory fallback as Redis goes away or
+comes back.
+"""
+
+import asyncio
+import threading
+from typing import Optional
+from config import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class RedisClients:
+    """A text (decode_responses) and a binary client sharing one availability state"""
+
+    def __init__(self):
+        self.r = None
+        # Compressed payloads are stored as bytes, so they need a non-decoding client
+        self.rb = None
+        self.available = False
+        self.checked = False
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def _build(self) -> None:
+        if self.r is not None:
+            return
+        options = dict(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.r = redis.Redis(decode_responses=True, **options)
+        self.rb = redis.Redis(**options)
+
+    def check(self) -> bool:
+        """Ping Redis (blocking, bounded by the connect timeout) and update availability"""
+        with self._lock:
+            if redis is None:
+                up, self.last_error = False, "redis package not installed"
+            else:
+                self._build()
+                try:
+                    self.r.ping()
+                    up, self.last_error = True, None
+                except redis.RedisError as e:
+                    up, self.last_error = False, str(e)
+
+            if up and not self.available:
+                print("✅ Redis connection successful - using Redis for session storage")
+            elif not up and (self.available or not self.checked):
+                print(f"⚠️ Redis not available ({self.last_error}) - falling back to in-memory storage")
+            self.available = up
+            self.checked = True
+            return up
+
+    def get(self, binary: bool = False):
+        """Client for the current request, or None while on the in-memory fallback"""
+        if not self.checked:
+            self.check()
+        if not self.available:
+            return None
+        return self.rb if binary else self.r
+
+    def use(self, r, rb) -> None:
+        """Install pre-built clients (e.g. fakeredis) and treat them as connected"""
+        with self._lock:
+            self.r, self.rb = r, rb
+            self.available = self.checked = True
+
+    def reset_connections(self) -> None:
+        """Drop pooled connections inherited from a parent process (call in each forked worker)"""
+        if self.r is not None:
+            self.r.connection_pool.reset()
+            self.rb.connection_pool.reset()
+
+    async def _monitor(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.check)
+
+    def start_monitor(self, interval: float) -> None:
+        """Re-check Redis every `interval` seconds in the background"""
+        if self._monitor_task is None and redis is not None:
+            self._monitor_task = asyncio.create_task(self._monitor(interval))
+
+    async def stop_monitor(self) -> None:
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+
+    def close(self) -> None:
+        if self.r is not None:
+            self.r.close()
+            self.rb.close()
+
+
+# Global Redis clients instance
+redis_clients = RedisClients()
+
+
+def get_redis(binary: bool = False):
+    """Shared Redis client, or None when running on the in-memory fallback"""
+    return redis_clients.get(binary)
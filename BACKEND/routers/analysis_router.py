@@ -0,0 +1,27 @@
+"""
+Analysis router for local (no LLM) resume scoring
+"""
+
+import asyncio
+from fastapi import APIRouter, HTTPException
+from models import RelevanceRequest
+from services.ai_service import ai_service
+from services.relevance import relevance_scorer, HAS_NUMPY
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+
+@router.post("/relevance")
+async def score_relevance(request: RelevanceRequest):
+    """TF-IDF coverage of the job post's requirements by the resume, with keyword gaps"""
+    if not HAS_NUMPY:
+        raise HTTPException(status_code=503, detail="Relevance scoring needs numpy installed on the server")
+    try:
+        def score():
+            parsed = ai_service.parse_resume_latex(request.resume_text)
+            return relevance_scorer.report(parsed, request.resume_text, request.job_post)
+        # Small matrices, but keep CPU work off the event loop
+        return await asyncio.to_thread(score)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring relevance: {str(e)}")
@@ -0,0 +1,45 @@
+"""
+Batch router for screening many resumes against one job post
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from services.batch_analyzer import batch_analyzer, items_from_files, items_from_json, prepare_job
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+@router.post("/analyze")
+async def analyze_batch(request: Request):
+    """Analyze a set of resumes against one job post; results stream as NDJSON as they finish.
+
+    JSON body: {"job_post", "resumes": [str | {"id", "resume_text"}], "include_suggestions"}.
+    Multipart: a job_post field, optional include_suggestions, and one or more
+    resumes files (.tex/.txt/.md, or .zip archives of them).
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            job_post = form.get("job_post") or ""
+            include_suggestions = str(form.get("include_suggestions", "false")).lower() == "true"
+            files = [(upload.filename or "resume", await upload.read()) for upload in form.getlist("resumes") if hasattr(upload, "read")]
+            items = items_from_files(files)
+        else:
+            data = await request.json()
+            job_post = data.get("job_post") or ""
+            include_suggestions = bool(data.get("include_suggestions", False))
+            resumes = data.get("resumes")
+            if not isinstance(resumes, list):
+                raise HTTPException(status_code=400, detail="resumes must be a list.")
+            items = items_from_json(resumes)
+        job = prepare_job(str(job_post))
+        batch_analyzer.check(items)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch request: {str(e)}")
+
+    return StreamingResponse(
+        batch_analyzer.stream(items, job, include_suggestions),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse, StreamingResponse
-import tempfile
-import subprocess
-import os
-import shutil
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from session_manager import session_manager
+from services.pdf_compiler import pdf_compiler
+from services.compile_workspace import compile_workspaces
+from services.preview_renderer import preview_renderer, MEDIA_TYPES
 
 router = APIRouter(prefix="/export", tags=["export"])
 
@@ -14,37 +14,35 @@ async def export_pdf(request: Request):
     if not latex_code:
         raise HTTPException(status_code=400, detail="Missing LaTeX code.")
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tex_path = os.path.join(tmpdir, "resume.tex")
-        pdf_path = os.path.join(tmpdir, "resume.pdf")
-        with open(tex_path, "w") as f:
-            f.write(latex_code)
-        try:
-            result = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode", "-jobname=resume", tex_path],
-                cwd=tmpdir,
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=20
-            )
-            print("Files in tempdir after pdflatex:", os.listdir(tmpdir))
-            if not os.path.exists(pdf_path):
-                raise Exception("PDF not generated. pdflatex output:\n" + result.stdout.decode() + "\n" + result.stderr.decode())
-            # Read PDF into memory
-            with open(pdf_path, "rb") as pdf_file:
-                pdf_bytes = pdf_file.read()
-            return StreamingResponse(
-                iter([pdf_bytes]),
-                media_type="application/pdf",
-                headers={"Content-Disposition": "attachment; filename=resume.pdf"}
-            )
-        except Exception as e:
-            error_msg = f"LaTeX compilation failed: {e}\n"
-            if 'result' in locals():
-                print("==== LaTeX STDOUT ====")
-                print(result.stdout.decode())
-                print("==== LaTeX STDERR ====")
-                print(result.stderr.decode())
-                error_msg += f"\nSTDOUT:\n{result.stdout.decode()}\nSTDERR:\n{result.stderr.decode()}"
-            raise HTTPException(status_code=500, detail=error_msg)
\ No newline at end of file
+    # Editing sessions compile in a persistent workspace and skip unchanged sources
+    session_id = data.get("session_id")
+    if session_id:
+        # Workspaces are only created for live sessions; unknown IDs get a 404
+        session_manager.get_session(str(session_id))
+        pdf_bytes = await compile_workspaces.compile(str(session_id), latex_code)
+    else:
+        pdf_bytes = await pdf_compiler.compile(latex_code)
+    return StreamingResponse(
+        iter([pdf_bytes]),
+        media_type="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=resume.pdf"}
+    )
+
+@router.post("/preview")
+async def export_preview(request: Request, page: int = 1, dpi: int = 72, format: str = "png"):
+    """One page of the compiled resume as a PNG/WebP image; cached by LaTeX hash, page and DPI"""
+    data = await request.json()
+    latex_code = data.get("latex_code")
+    if not latex_code:
+        raise HTTPException(status_code=400, detail="Missing LaTeX code.")
+
+    # The key is derived from the request alone, so a revalidation never compiles or rasterizes
+    etag = f'"{preview_renderer.cache_key(latex_code, page=page, dpi=dpi, fmt=format)}"'
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    image, _ = await preview_renderer.render(latex_code, page=page, dpi=dpi, fmt=format)
+    return Response(
+        content=image,
+        media_type=MEDIA_TYPES[format],
+        headers={"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    )
@@ -2,9 +2,17 @@
 Health and info router
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 from models import RootResponse
 from config import settings
+from services.ai_service import ai_service
+from services.rate_limiter import llm_limiter
+from compression import session_compressor, blob_compressor
+from services.readiness import readiness
+from services.pdf_compiler import pdf_compiler
+from services.compile_workspace import compile_workspaces
+from services.semantic_cache import semantic_cache
 
 router = APIRouter(tags=["health"])
 
@@ -29,4 +37,34 @@ async def health_check():
         "status": "healthy",
         "service": settings.APP_NAME,
         "version": settings.APP_VERSION
-    } 
\ No newline at end of file
+    }
+
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness probe: 503 while starting/stopping, when a dependency is down, or when saturated"""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "not_ready", "checks": {}})
+    body = readiness.status()
+    if body["status"] != "ready":
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@router.get("/health/llm")
+async def llm_routing_stats():
+    """LLM routing table with per-route latency and cost, admission queue state and semantic cache hit rate"""
+    return {**ai_service.router.get_stats(), "limiter": llm_limiter.snapshot(), "semantic_cache": semantic_cache.snapshot()}
+
+@router.get("/health/storage")
+async def storage_stats():
+    """Session payload compression ratio and codec time (blob-store texts reported separately)"""
+    return {
+        "codec": session_compressor.codec,
+        "threshold_bytes": session_compressor.threshold,
+        **session_compressor.stats.snapshot(),
+        "blobs": blob_compressor.stats.snapshot(),
+    }
+
+@router.get("/health/compile")
+async def compile_stats():
+    """PDF compile pool state, sandbox limits, per-job resource usage and session workspaces"""
+    return {**pdf_compiler.snapshot(), **pdf_compiler.usage(), "workspaces": compile_workspaces.snapshot()}
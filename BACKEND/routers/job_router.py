@@ -0,0 +1,37 @@
+"""
+Job router for background job status and events
+"""
+
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from models import JobStatusResponse
+from services.job_queue import job_queue, public_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """Get the status (and result, once finished) of a background job"""
+    try:
+        return public_job(job_queue.get_job(job_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting job status: {str(e)}")
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events stream of job status changes, closed once the job finishes"""
+    # Resolve the job up front so unknown IDs get a plain 404
+    job_queue.get_job(job_id)
+
+    async def event_stream():
+        async for job in job_queue.watch(job_id):
+            yield f"event: {job['status']}\ndata: {json.dumps(public_job(job))}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
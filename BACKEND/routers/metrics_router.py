@@ -0,0 +1,14 @@
+"""
+Metrics router exposing Prometheus metrics
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+from metrics import render_latest, CONTENT_TYPE_LATEST
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -3,9 +3,14 @@ Session router for session management endpoints
 """
 
 from fastapi import APIRouter, HTTPException
-from models import StartSessionRequest, StartSessionResponse, AnswerQuestionRequest, AnswerQuestionResponse, Suggestion, SuggestionListResponse, ApplySuggestionRequest, ApplySuggestionResponse, ApplySuggestionsRequest
+from fastapi.responses import JSONResponse
+from models import StartSessionRequest, StartSessionResponse, AnswerQuestionRequest, AnswerQuestionResponse, SuggestionListResponse, ApplySuggestionRequest, ApplySuggestionResponse, ApplySuggestionsRequest, JobAcceptedResponse, ResumeVersionResponse
 from session_manager import session_manager
+from blob_store import content_hash
 from services.ai_service import ai_service
+from services.job_queue import job_queue
+from services.single_flight import single_flight, flight_key
+from services.compile_workspace import compile_workspaces
 
 router = APIRouter(prefix="/session", tags=["sessions"])
 
@@ -13,10 +18,11 @@ router = APIRouter(prefix="/session", tags=["sessions"])
 async def start_session(request: StartSessionRequest):
     """Start a new resume analysis session"""
     try:
-        # Generate targeted questions using AI service
-        questions = await ai_service.analyze_resume_and_job(
-            request.resume_text, 
-            request.job_post
+        # Double-submitted starts share one LLM call; every caller still gets its own session,
+        # since the session ID is the only credential for it
+        questions = await single_flight.do(
+            flight_key("questions", request.resume_text, request.job_post),
+            lambda: ai_service.analyze_resume_and_job(request.resume_text, request.job_post)
         )
         # Create session
         session_id = session_manager.create_session(
@@ -29,6 +35,8 @@ async def start_session(request: StartSessionRequest):
             first_question=questions[0],
             total_questions=len(questions)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting session: {str(e)}")
 
@@ -46,7 +54,8 @@ async def answer_question(request: AnswerQuestionRequest):
                 session["resume_text"],
                 session["job_post"],
                 session["questions"],
-                session["answers"]
+                session["answers"],
+                session_id=request.session_id
             )
             
             # Don't clean up session - keep it for suggestions
@@ -104,48 +113,108 @@ async def get_suggestions(request: StartSessionRequest):
         )
         
         # Store suggestions in session
-        import json
-        session = session_manager.get_session(session_id)
-        session['suggestions'] = json.dumps([s.dict() for s in suggestions])
-        session_manager._set_session(session_id, session)
+        session_manager.set_suggestions(session_id, suggestions)
         
         # Return session_id in response
         return {"session_id": session_id, "suggestions": suggestions}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
 
-@router.post("/suggestions/{session_id}", response_model=SuggestionListResponse)
-async def get_suggestions_for_session(session_id: str):
-    """Generate structured AI suggestions for an existing session after Q&A completion."""
-    try:
-        # Get existing session
-        session = session_manager.get_session(session_id)
-        
-        # Check if Q&A is complete
-        if len(session["answers"]) < len(session["questions"]):
-            raise HTTPException(
-                status_code=400, 
-                detail="Q&A session not complete. Please answer all questions before requesting suggestions."
-            )
-        
-        # Parse resume
-        parsed_resume = ai_service.parse_resume_latex(session["resume_text"])
-        
-        # Generate suggestions using LLM with Q&A context
-        suggestions = await ai_service.generate_structured_suggestions(
-            parsed_resume, 
-            session["job_post"], 
-            session["questions"], 
-            session["answers"]
+async def generate_session_suggestions(session_id: str) -> dict:
+    """Generate and store structured suggestions for a session whose Q&A is complete."""
+    # Get existing session
+    session = session_manager.get_session(session_id)
+    
+    # Check if Q&A is complete
+    if len(session["answers"]) < len(session["questions"]):
+        raise HTTPException(
+            status_code=400, 
+            detail="Q&A session not complete. Please answer all questions before requesting suggestions."
         )
-        
-        # Store suggestions in session
-        import json
-        session['suggestions'] = json.dumps([s.dict() for s in suggestions])
-        session_manager._set_session(session_id, session)
-        
-        # Return session_id in response
-        return {"session_id": session_id, "suggestions": suggestions}
+    
+    # Parse resume
+    parsed_resume = ai_service.parse_resume_latex(session["resume_text"])
+    
+    # Generate suggestions using LLM with Q&A context
+    suggestions = await ai_service.generate_structured_suggestions(
+        parsed_resume, 
+        session["job_post"], 
+        session["questions"], 
+        session["answers"],
+        session_id=session_id
+    )
+    
+    # Store suggestions in session
+    session_manager.set_suggestions(session_id, suggestions)
+    
+    return {"session_id": session_id, "suggestions": suggestions}
+
+async def apply_session_suggestions(session_id: str, req: ApplySuggestionsRequest) -> ApplySuggestionResponse:
+    """Rewrite the resume with the accepted suggestions and store it in the session as a new version."""
+    session = session_manager.get_session(session_id)
+    resume_latex = req.resume_latex
+    if resume_latex is None:
+        # Clients may reference a stored version instead of re-sending the whole resume
+        # 0 is a version number like any other (and not found), not "use the head"
+        base_version = session.get("resume_version") if req.base_version is None else req.base_version
+        resume_latex = session_manager.get_version_text(session_id, session, base_version)
+    # LLM-driven update (line edits, or a full rewrite)
+    updated_resume = await ai_service.update_resume_with_suggestions(resume_latex, req.accepted_suggestions, session_id=session_id, mode=req.mode)
+    # Re-read: the session may have changed while the LLM was working
+    session = session_manager.get_session(session_id)
+    version = session_manager.update_resume(session_id, session, updated_resume, "apply_suggestions")
+    session_manager.clear_suggestions(session_id)
+    return ApplySuggestionResponse(
+        updated_resume_latex=updated_resume,
+        suggestions=[],
+        version=version
+    )
+
+async def coalesced_session_suggestions(session_id: str) -> dict:
+    """generate_session_suggestions, shared by concurrent duplicate requests for the same session."""
+    async def generate():
+        return SuggestionListResponse(**await generate_session_suggestions(session_id)).dict()
+    # Keyed on what the suggestions are generated from, so a request made after new
+    # answers or a resume edit never receives a result computed from the older state
+    session = session_manager.get_session(session_id)
+    key = flight_key("suggestions", session_id, content_hash(session["resume_text"]), session["questions"], session["answers"])
+    return await single_flight.do(key, generate)
+
+async def _suggestions_job(payload: dict) -> dict:
+    return await coalesced_session_suggestions(payload["session_id"])
+
+async def _apply_suggestions_job(payload: dict) -> dict:
+    result = await apply_session_suggestions(payload["session_id"], ApplySuggestionsRequest(**payload["request"]))
+    return result.dict()
+
+job_queue.register("suggestions", _suggestions_job)
+job_queue.register("apply_suggestions", _apply_suggestions_job)
+
+def _job_accepted(job_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content=JobAcceptedResponse(
+            job_id=job_id,
+            status="queued",
+            status_url=f"/jobs/{job_id}",
+            events_url=f"/jobs/{job_id}/events"
+        ).dict()
+    )
+
+@router.post("/suggestions/{session_id}", response_model=SuggestionListResponse, responses={202: {"model": JobAcceptedResponse}})
+async def get_suggestions_for_session(session_id: str, async_mode: bool = False):
+    """Generate structured AI suggestions for an existing session after Q&A completion.
+
+    With ?async_mode=true the work is queued and a job ID is returned immediately.
+    """
+    try:
+        if async_mode:
+            # Fail fast on unknown sessions instead of queueing a job that cannot succeed
+            session_manager.get_session(session_id)
+            return _job_accepted(await job_queue.enqueue("suggestions", {"session_id": session_id}))
+        return await coalesced_session_suggestions(session_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -155,43 +224,81 @@ async def get_suggestions_for_session(session_id: str):
 async def apply_suggestion(session_id: str, req: ApplySuggestionRequest):
     """Apply a single suggestion to the resume in the session."""
     try:
-        import json
         session = session_manager.get_session(session_id)
-        suggestions = [Suggestion(**s) for s in json.loads(session.get('suggestions', '[]'))]
-        suggestion = next((s for s in suggestions if s.id == req.suggestion_id), None)
+        suggestion = session_manager.get_suggestion(session_id, req.suggestion_id)
         if not suggestion:
             raise HTTPException(status_code=404, detail="Suggestion not found")
         parsed_resume = ai_service.parse_resume_latex(session["resume_text"])
         updated_parsed = ai_service.apply_suggestion(parsed_resume, suggestion)
         updated_resume = ai_service.serialize_resume_latex(updated_parsed)
         # Remove applied suggestion
-        remaining = [s for s in suggestions if s.id != req.suggestion_id]
-        session['suggestions'] = json.dumps([s.dict() for s in remaining])
-        session['resume_text'] = updated_resume
+        session_manager.remove_suggestion(session_id, req.suggestion_id)
+        version = session_manager.update_resume(session_id, session, updated_resume, "apply_suggestion")
         return ApplySuggestionResponse(
             updated_resume_latex=updated_resume,
-            suggestions=remaining
+            suggestions=session_manager.get_suggestions(session_id),
+            version=version
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error applying suggestion: {str(e)}")
 
-@router.post("/apply_suggestions/{session_id}", response_model=ApplySuggestionResponse)
-async def apply_suggestions(session_id: str, req: ApplySuggestionsRequest):
-    """Apply all accepted suggestions to the resume in the session using LLM-driven rewrite."""
+@router.post("/apply_suggestions/{session_id}", response_model=ApplySuggestionResponse, responses={202: {"model": JobAcceptedResponse}})
+async def apply_suggestions(session_id: str, req: ApplySuggestionsRequest, async_mode: bool = False):
+    """Apply all accepted suggestions to the resume in the session using LLM-driven rewrite.
+
+    With ?async_mode=true the rewrite is queued and a job ID is returned immediately.
+    """
+    try:
+        if async_mode:
+            session_manager.get_session(session_id)
+            return _job_accepted(await job_queue.enqueue("apply_suggestions", {"session_id": session_id, "request": req.dict()}))
+        return await apply_session_suggestions(session_id, req)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying suggestions: {str(e)}")
+
+@router.get("/{session_id}/versions")
+async def list_resume_versions(session_id: str):
+    """Resume version history of a session (metadata only), oldest first"""
+    try:
+        return {"session_id": session_id, "versions": session_manager.list_versions(session_id)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing versions: {str(e)}")
+
+@router.get("/{session_id}/versions/{version}", response_model=ResumeVersionResponse)
+async def get_resume_version(session_id: str, version: int):
+    """Resume LaTeX as of one version"""
     try:
-        # LLM-driven rewrite
-        updated_resume = await ai_service.rewrite_resume_with_suggestions(req.resume_latex, req.accepted_suggestions)
-        # Optionally, update the session's resume
         session = session_manager.get_session(session_id)
-        session['resume_text'] = updated_resume
-        session['suggestions'] = "[]"
-        session_manager._set_session(session_id, session)
-        return ApplySuggestionResponse(
-            updated_resume_latex=updated_resume,
-            suggestions=[]
+        return ResumeVersionResponse(
+            session_id=session_id,
+            version=version,
+            current_version=session.get("resume_version") or 0,
+            resume_latex=session_manager.get_version_text(session_id, session, version)
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error applying suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting version: {str(e)}")
+
+@router.post("/{session_id}/versions/{version}/restore", response_model=ResumeVersionResponse)
+async def restore_resume_version(session_id: str, version: int):
+    """Undo: make an earlier version current again (recorded as a new version, so nothing is lost)"""
+    try:
+        session = session_manager.get_session(session_id)
+        resume_latex = session_manager.get_version_text(session_id, session, version)
+        current = session_manager.update_resume(session_id, session, resume_latex, f"restore:{version}")
+        session_manager.clear_suggestions(session_id)
+        return ResumeVersionResponse(session_id=session_id, version=current, current_version=current, resume_latex=resume_latex)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error restoring version: {str(e)}")
 
 @router.get("/{session_id}")
 async def get_session_status(session_id: str):
@@ -208,6 +315,7 @@ async def delete_session(session_id: str):
     """Delete a session"""
     try:
         session_manager.delete_session(session_id)
+        compile_workspaces.discard(session_id)
         return {"message": "Session deleted successfully"}
     except HTTPException:
         raise
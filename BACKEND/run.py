@@ -5,9 +5,49 @@ Startup script for the AI Resume Assistant API
 
 import os
 import sys
+import tempfile
 import uvicorn
 from config import settings
 
+# gunicorn and uvicorn resolve main:app and gunicorn_conf.py from here, not from the caller's cwd
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def serve_production(host: str, port: int):
+    """Multi-worker serving: gunicorn with preloading when available, else uvicorn --workers"""
+    # Aggregate /metrics across workers (must be set before any worker imports prometheus_client)
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="resume-metrics-")
+    try:
+        import gunicorn  # noqa: F401
+        print(f"🏭 Production mode: gunicorn with up to {settings.WEB_CONCURRENCY} uvicorn workers")
+        os.execvp(sys.executable, [
+            sys.executable, "-m", "gunicorn",
+            "-c", os.path.join(APP_DIR, "gunicorn_conf.py"),
+            "--chdir", APP_DIR,
+            "main:app"
+        ])
+    except ImportError:
+        pass
+
+    from redis_client import redis_clients
+    workers = settings.WEB_CONCURRENCY if redis_clients.check() else 1
+    # No limit_max_requests here: uvicorn's supervisor does not replace workers that exit,
+    # so recycling (SERVER_MAX_REQUESTS) is only done under gunicorn
+    print(f"🏭 Production mode: uvicorn with {workers} workers (install gunicorn for app preloading and worker recycling)")
+    uvicorn.run(
+        "main:app",
+        app_dir=APP_DIR,
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        log_level="warning"
+    )
+
 def main():
     """Start the FastAPI application"""
     print("🚀 Starting AI Resume Assistant API...")
@@ -47,8 +87,12 @@ def main():
     
     # Start the server
     try:
+        if "--production" in sys.argv or os.getenv("SERVER_MODE") == "production":
+            serve_production(host, port)
+            return
         uvicorn.run(
             "main:app",
+            app_dir=APP_DIR,
             host=host,
             port=port,
             reload=reload,
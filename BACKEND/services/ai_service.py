@@ -2,7 +2,6 @@
 AI service for LLM interactions
 """
 
-import openai
 import json
 from typing import List, Optional
 from fastapi import HTTPException
@@ -11,43 +10,68 @@ import logging
 import re
 import uuid
 from models import Suggestion
+from services.llm_router import LLMRouter
+from services.rate_limiter import RateLimitExceeded
+from metrics import LATEX_OP_SECONDS, RESUME_UPDATES, SUGGESTION_SECTIONS, timed
+from tracing import span
+from logging_config import log_payload
+from services.latex_edits import EditConflict, apply_edit_ops, number_lines, parse_edit_ops
+from services.relevance import relevance_scorer
+from services.semantic_cache import semantic_cache
 
 class AIService:
     """Service for AI/LLM interactions"""
     
     def __init__(self):
-        self.api_key = settings.LLM_API_KEY
-        self.base_url = settings.LLM_API_URL  # Should be 'https://api.deepseek.com'
-        self.model = settings.LLM_MODEL
-        self.max_tokens = settings.LLM_MAX_TOKENS
         self.temperature = settings.LLM_TEMPERATURE
-        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.router = LLMRouter()
         self.logger = logging.getLogger("AIService")
-        logging.basicConfig(level=logging.INFO)
 
-    async def _make_api_call(self, prompt: str, system_message: str = None) -> str:
-        """Make API call to DeepSeek via OpenAI client"""
+    async def _make_api_call(self, prompt: str, system_message: str = None, operation: str = "default", session_id: Optional[str] = None) -> str:
+        """Make API call through the LLM router for the given operation"""
         messages = []
         if system_message:
             messages.append({"role": "system", "content": system_message})
         messages.append({"role": "user", "content": prompt})
-        self.logger.info(f"Calling DeepSeek API with model={self.model}, messages={messages}, max_tokens={self.max_tokens}, temperature={self.temperature}")
+        route = self.router.get_route(operation)
+        self.logger.info("Calling LLM", extra={"operation": operation, "model": route.model, "provider": route.provider, "prompt_chars": len(prompt), "session_id": session_id})
+        log_payload(self.logger, "LLM request payload", messages, operation=operation)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stream=False
-            )
-            self.logger.info(f"DeepSeek API response: {response}")
-            return response.choices[0].message.content
+            with span("AIService._make_api_call", **{"llm.operation": operation, "llm.model": route.model, "llm.provider": route.provider, "llm.max_tokens": route.max_tokens}):
+                content = await self.router.complete(operation, messages, self.temperature, session_id=session_id)
+            log_payload(self.logger, "LLM response payload", content, operation=operation)
+            return content
+        except RateLimitExceeded:
+            raise
         except Exception as e:
-            self.logger.error(f"DeepSeek API error: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"DeepSeek API error: {str(e)}")
+            self.logger.error(f"LLM API error: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"LLM API error: {str(e)}")
     
-    async def analyze_resume_and_job(self, resume_text: str, job_post: str) -> List[str]:
+    async def analyze_resume_and_job(self, resume_text: str, job_post: str, session_id: Optional[str] = None) -> List[str]:
         """Analyze resume and job posting to generate targeted questions"""
+        signatures = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            # A resubmission with a bullet or two changed reuses the questions already generated
+            signatures = semantic_cache.signatures(resume_text, job_post)
+            cached = semantic_cache.get(resume_text, job_post, signatures)
+            if cached is not None:
+                self.logger.info("Semantic cache hit", extra={"operation": "questions", "session_id": session_id})
+                return list(cached)
+        
+        try:
+            questions = await self.generate_questions(resume_text, job_post, session_id=session_id)
+            # Fallback questions are never cached, only real LLM output
+            if signatures is not None:
+                semantic_cache.put(resume_text, job_post, list(questions), signatures)
+            return questions
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            # Fallback questions if LLM call fails
+            return self._get_fallback_questions()
+
+    async def generate_questions(self, resume_text: str, job_post: str, session_id: Optional[str] = None) -> List[str]:
+        """The LLM's questions for exactly this resume: no semantic cache and no fallback, errors raise"""
         system_message = """You are an expert resume consultant. Analyze resumes and job postings to identify gaps and generate targeted questions that will help improve the resume's alignment with the job requirements."""
         
         prompt = f"""
@@ -69,21 +93,18 @@ class AIService:
         ["Question 1?", "Question 2?", "Question 3?"]
         """
         
+        response = await self._make_api_call(prompt, system_message, operation="questions", session_id=session_id)
+        # Remove markdown code block fencing if present
+        cleaned = re.sub(r'^```json\s*|```$', '', response.strip(), flags=re.MULTILINE).strip()
         try:
-            response = await self._make_api_call(prompt, system_message)
-            # Remove markdown code block fencing if present
-            cleaned = re.sub(r'^```json\s*|```$', '', response.strip(), flags=re.MULTILINE).strip()
             questions = json.loads(cleaned)
-            
-            if not isinstance(questions, list) or len(questions) != 3:
-                raise ValueError("Invalid response format")
-            
-            return questions
-        except Exception as e:
-            # Fallback questions if LLM call fails
-            return self._get_fallback_questions()
+        except json.JSONDecodeError:
+            questions = None
+        if not isinstance(questions, list) or len(questions) != 3 or not all(isinstance(q, str) for q in questions):
+            raise HTTPException(status_code=502, detail="LLM returned malformed questions")
+        return questions
     
-    async def enhance_resume(self, resume_text: str, job_post: str, questions: List[str], answers: List[str]) -> str:
+    async def enhance_resume(self, resume_text: str, job_post: str, questions: List[str], answers: List[str], session_id: Optional[str] = None) -> str:
         """Enhance resume based on answers provided"""
         system_message = """You are an expert resume writer. Suggest LaTeX snippet(s) or section(s) to add or change in the resume to better align with the job requirements, while maintaining proper LaTeX formatting. Do NOT return the entire resume, only the relevant snippet(s) or section(s) to be inserted or replaced. Clearly indicate where each change should be applied (e.g., section name or line number). Wrap each suggested snippet with '% === AI SUGGESTION START ===' and '% === AI SUGGESTION END ===' comments."""
         
@@ -117,8 +138,10 @@ class AIService:
         """
         
         try:
-            updated_snippet = await self._make_api_call(prompt, system_message)
+            updated_snippet = await self._make_api_call(prompt, system_message, operation="enhance", session_id=session_id)
             return updated_snippet
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             # Return empty string if LLM call fails
             return ""
@@ -173,47 +196,52 @@ class AIService:
         Return ONLY a JSON array of these suggestion objects.
         """
 
-    async def generate_structured_suggestions(self, parsed_resume, job_post, questions=None, answers=None):
+    async def generate_structured_suggestions(self, parsed_resume, job_post, questions=None, answers=None, session_id=None, job_profile=None):
         """Generate structured suggestions using the LLM and return a list of Suggestion objects."""
-        import json
-        import uuid
-        from models import Suggestion
+        try:
+            return await self.request_structured_suggestions(parsed_resume, job_post, questions, answers, session_id, job_profile)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            self.logger.error(f"Failed to generate structured suggestions: {e}")
+            return []
+
+    async def request_structured_suggestions(self, parsed_resume, job_post, questions=None, answers=None, session_id=None, job_profile=None) -> List[Suggestion]:
+        """Like generate_structured_suggestions, but a failed or unparseable LLM call raises instead of returning []"""
         system_message = "You are an expert resume consultant. Given a parsed LaTeX resume and a job posting, generate a list of fine-grained, actionable suggestions to improve the resume. Each suggestion must be a JSON object with the following fields: id (UUID), type (replace_section, add_item_to_section, update_item_in_section, add_new_section), target_section_header, context_text_before, context_text_after, original_latex_snippet, suggested_latex_snippet, description. IMPORTANT: Only suggest changes based on information that was explicitly provided by the user. Do not fabricate experience or skills. Return ONLY a JSON array of these objects."
+        if settings.RELEVANCE_PREFILTER:
+            # Only the sections most relevant to the job go into the (token-priced) prompt;
+            # a prepared job profile (batches) skips re-tokenizing the post
+            relevant = relevance_scorer.prefilter_sections(parsed_resume, job_profile or job_post)
+            SUGGESTION_SECTIONS.labels(kind="kept").inc(len(relevant))
+            SUGGESTION_SECTIONS.labels(kind="pruned").inc(len(parsed_resume) - len(relevant))
+            parsed_resume = relevant
         prompt = self.build_suggestion_prompt(parsed_resume, job_post, questions, answers)
+        response = await self._make_api_call(prompt, system_message, operation="suggestions", session_id=session_id)
+        cleaned = re.sub(r'^```json\s*|```$', '', (response or "").strip(), flags=re.MULTILINE).strip()
+        if not cleaned:
+            self.logger.error("Empty response from LLM")
+            raise HTTPException(status_code=502, detail="LLM returned no suggestions")
         try:
-            response = await self._make_api_call(prompt, system_message)
-            self.logger.info(f"Raw LLM response: {response}")
-            
-            if not response or not response.strip():
-                self.logger.error("Empty response from LLM")
-                return []
-            
-            cleaned = re.sub(r'^```json\s*|```$', '', response.strip(), flags=re.MULTILINE).strip()
-            self.logger.info(f"Cleaned response: {cleaned}")
-            
-            if not cleaned:
-                self.logger.error("Empty response after cleaning")
-                return []
-            
             suggestions_data = json.loads(cleaned)
-            self.logger.info(f"Parsed suggestions data: {suggestions_data}")
-            
-            suggestions = []
-            for s in suggestions_data:
-                # Ensure UUID
-                if not s.get('id'):
-                    s['id'] = str(uuid.uuid4())
-                suggestions.append(Suggestion(**s))
-            return suggestions
         except json.JSONDecodeError as e:
             self.logger.error(f"JSON decode error: {e}")
-            self.logger.error(f"Response that failed to parse: {response if 'response' in locals() else 'No response'}")
-            return []
-        except Exception as e:
-            self.logger.error(f"Failed to generate structured suggestions: {e}")
-            return []
+            self.logger.error("Unparseable suggestions response", extra={"response_chars": len(response), "session_id": session_id})
+            log_payload(self.logger, "Unparseable suggestions payload", response, operation="suggestions")
+            raise HTTPException(status_code=502, detail="LLM returned malformed suggestions")
+        if not isinstance(suggestions_data, list):
+            raise HTTPException(status_code=502, detail="LLM returned malformed suggestions")
+        self.logger.info("Parsed suggestions", extra={"count": len(suggestions_data), "session_id": session_id})
+
+        suggestions = []
+        for s in suggestions_data:
+            # Ensure UUID
+            if not s.get('id'):
+                s['id'] = str(uuid.uuid4())
+            suggestions.append(Suggestion(**s))
+        return suggestions
 
-    async def rewrite_resume_with_suggestions(self, resume_latex: str, suggestions: List[Suggestion]) -> str:
+    async def rewrite_resume_with_suggestions(self, resume_latex: str, suggestions: List[Suggestion], session_id: Optional[str] = None) -> str:
         """Call the LLM to rewrite the resume, integrating the accepted suggestions."""
         import json
         system_message = "You are an expert resume writer. Given a LaTeX resume and a list of accepted suggestions, rewrite the resume to naturally and professionally integrate the suggestions. Preserve LaTeX structure. Do not simply append the suggestions; merge them into the appropriate sections."
@@ -230,9 +258,59 @@ class AIService:
         - Preserve LaTeX structure and formatting.
         - Return ONLY the rewritten LaTeX resume.
         """
-        rewritten = await self._make_api_call(prompt, system_message)
+        rewritten = await self._make_api_call(prompt, system_message, operation="rewrite", session_id=session_id)
         return rewritten.strip()
 
+    async def edit_resume_with_suggestions(self, resume_latex: str, suggestions: List[Suggestion], session_id: Optional[str] = None) -> str:
+        """Ask the LLM for line edits that integrate the suggestions and apply them locally.
+
+        Raises EditConflict when the edits are unusable.
+        """
+        system_message = "You are an expert resume writer. Integrate accepted suggestions into a LaTeX resume by returning targeted line edits only, never the full resume. Preserve LaTeX structure and keep every brace and environment balanced."
+        accepted = [
+            {k: s.dict()[k] for k in ("type", "target_section_header", "original_latex_snippet", "suggested_latex_snippet", "description")}
+            for s in suggestions
+        ]
+        prompt = f"""
+        RESUME BODY (LaTeX; each line is prefixed with its line number and "| "):
+        {number_lines(resume_latex)}
+
+        ACCEPTED SUGGESTIONS (as JSON array):
+        {json.dumps(accepted)}
+
+        Return ONLY a JSON array of edit operations, using the line numbers shown:
+        - {{"op": "replace", "line": N, "original": "<current text of line N>", "text": "<new LaTeX line>"}}
+        - {{"op": "insert_after", "line": N, "text": "<new LaTeX line(s)>"}}
+        - {{"op": "delete", "line": N, "original": "<current text of line N>"}}
+
+        Instructions:
+        - Integrate each suggestion where it fits naturally; merge rather than append.
+        - Touch only the lines that must change; do not include the line number prefix in "original" or "text".
+        """
+        response = await self._make_api_call(prompt, system_message, operation="edit", session_id=session_id)
+        ops = parse_edit_ops(response)
+        if suggestions and not ops:
+            raise EditConflict("No edits returned for accepted suggestions")
+        updated = apply_edit_ops(resume_latex, ops)
+        self.logger.info("Applied resume edits", extra={"ops": len(ops), "session_id": session_id})
+        return updated
+
+    async def update_resume_with_suggestions(self, resume_latex: str, suggestions: List[Suggestion], session_id: Optional[str] = None, mode: Optional[str] = None) -> str:
+        """Merge accepted suggestions in diff mode (falling back to a full rewrite) or full mode"""
+        mode = mode or settings.RESUME_UPDATE_MODE
+        if mode == "diff":
+            try:
+                updated = await self.edit_resume_with_suggestions(resume_latex, suggestions, session_id=session_id)
+                RESUME_UPDATES.labels(mode="diff", outcome="applied").inc()
+                return updated
+            except EditConflict as e:
+                self.logger.warning("Diff edits unusable, falling back to a full rewrite", extra={"error": str(e), "session_id": session_id})
+                RESUME_UPDATES.labels(mode="diff", outcome="fallback").inc()
+        updated = await self.rewrite_resume_with_suggestions(resume_latex, suggestions, session_id=session_id)
+        RESUME_UPDATES.labels(mode="full", outcome="applied").inc()
+        return updated
+
+    @timed(LATEX_OP_SECONDS, op="parse")
     def parse_resume_latex(self, latex_string):
         """Parse the LaTeX resume into a structured representation for known template."""
         # Parse \section{...}
@@ -286,6 +364,7 @@ class AIService:
                 i += 1
         return sections
 
+    @timed(LATEX_OP_SECONDS, op="apply")
     def apply_suggestion(self, parsed_resume, suggestion: Suggestion):
         """Apply a suggestion to the parsed resume structure."""
         import difflib
@@ -361,6 +440,7 @@ class AIService:
                     })
         return parsed_resume
 
+    @timed(LATEX_OP_SECONDS, op="serialize")
     def serialize_resume_latex(self, parsed_resume):
         """Convert the parsed resume structure back to a LaTeX string."""
         lines = []
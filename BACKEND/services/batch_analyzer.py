@@ -0,0 +1,191 @@
+"""
+Batch screening: many resumes against one job post, streamed as NDJSON
+"""
+
+import asyncio
+import io
+import logging
+import os
+import time
+import uuid
+import zipfile
+from typing import AsyncIterator, List, Optional
+from fastapi import HTTPException
+import codec
+from config import settings
+from metrics import BATCH_RESUMES
+from services.ai_service import ai_service
+from services.rate_limiter import RateLimitExceeded
+from services.relevance import JobProfile, relevance_scorer
+from services.single_flight import single_flight, flight_key
+
+logger = logging.getLogger("BatchAnalyzer")
+
+RESUME_EXTENSIONS = (".tex", ".txt", ".md")
+
+
+class BatchItem:
+    """One resume of a batch; `id` is the client's identifier or the uploaded file name"""
+
+    def __init__(self, index: int, item_id: str, resume_text: str):
+        self.index = index
+        self.id = item_id
+        self.resume_text = resume_text
+
+
+def normalize_job_post(job_post: str) -> str:
+    job_post = "\n".join(line.rstrip() for line in job_post.strip().splitlines())
+    if not job_post:
+        raise HTTPException(status_code=400, detail="Missing job post.")
+    if len(job_post.encode("utf-8")) > settings.LATEX_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Job post is larger than {settings.LATEX_MAX_BYTES} bytes")
+    return job_post
+
+
+def prepare_job(job_post: str) -> JobProfile:
+    """Done once per batch: the cleaned-up post with its requirements already extracted and tokenized"""
+    return JobProfile(normalize_job_post(job_post))
+
+
+def items_from_json(resumes: list) -> List[BatchItem]:
+    """Accepts strings or {"id", "resume_text"} objects"""
+    items = []
+    for index, entry in enumerate(resumes):
+        if isinstance(entry, str):
+            items.append(BatchItem(index, str(index), entry))
+        elif isinstance(entry, dict) and isinstance(entry.get("resume_text"), str):
+            items.append(BatchItem(index, str(entry.get("id") or index), entry["resume_text"]))
+        else:
+            raise HTTPException(status_code=400, detail=f"resumes[{index}] must be a string or an object with resume_text")
+    return items
+
+
+def items_from_files(files: List[tuple]) -> List[BatchItem]:
+    """Expand uploaded (filename, bytes) pairs; .zip archives contribute each .tex/.txt/.md member"""
+    items = []
+    budget = settings.BATCH_MAX_UPLOAD_MB * 1024 * 1024
+
+    def add(name: str, data: bytes) -> None:
+        if len(data) > settings.LATEX_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"{name} is larger than {settings.LATEX_MAX_BYTES} bytes")
+        items.append(BatchItem(len(items), name, data.decode("utf-8", errors="replace")))
+
+    for filename, data in files:
+        if filename.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{filename} is not a valid zip archive")
+            with archive:
+                for member in archive.infolist():
+                    name = member.filename
+                    if member.is_dir() or not name.lower().endswith(RESUME_EXTENSIONS) or os.path.basename(name).startswith("."):
+                        continue
+                    # Checked against the declared size before inflating anything
+                    budget -= member.file_size
+                    if budget < 0:
+                        raise HTTPException(status_code=413, detail=f"Uploads expand to more than {settings.BATCH_MAX_UPLOAD_MB} MB")
+                    if member.file_size > settings.LATEX_MAX_BYTES:
+                        raise HTTPException(status_code=413, detail=f"{name} is larger than {settings.LATEX_MAX_BYTES} bytes")
+                    add(name, archive.read(member))
+        else:
+            budget -= len(data)
+            if budget < 0:
+                raise HTTPException(status_code=413, detail=f"Uploads are larger than {settings.BATCH_MAX_UPLOAD_MB} MB")
+            add(filename, data)
+    return items
+
+
+class BatchAnalyzer:
+    """Screens resumes concurrently (BATCH_MAX_CONCURRENCY at a time) behind the shared LLM limiter"""
+
+    def __init__(self, max_concurrency: int, max_resumes: int, max_retries: int):
+        self.max_concurrency = max_concurrency
+        self.max_resumes = max_resumes
+        self.max_retries = max_retries
+
+    def check(self, items: List[BatchItem]) -> None:
+        if not items:
+            raise HTTPException(status_code=400, detail="No resumes in the batch.")
+        if len(items) > self.max_resumes:
+            raise HTTPException(status_code=413, detail=f"At most {self.max_resumes} resumes per batch")
+
+    async def _with_retries(self, fn):
+        """LLM 429s are retried after their Retry-After; a batch should wait for capacity, not fail"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await fn()
+            except RateLimitExceeded as e:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(float(e.headers.get("Retry-After", 1)))
+
+    async def _analyze(self, item: BatchItem, job: JobProfile, lane: str, include_suggestions: bool) -> dict:
+        started = time.perf_counter()
+        # Exact duplicates in (or across) batches share one LLM call. The semantic cache and the
+        # fallback questions are bypassed: each candidate gets its own questions, or an error.
+        questions = await self._with_retries(lambda: single_flight.do(
+            flight_key("batch-questions", item.resume_text, job.job_post),
+            lambda: ai_service.generate_questions(item.resume_text, job.job_post, session_id=lane)
+        ))
+        result = {"type": "result", "index": item.index, "id": item.id, "status": "ok", "questions": questions}
+        parsed = ai_service.parse_resume_latex(item.resume_text)
+        # Local scoring against the requirements extracted once for the whole batch
+        report = await asyncio.to_thread(relevance_scorer.report, parsed, item.resume_text, job)
+        if report["available"]:
+            result["relevance"] = {"coverage": report["coverage"], "missing_keywords": report["missing_keywords"]}
+        if include_suggestions:
+            suggestions = await self._with_retries(
+                lambda: ai_service.request_structured_suggestions(parsed, job.job_post, session_id=lane, job_profile=job)
+            )
+            result["suggestions"] = [s.dict() for s in suggestions]
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def _run_item(self, item: BatchItem, job: JobProfile, lane: str, include_suggestions: bool, slots: asyncio.Semaphore) -> dict:
+        async with slots:
+            try:
+                result = await self._analyze(item, job, lane, include_suggestions)
+                BATCH_RESUMES.labels(outcome="ok").inc()
+                return result
+            except HTTPException as e:
+                BATCH_RESUMES.labels(outcome="error").inc()
+                return {"type": "result", "index": item.index, "id": item.id, "status": "error",
+                        "error": {"status_code": e.status_code, "detail": e.detail}}
+            except Exception as e:
+                logger.error("Batch item failed", exc_info=True, extra={"index": item.index})
+                BATCH_RESUMES.labels(outcome="error").inc()
+                return {"type": "result", "index": item.index, "id": item.id, "status": "error",
+                        "error": {"status_code": 500, "detail": str(e)}}
+
+    async def stream(self, items: List[BatchItem], job: JobProfile, include_suggestions: bool = False,
+                     batch_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """NDJSON lines in completion order, then one summary line"""
+        batch_id = batch_id or str(uuid.uuid4())
+        # The whole batch is one fair-queue lane, so it cannot crowd out interactive sessions
+        lane = f"batch:{batch_id}"
+        slots = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(self._run_item(item, job, lane, include_suggestions, slots)) for item in items]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                succeeded += result["status"] == "ok"
+                yield codec.dumps(result) + b"\n"
+        finally:
+            # Client disconnected: stop spending LLM budget on results nobody will read
+            for task in tasks:
+                task.cancel()
+        yield codec.dumps({
+            "type": "summary",
+            "batch_id": batch_id,
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }) + b"\n"
+
+
+# Global batch analyzer instance
+batch_analyzer = BatchAnalyzer(settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_RESUMES, settings.BATCH_MAX_RETRIES)
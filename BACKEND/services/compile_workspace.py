@@ -0,0 +1,178 @@
+"""
+Per-session persistent compile workspaces for fast iterative exports
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Optional
+from config import settings
+from blob_store import content_hash
+from metrics import WORKSPACE_COMPILES, WORKSPACES_ACTIVE
+from services.pdf_compiler import pdf_compiler, SPOOL_DIR
+
+
+class Workspace:
+    """A session's compile directory; keeps .aux/.log/.pdf between runs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source_hash: Optional[str] = None
+        self.last_used = time.monotonic()
+        self.compiles = 0
+        self.reuses = 0
+        self.lock = asyncio.Lock()
+        # Requests holding the workspace (counted from hand-out, before the lock is taken)
+        self.users = 0
+        self.discarded = False
+
+    @property
+    def pdf_path(self) -> str:
+        return os.path.join(self.path, "resume.pdf")
+
+
+class CompileWorkspaces:
+    """LRU of session workspaces; idle ones expire after `ttl` seconds, at most `max_workspaces` are kept.
+
+    Workspaces live on this worker's local disk, so a session whose exports are
+    spread across workers gets one workspace per worker.
+    """
+
+    def __init__(self, base_dir: str, ttl: float, max_workspaces: int):
+        self.base_dir = base_dir
+        self.ttl = ttl
+        self.max_workspaces = max_workspaces
+        self._workspaces: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def root(self) -> str:
+        # Resolved per process: with preload_app the registry is created before workers fork
+        return os.path.join(self.base_dir, f"worker-{os.getpid()}")
+
+    def _acquire(self, session_id: str) -> Workspace:
+        workspace = self._workspaces.get(session_id)
+        if workspace is None:
+            # Session IDs come from clients; never use them as path components directly
+            name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+            os.makedirs(self.root, exist_ok=True)
+            # Unique per workspace: a discarded one still in use must not share a directory with its successor
+            workspace = Workspace(tempfile.mkdtemp(dir=self.root, prefix=f"{name}-"))
+            self._workspaces[session_id] = workspace
+            WORKSPACES_ACTIVE.set(len(self._workspaces))
+        self._workspaces.move_to_end(session_id)
+        workspace.last_used = time.monotonic()
+        # Marked in use before evict() runs, so it cannot be removed between hand-out and lock
+        workspace.users += 1
+        self.evict()
+        return workspace
+
+    def _release(self, workspace: Workspace) -> None:
+        workspace.users -= 1
+        workspace.last_used = time.monotonic()
+        if workspace.discarded and not workspace.users:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+
+    async def compile(self, session_id: str, latex_code: str) -> bytes:
+        """PDF for the session's current source; pdflatex only runs when the source changed"""
+        workspace = self._acquire(session_id)
+        source_hash = content_hash(latex_code)
+        try:
+            async with workspace.lock:
+                if workspace.source_hash == source_hash:
+                    try:
+                        pdf = await asyncio.to_thread(_read, workspace.pdf_path)
+                        workspace.reuses += 1
+                        WORKSPACE_COMPILES.labels(result="reused").inc()
+                        return pdf
+                    except FileNotFoundError:
+                        pass
+                # Cleared first so a failed compile is never mistaken for the last good one
+                workspace.source_hash = None
+                if not os.path.isdir(workspace.path):
+                    os.makedirs(workspace.path, exist_ok=True)
+                pdf = await pdf_compiler.compile(latex_code, workdir=workspace.path)
+                workspace.source_hash = source_hash
+                workspace.compiles += 1
+                WORKSPACE_COMPILES.labels(result="compiled").inc()
+                return pdf
+        finally:
+            self._release(workspace)
+
+    def evict(self) -> int:
+        """Drop expired workspaces and the least recently used beyond the cap; busy ones are kept"""
+        now = time.monotonic()
+        evicted = 0
+        for session_id, workspace in list(self._workspaces.items()):
+            expired = now - workspace.last_used > self.ttl
+            over_cap = len(self._workspaces) > self.max_workspaces
+            if not (expired or over_cap):
+                # Ordered oldest first: nothing after this one is expired either
+                break
+            if workspace.users:
+                continue
+            del self._workspaces[session_id]
+            shutil.rmtree(workspace.path, ignore_errors=True)
+            evicted += 1
+        WORKSPACES_ACTIVE.set(len(self._workspaces))
+        return evicted
+
+    def discard(self, session_id: str) -> None:
+        """Remove a session's workspace (e.g. when the session is deleted); one in use goes when its last request ends"""
+        workspace = self._workspaces.pop(session_id, None)
+        if workspace is not None:
+            workspace.discarded = True
+            if not workspace.users:
+                shutil.rmtree(workspace.path, ignore_errors=True)
+            WORKSPACES_ACTIVE.set(len(self._workspaces))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.ttl / 4))
+            self.evict()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self) -> None:
+        """Delete every workspace of this worker"""
+        for session_id in list(self._workspaces):
+            self.discard(session_id)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "root": self.root,
+            "workspaces": len(self._workspaces),
+            "max_workspaces": self.max_workspaces,
+            "ttl_seconds": self.ttl,
+            "compiles": sum(w.compiles for w in self._workspaces.values()),
+            "reuses": sum(w.reuses for w in self._workspaces.values()),
+        }
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# Global workspace registry (one per worker process)
+compile_workspaces = CompileWorkspaces(
+    settings.COMPILE_WORKSPACE_DIR or os.path.join(SPOOL_DIR or tempfile.gettempdir(), "resume-workspaces"),
+    settings.COMPILE_WORKSPACE_TTL_SECONDS,
+    settings.COMPILE_WORKSPACE_MAX
+)
@@ -0,0 +1,285 @@
+"""
+Background job queue for long-running LLM operations
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+import codec
+from config import settings
+from redis_client import get_redis
+
+QUEUE_KEY = "jobs:queue"
+# Each worker process moves the jobs it takes into its own list, kept alive by a heartbeat key;
+# jobs left in the list of a worker whose heartbeat expired are put back on the queue
+PROCESSING_PREFIX = "jobs:processing:"
+HEARTBEAT_PREFIX = "jobs:worker:"
+TERMINAL_STATUSES = ("completed", "failed")
+
+JobHandler = Callable[[dict], Awaitable[dict]]
+
+
+class JobQueue:
+    """Redis-backed job queue (in-memory when Redis is unavailable) with pollable job records.
+
+    A taken job stays in the worker's processing list until it finishes, so a worker
+    that crashes or restarts mid-job does not lose it: once its heartbeat expires,
+    any live worker puts the job back on the queue (up to JOB_MAX_ATTEMPTS runs).
+    """
+
+    def __init__(self, lease_seconds: float, max_attempts: int, result_ttl: int):
+        self.logger = logging.getLogger("JobQueue")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self.handlers: Dict[str, JobHandler] = {}
+        # In-memory records by last update, with their expiry (matches the Redis key TTL)
+        self._jobs: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._local_queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._worker_pid: Optional[int] = None
+        self._worker_id = ""
+        self._last_beat = 0.0
+
+    @property
+    def worker_id(self) -> str:
+        # Resolved per process: with preload_app the queue is created before workers fork
+        if self._worker_pid != os.getpid():
+            self._worker_pid = os.getpid()
+            self._worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._last_beat = 0.0
+        return self._worker_id
+
+    @property
+    def processing_key(self) -> str:
+        return PROCESSING_PREFIX + self.worker_id
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of the given type"""
+        self.handlers[job_type] = handler
+
+    def _queue(self) -> asyncio.Queue:
+        if self._local_queue is None:
+            self._local_queue = asyncio.Queue()
+        return self._local_queue
+
+    def _save(self, job: dict) -> None:
+        job["updated_at"] = datetime.now().isoformat()
+        r = get_redis()
+        if r is not None:
+            r.set(f"job:{job['job_id']}", codec.dumps(job), ex=self.result_ttl)
+        else:
+            self._jobs[job["job_id"]] = (time.monotonic() + self.result_ttl, job)
+            self._jobs.move_to_end(job["job_id"])
+            self._expire()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        # Ordered by last update, and every save gets the same TTL: the oldest expire first
+        while self._jobs:
+            job_id, (expires, _) = next(iter(self._jobs.items()))
+            if expires > now:
+                break
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> dict:
+        r = get_redis()
+        if r is not None:
+            job_json = r.get(f"job:{job_id}")
+            if not job_json:
+                raise HTTPException(status_code=404, detail="Job not found")
+            return codec.loads(job_json)
+        self._expire()
+        if job_id not in self._jobs:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return self._jobs[job_id][1]
+
+    async def enqueue(self, job_type: str, payload: dict) -> str:
+        """Store a queued job record and push it onto the queue; returns the job ID"""
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "type": job_type,
+            "status": "queued",
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        self._save(job)
+        r = get_redis()
+        if r is not None:
+            r.rpush(QUEUE_KEY, job["job_id"])
+        else:
+            await self._queue().put(job["job_id"])
+        return job["job_id"]
+
+    def _beat(self, r) -> None:
+        r.set(HEARTBEAT_PREFIX + self.worker_id, "1", px=int(self.lease_seconds * 1000))
+        self._last_beat = time.monotonic()
+
+    def reclaim(self) -> int:
+        """Put jobs held by workers whose heartbeat expired back on the queue; returns how many"""
+        r = get_redis()
+        if r is None:
+            return 0
+        reclaimed = 0
+        for key in r.scan_iter(match=PROCESSING_PREFIX + "*"):
+            owner = key[len(PROCESSING_PREFIX):]
+            if owner == self.worker_id or r.exists(HEARTBEAT_PREFIX + owner):
+                continue
+            # Settle each record before moving its ID, so a worker that takes it right away
+            # never has its "running" status overwritten
+            while True:
+                job_id = r.lindex(key, -1)
+                if job_id is None:
+                    break
+                if self._requeued(job_id, owner):
+                    r.lmove(key, QUEUE_KEY, "RIGHT", "LEFT")
+                    reclaimed += 1
+                else:
+                    r.lrem(key, 1, job_id)
+        return reclaimed
+
+    def _requeued(self, job_id: str, owner: str) -> bool:
+        """Reset an interrupted job to queued; False when it should not run again"""
+        try:
+            job = self.get_job(job_id)
+        except HTTPException:
+            return False
+        if job["status"] in TERMINAL_STATUSES:
+            return False
+        if job.get("attempts", 0) >= self.max_attempts:
+            job["status"] = "failed"
+            job["error"] = {"status_code": 500, "detail": f"Job was interrupted {job['attempts']} times by worker restarts"}
+            self.logger.error(f"Giving up on job {job_id} after {job['attempts']} interrupted attempts")
+            self._save(job)
+            return False
+        job["status"] = "queued"
+        self._save(job)
+        self.logger.warning(f"Requeued job {job_id} from stopped worker {owner}")
+        return True
+
+    async def run_heartbeat(self) -> None:
+        """Keep this worker's lease alive and reclaim jobs of dead workers, until cancelled"""
+        while True:
+            try:
+                r = get_redis()
+                if r is not None:
+                    await asyncio.to_thread(self._beat, r)
+                    reclaimed = await asyncio.to_thread(self.reclaim)
+                    if reclaimed:
+                        self.logger.warning(f"Reclaimed {reclaimed} job(s) from stopped workers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Job heartbeat failed: {e}")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+    async def _next_job_id(self) -> Optional[str]:
+        r = get_redis()
+        if r is not None:
+            # Never hold a job without a live lease, or another worker could reclaim it
+            if time.monotonic() - self._last_beat > self.lease_seconds / 3:
+                await asyncio.to_thread(self._beat, r)
+            # BLMOVE blocks, so keep it off the event loop
+            return await asyncio.to_thread(r.blmove, QUEUE_KEY, self.processing_key, 1, "LEFT", "RIGHT")
+        try:
+            return await asyncio.wait_for(self._queue().get(), 1)
+        except asyncio.TimeoutError:
+            return None
+
+    def _done(self, job_id: str) -> None:
+        r = get_redis()
+        if r is not None:
+            r.lrem(self.processing_key, 1, job_id)
+
+    async def _run_job(self, job_id: str) -> None:
+        try:
+            job = self.get_job(job_id)
+        except HTTPException:
+            self.logger.warning(f"Dropping expired job {job_id}")
+            return
+        if job["status"] in TERMINAL_STATUSES:
+            return
+        job["status"] = "running"
+        job["attempts"] = job.get("attempts", 0) + 1
+        self._save(job)
+        try:
+            job["result"] = await self.handlers[job["type"]](job["payload"])
+            job["status"] = "completed"
+        except HTTPException as e:
+            job["status"] = "failed"
+            job["error"] = {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            self.logger.error(f"Job {job_id} ({job['type']}) failed: {e}", exc_info=True)
+            job["status"] = "failed"
+            job["error"] = {"status_code": 500, "detail": str(e)}
+        self._save(job)
+
+    async def run_worker(self) -> None:
+        """Pull and run jobs until cancelled"""
+        while True:
+            try:
+                job_id = await self._next_job_id()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Job queue poll failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if job_id:
+                await self._run_job(job_id)
+                # Only a finished job leaves the processing list; one interrupted by a crash
+                # or shutdown stays there until another worker reclaims it
+                await asyncio.to_thread(self._done, job_id)
+
+    def start_workers(self, count: int) -> None:
+        """Start in-process worker tasks (and their heartbeat) on the running event loop"""
+        if count <= 0:
+            return
+        self._workers.append(asyncio.create_task(self.run_heartbeat()))
+        for _ in range(count):
+            self._workers.append(asyncio.create_task(self.run_worker()))
+
+    async def stop_workers(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        r = get_redis()
+        if r is not None:
+            # Let other workers reclaim whatever was interrupted without waiting out the lease
+            r.delete(HEARTBEAT_PREFIX + self.worker_id)
+
+    async def watch(self, job_id: str, poll_interval: float = 0.5):
+        """Yield the job record each time its status changes, ending at a terminal status"""
+        last_status = None
+        while True:
+            job = self.get_job(job_id)
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(poll_interval)
+
+
+def public_job(job: dict) -> dict:
+    """Job record without the internal payload"""
+    return {key: value for key, value in job.items() if key != "payload"}
+
+
+# Global job queue instance
+job_queue = JobQueue(settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS, settings.JOB_RESULT_TTL_SECONDS)
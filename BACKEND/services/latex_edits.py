@@ -0,0 +1,109 @@
+"""
+Line-anchored edit operations on a LaTeX resume
+
+The LLM sees the resume body with line numbers and answers with a few edits
+(replace / insert_after / delete) instead of the whole document; they are
+validated against the current text and applied locally, so untouched lines
+are kept byte-for-byte.
+"""
+
+import json
+import re
+from typing import Dict, List, Tuple
+
+OPS = ("replace", "insert_after", "delete")
+
+BEGIN_DOCUMENT = re.compile(r'\\begin\{document\}')
+
+
+class EditConflict(ValueError):
+    """An edit operation is malformed or does not match the current resume"""
+
+
+def body_range(lines: List[str]) -> Tuple[int, int]:
+    """0-based [start, end) of the editable lines: everything after \\begin{document}"""
+    for i, line in enumerate(lines):
+        if BEGIN_DOCUMENT.search(line):
+            return i + 1, len(lines)
+    return 0, len(lines)
+
+
+def number_lines(latex: str) -> str:
+    """The editable body, one line per row as '<1-based line number>| <text>' (blank lines omitted)"""
+    lines = latex.splitlines()
+    start, end = body_range(lines)
+    return "\n".join(f"{i + 1}| {lines[i]}" for i in range(start, end) if lines[i].strip())
+
+
+def parse_edit_ops(response: str) -> List[dict]:
+    """Decode the LLM's JSON array of edit operations (code fences tolerated)"""
+    cleaned = re.sub(r'^```json\s*|```$', '', response.strip(), flags=re.MULTILINE).strip()
+    try:
+        ops = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise EditConflict(f"Edit response is not JSON: {e}")
+    if not isinstance(ops, list):
+        raise EditConflict("Edit response is not a JSON array")
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in OPS or not isinstance(op.get("line"), int):
+            raise EditConflict(f"Malformed edit operation: {op!r}")
+        if op["op"] != "delete" and not isinstance(op.get("text"), str):
+            raise EditConflict(f"Edit operation without text: {op!r}")
+    return ops
+
+
+def _locate(lines: List[str], start: int, end: int, op: dict) -> int:
+    """0-based index the op refers to; a stale line number is re-anchored by its `original` text"""
+    index = op["line"] - 1
+    original = (op.get("original") or "").strip()
+    if not start <= index < end:
+        raise EditConflict(f"Line {op['line']} is outside the resume body")
+    if not original or lines[index].strip() == original:
+        return index
+    matches = [i for i in range(start, end) if lines[i].strip() == original]
+    if len(matches) != 1:
+        raise EditConflict(f"Line {op['line']} does not contain the expected text")
+    return matches[0]
+
+
+def _indent(text: str, like: str, newline: str) -> str:
+    """Give unindented lines of `text` the indentation of the anchor line, joined with the document's newline"""
+    prefix = like[:len(like) - len(like.lstrip())]
+    return newline.join(line if line[:1].isspace() else prefix + line for line in re.split(r"\r?\n", text.rstrip("\r\n")))
+
+
+def apply_edit_ops(latex: str, ops: List[dict]) -> str:
+    """Apply validated edit ops; raises EditConflict rather than applying a partial edit"""
+    lines = latex.splitlines(keepends=True)
+    bare = [line.rstrip("\r\n") for line in lines]
+    start, end = body_range(bare)
+    # Inserted text follows the document's line endings (CRLF resumes stay CRLF)
+    newline = next((line[len(text):] for line, text in zip(lines, bare) if line != text), "\n")
+
+    replaced: Dict[int, str] = {}
+    deleted = set()
+    inserted: Dict[int, List[str]] = {}
+    for op in ops:
+        index = _locate(bare, start, end, op)
+        if op["op"] == "insert_after":
+            inserted.setdefault(index, []).append(_indent(op["text"], bare[index], newline))
+            continue
+        if index in replaced or index in deleted:
+            raise EditConflict(f"Line {index + 1} is edited more than once")
+        if op["op"] == "replace":
+            replaced[index] = _indent(op["text"], bare[index], newline)
+        else:
+            deleted.add(index)
+
+    out = []
+    for i, line in enumerate(lines):
+        ending = line[len(bare[i]):]
+        if i in replaced:
+            out.append(replaced[i] + ending)
+        elif i not in deleted:
+            out.append(line)
+        for text in inserted.get(i, []):
+            if out and not out[-1].endswith(("\n", "\r")):
+                out[-1] += newline
+            out.append(text + ending)
+    return "".join(out)
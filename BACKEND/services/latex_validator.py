@@ -0,0 +1,140 @@
+"""
+Pre-flight LaTeX checks and structured pdflatex log parsing
+"""
+
+import re
+from typing import List, Optional
+from config import settings
+
+MAX_ISSUES = 20
+MAX_CONTEXT_CHARS = 160
+
+# Primitives that reach outside the document: shell escape, arbitrary file I/O, Lua
+FORBIDDEN = [
+    (re.compile(r'\\write18\b|\\immediate\s*\\write\s*18'), "shell escape (\\write18) is not allowed"),
+    (re.compile(r'\\(?:openout|openin|newwrite|newread)\b'), "file I/O primitives are not allowed"),
+    (re.compile(r'\\(?:directlua|latelua|luaexec|ShellEscape)\b'), "Lua and shell-escape commands are not allowed"),
+    (re.compile(r'\\usepackage(?:\[[^\]]*\])?\{[^}]*\b(?:shellesc|catchfile|verbatimwrite)\b[^}]*\}'), "package is not allowed"),
+    (re.compile(r'\\catcode\b'), "\\catcode changes are not allowed"),
+    (re.compile(r'\\(?:input|include|includegraphics|InputIfFileExists|lstinputlisting|verbatiminput)\s*(?:\[[^\]]*\])?\s*\{?\s*(?:/|~|[A-Za-z]:[\\/]|[^}\s]*\.\./)'),
+     "files may not be read from absolute or parent paths"),
+]
+
+# \verb|...| spans (any non-letter delimiter, same line), then escapes and unescaped % comments
+VERB = r'\\verb\*?(?P<delim>[^a-zA-Z\s*]).*?(?P=delim)'
+COMMENT = re.compile(VERB + r'|\\.|%[^\n]*')
+
+# Escapes, \verb spans, comments, begin/end, braces and newlines; everything else is skipped by finditer
+TOKEN = re.compile(r'\\(?P<kind>begin|end)\s*\{(?P<name>[^{}\n]*)\}|' + VERB + r'|\\.|%[^\n]*|[{}\n]')
+
+VERBATIM_ENVS = {"verbatim", "verbatim*", "lstlisting", "minted", "comment"}
+
+
+def _issue(line: int, message: str, source_lines: List[str]) -> dict:
+    context = source_lines[line - 1].strip() if 0 < line <= len(source_lines) else ""
+    return {"line": line, "message": message, "context": context[:MAX_CONTEXT_CHARS]}
+
+
+def strip_comments(source: str) -> str:
+    """Drop % comments (not \\% or a % inside \\verb); newlines are kept, so line numbers still match"""
+    return COMMENT.sub(lambda m: "" if m.group()[0] == "%" else m.group(), source)
+
+
+def validate_latex(source: str) -> List[dict]:
+    """Cheap structural checks run before a compile slot is used; returns issues (empty when OK)"""
+    size = len(source.encode("utf-8"))
+    if size > settings.LATEX_MAX_BYTES:
+        return [{"line": None, "message": f"Document is {size} bytes; the limit is {settings.LATEX_MAX_BYTES}", "context": ""}]
+    if source.count("\n") + 1 > settings.LATEX_MAX_LINES:
+        return [{"line": None, "message": f"Document has more than {settings.LATEX_MAX_LINES} lines", "context": ""}]
+
+    lines = source.split("\n")
+    issues = []
+
+    # A commented-out \input or \write18 never runs
+    code = strip_comments(source)
+    for pattern, message in FORBIDDEN:
+        for match in pattern.finditer(code):
+            issues.append(_issue(code.count("\n", 0, match.start()) + 1, message, lines))
+            if len(issues) >= MAX_ISSUES:
+                return issues
+
+    if "\\documentclass" not in source:
+        issues.append({"line": None, "message": "Missing \\documentclass", "context": ""})
+    if "\\begin{document}" not in source:
+        issues.append({"line": None, "message": "Missing \\begin{document}", "context": ""})
+
+    line = 1
+    braces: List[int] = []
+    envs: List[tuple] = []
+    verbatim: Optional[str] = None
+    for match in TOKEN.finditer(source):
+        token = match.group()
+        if token == "\n":
+            line += 1
+            continue
+        kind = match.group("kind")
+        if verbatim is not None:
+            # Only the matching \end leaves a verbatim block; nothing inside is counted
+            if kind == "end" and match.group("name").strip() == verbatim:
+                verbatim = None
+                envs.pop()
+            continue
+        if token[0] == "%" or match.group("delim"):
+            continue
+        if kind == "begin":
+            name = match.group("name").strip()
+            envs.append((name, line))
+            if name in VERBATIM_ENVS:
+                verbatim = name
+        elif kind == "end":
+            name = match.group("name").strip()
+            if not envs:
+                issues.append(_issue(line, f"\\end{{{name}}} without a matching \\begin", lines))
+            elif envs[-1][0] != name:
+                issues.append(_issue(line, f"\\end{{{name}}} closes \\begin{{{envs[-1][0]}}} from line {envs[-1][1]}", lines))
+                envs.pop()
+            else:
+                envs.pop()
+        elif token == "{":
+            braces.append(line)
+        elif token == "}":
+            if braces:
+                braces.pop()
+            else:
+                issues.append(_issue(line, "Unmatched closing brace", lines))
+        if len(issues) >= MAX_ISSUES:
+            return issues
+
+    for name, opened in envs[:MAX_ISSUES]:
+        issues.append(_issue(opened, f"\\begin{{{name}}} is never closed", lines))
+    for opened in braces[:MAX_ISSUES]:
+        issues.append(_issue(opened, "Unclosed brace", lines))
+    return issues[:MAX_ISSUES]
+
+
+# "! Message" starts an error; "l.<n> <context>" (or "./file.tex:<n>: ..." with -file-line-error) locates it
+ERROR_START = re.compile(r'^! (?P<message>.+)$')
+FILE_LINE_ERROR = re.compile(r'^\S+\.tex:(?P<line>\d+): (?P<message>.+)$')
+LINE_MARKER = re.compile(r'^l\.(?P<line>\d+) ?(?P<context>.*)$')
+
+
+def parse_latex_log(log: str, max_errors: int = 10) -> List[dict]:
+    """Extract error messages with line numbers and context from a pdflatex log"""
+    errors = []
+    current = None
+    for raw in log.splitlines():
+        start = ERROR_START.match(raw) or FILE_LINE_ERROR.match(raw)
+        if start:
+            if len(errors) >= max_errors:
+                break
+            line = start.groupdict().get("line")
+            current = {"line": int(line) if line else None, "message": start.group("message")[:MAX_CONTEXT_CHARS], "context": ""}
+            errors.append(current)
+            continue
+        marker = LINE_MARKER.match(raw)
+        if marker and current is not None and not current["context"]:
+            current["line"] = int(marker.group("line"))
+            current["context"] = marker.group("context").strip()[:MAX_CONTEXT_CHARS]
+            current = None
+    return errors
@@ -0,0 +1,193 @@
+"""
+LLM routing: maps each AI operation to its own model and provider
+"""
+
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from services.rate_limiter import llm_limiter, RateLimitExceeded
+from metrics import LLM_CALL_SECONDS, LLM_TOKENS, LLM_COST
+from tracing import span, set_attributes
+
+PRIMARY = "primary"
+FALLBACK = "fallback"
+
+
+class Route:
+    """Model/provider assignment for one AI operation"""
+
+    def __init__(self, operation: str, model: str, provider: str, max_tokens: int):
+        self.operation = operation
+        self.model = model
+        self.provider = provider
+        self.max_tokens = max_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "model": self.model,
+            "provider": self.provider,
+            "max_tokens": self.max_tokens,
+        }
+
+
+class RouteStats:
+    """Latency, token and cost counters for one (operation, provider, model)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def as_dict(self) -> dict:
+        successes = self.calls - self.failures
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.total_latency / successes * 1000, 1) if successes else None,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+def provider_retry_after(error: Exception) -> float:
+    """Seconds from a provider 429's Retry-After header (1 when it has none)"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class LLMRouter:
+    """Dispatches chat completions to the model/provider configured per operation"""
+
+    def __init__(self):
+        self.logger = logging.getLogger("LLMRouter")
+        self._providers: Optional[Dict[str, Tuple["openai.AsyncOpenAI", str]]] = None
+        self.routes: Dict[str, Route] = {
+            "default": Route("default", settings.LLM_MODEL, PRIMARY, settings.LLM_MAX_TOKENS),
+            "questions": Route("questions", settings.LLM_QUESTIONS_MODEL, settings.LLM_QUESTIONS_PROVIDER, settings.LLM_QUESTIONS_MAX_TOKENS),
+            "enhance": Route("enhance", settings.LLM_ENHANCE_MODEL, settings.LLM_ENHANCE_PROVIDER, settings.LLM_ENHANCE_MAX_TOKENS),
+            "suggestions": Route("suggestions", settings.LLM_SUGGESTIONS_MODEL, settings.LLM_SUGGESTIONS_PROVIDER, settings.LLM_SUGGESTIONS_MAX_TOKENS),
+            "rewrite": Route("rewrite", settings.LLM_REWRITE_MODEL, settings.LLM_REWRITE_PROVIDER, settings.LLM_REWRITE_MAX_TOKENS),
+            "edit": Route("edit", settings.LLM_EDIT_MODEL, settings.LLM_EDIT_PROVIDER, settings.LLM_EDIT_MAX_TOKENS),
+        }
+        self.stats: Dict[Tuple[str, str, str], RouteStats] = {}
+
+    @property
+    def providers(self) -> Dict[str, Tuple["openai.AsyncOpenAI", str]]:
+        """Provider name -> (client, default model); clients are built on first use"""
+        if self._providers is None:
+            self.connect()
+        return self._providers
+
+    def connect(self) -> None:
+        """Build the provider clients (no network I/O; connections open on the first call)"""
+        import openai
+        providers = {
+            PRIMARY: (openai.AsyncOpenAI(api_key=settings.LLM_API_KEY, base_url=settings.LLM_API_URL), settings.LLM_MODEL)
+        }
+        if settings.LLM_FALLBACK_API_URL:
+            providers[FALLBACK] = (
+                openai.AsyncOpenAI(api_key=settings.LLM_FALLBACK_API_KEY, base_url=settings.LLM_FALLBACK_API_URL),
+                settings.LLM_FALLBACK_MODEL or settings.LLM_MODEL,
+            )
+        self._providers = providers
+
+    async def close(self) -> None:
+        """Close provider HTTP connection pools"""
+        if self._providers is not None:
+            for client, _ in self._providers.values():
+                await client.close()
+            self._providers = None
+
+    def get_route(self, operation: str) -> Route:
+        return self.routes.get(operation, self.routes["default"])
+
+    def _candidates(self, route: Route) -> List[Tuple[str, str]]:
+        """Ordered (provider, model) attempts for a route: configured target, then the other provider"""
+        provider = route.provider if route.provider in self.providers else PRIMARY
+        candidates = [(provider, route.model)]
+        for name, (_, default_model) in self.providers.items():
+            if name != provider:
+                candidates.append((name, default_model))
+        return candidates
+
+    def _record(self, operation: str, provider: str, model: str, latency: float, usage=None, failed: bool = False) -> None:
+        stats = self.stats.setdefault((operation, provider, model), RouteStats())
+        stats.calls += 1
+        LLM_CALL_SECONDS.labels(operation=operation, provider=provider, model=model, outcome="error" if failed else "success").observe(latency)
+        if failed:
+            stats.failures += 1
+            return
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens or 0
+            completion_tokens = usage.completion_tokens or 0
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            prices = settings.LLM_MODEL_PRICES.get(model, {})
+            cost = (prompt_tokens * prices.get("prompt", 0.0) + completion_tokens * prices.get("completion", 0.0)) / 1000
+            stats.cost += cost
+            LLM_TOKENS.labels(operation=operation, model=model, kind="prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(operation=operation, model=model, kind="completion").inc(completion_tokens)
+            LLM_COST.labels(operation=operation, model=model).inc(cost)
+
+    async def complete(self, operation: str, messages: List[dict], temperature: float, max_tokens: Optional[int] = None, session_id: Optional[str] = None) -> str:
+        """Run a chat completion for an operation, falling back to the secondary provider on failure.
+
+        A provider 429 is not retried on the other provider; it is raised as RateLimitExceeded.
+        """
+        route = self.get_route(operation)
+        max_tokens = max_tokens or route.max_tokens
+        async with llm_limiter.admit(session_id, llm_limiter.estimate_tokens(messages, max_tokens)) as admission:
+            last_error: Optional[Exception] = None
+            for provider, model in self._candidates(route):
+                client, _ = self.providers[provider]
+                started = time.perf_counter()
+                try:
+                    with span("llm.chat_completion", **{"llm.operation": operation, "llm.provider": provider, "llm.model": model}) as current:
+                        response = await client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            stream=False
+                        )
+                        if response.usage is not None:
+                            set_attributes(current, **{
+                                "llm.prompt_tokens": response.usage.prompt_tokens,
+                                "llm.completion_tokens": response.usage.completion_tokens
+                            })
+                except Exception as e:
+                    self._record(operation, provider, model, time.perf_counter() - started, failed=True)
+                    self.logger.warning(f"LLM call failed for operation={operation} provider={provider} model={model}: {e}")
+                    if getattr(e, "status_code", None) == 429:
+                        # The caller should back off; moving the burst to the fallback would only exhaust it too
+                        raise RateLimitExceeded(provider_retry_after(e), detail="LLM provider rate limit reached, please retry later") from e
+                    last_error = e
+                    continue
+                self._record(operation, provider, model, time.perf_counter() - started, usage=response.usage)
+                if response.usage is not None:
+                    admission["actual_tokens"] = response.usage.total_tokens
+                return response.choices[0].message.content
+            raise last_error
+
+    def get_stats(self) -> dict:
+        """Routing table plus per-route latency/cost counters"""
+        return {
+            "routes": [route.as_dict() for route in self.routes.values()],
+            "stats": [
+                {"operation": operation, "provider": provider, "model": model, **stats.as_dict()}
+                for (operation, provider, model), stats in self.stats.items()
+            ],
+        }
@@ -0,0 +1,229 @@
+"""
+PDF compilation service: bounded pdflatex pool with queueing and coalescing
+"""
+
+import asyncio
+import base64
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+from fastapi import HTTPException
+from config import settings
+from metrics import (
+    PDFLATEX_COMPILE_SECONDS, PDFLATEX_CPU_SECONDS, PDFLATEX_MAX_RSS_BYTES, PDFLATEX_WALL_SECONDS,
+    COMPILE_QUEUE_WAIT_SECONDS, COMPILE_QUEUE_DEPTH, observe
+)
+from services.single_flight import single_flight, flight_key
+from services.latex_validator import parse_latex_log, validate_latex
+from services.sandbox import SANDBOX_SUPPORTED, SandboxLimits, SandboxResult, run_sandboxed
+from tracing import span, set_attributes
+
+logger = logging.getLogger("PdfCompiler")
+
+
+def spool_dir() -> Optional[str]:
+    """RAM-backed directory for compile scratch files (PDFLATEX_SPOOL_DIR, else /dev/shm when writable)"""
+    if settings.PDFLATEX_SPOOL_DIR:
+        return settings.PDFLATEX_SPOOL_DIR
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+
+SPOOL_DIR = spool_dir()
+
+LIMITS = SandboxLimits(
+    cpu_seconds=settings.PDFLATEX_CPU_SECONDS,
+    memory_bytes=settings.PDFLATEX_MEMORY_MB * 1024 * 1024,
+    file_size_bytes=settings.PDFLATEX_MAX_FILE_MB * 1024 * 1024,
+)
+
+# kpathsea "paranoid" mode: no reading or writing dotfiles, parent or absolute paths
+PDFLATEX_ENV = {**os.environ, "openin_any": "p", "openout_any": "p", "shell_escape": "f"}
+
+
+class CompileUsage:
+    """Aggregate per-job resource usage of pdflatex runs in this worker"""
+
+    def __init__(self):
+        self.jobs = 0
+        self.cpu_seconds = 0.0
+        self.max_cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.max_rss_bytes = 0
+        self.limits_hit: Dict[str, int] = {}
+
+    def record(self, result: SandboxResult) -> None:
+        self.jobs += 1
+        self.wall_seconds += result.wall_seconds
+        PDFLATEX_WALL_SECONDS.observe(result.wall_seconds)
+        if result.cpu_seconds is not None:
+            self.cpu_seconds += result.cpu_seconds
+            self.max_cpu_seconds = max(self.max_cpu_seconds, result.cpu_seconds)
+            PDFLATEX_CPU_SECONDS.observe(result.cpu_seconds)
+        if result.max_rss_bytes is not None:
+            self.max_rss_bytes = max(self.max_rss_bytes, result.max_rss_bytes)
+            PDFLATEX_MAX_RSS_BYTES.observe(result.max_rss_bytes)
+        if result.limit_hit:
+            self.limits_hit[result.limit_hit] = self.limits_hit.get(result.limit_hit, 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            "jobs": self.jobs,
+            "avg_cpu_seconds": round(self.cpu_seconds / self.jobs, 3) if self.jobs else None,
+            "max_cpu_seconds": round(self.max_cpu_seconds, 3),
+            "avg_wall_seconds": round(self.wall_seconds / self.jobs, 3) if self.jobs else None,
+            "max_rss_bytes": self.max_rss_bytes,
+            "limits_hit": dict(self.limits_hit),
+        }
+
+
+compile_usage = CompileUsage()
+
+
+def compile_latex_to_pdf(latex_code: str, workdir: Optional[str] = None) -> bytes:
+    """Run pdflatex on the given source in a resource-limited sandbox and return the PDF bytes.
+
+    With `workdir` (a session's persistent workspace) the .aux and other
+    intermediates of the previous run are reused instead of starting from scratch.
+    """
+    if workdir is None:
+        with tempfile.TemporaryDirectory(dir=SPOOL_DIR, prefix="pdflatex-") as tmpdir:
+            return run_pdflatex(latex_code, tmpdir)
+    try:
+        return run_pdflatex(latex_code, workdir)
+    except HTTPException:
+        # A run that stopped halfway can leave a truncated .aux that breaks the next one
+        for name in ("resume.aux", "resume.pdf"):
+            try:
+                os.remove(os.path.join(workdir, name))
+            except FileNotFoundError:
+                pass
+        raise
+
+
+def run_pdflatex(latex_code: str, tmpdir: str) -> bytes:
+    """One sandboxed pdflatex pass in `tmpdir` (writes resume.tex, returns resume.pdf)"""
+    tex_path = os.path.join(tmpdir, "resume.tex")
+    pdf_path = os.path.join(tmpdir, "resume.pdf")
+    with open(tex_path, "w") as f:
+        f.write(latex_code)
+    if os.path.exists(pdf_path):
+        os.remove(pdf_path)
+    with span("pdflatex.compile", **{"latex.bytes": len(latex_code)}) as current, observe(PDFLATEX_COMPILE_SECONDS):
+        try:
+            result = run_sandboxed(
+                # -halt-on-error: stop at the first error instead of burning the slot on the rest
+                ["pdflatex", "-interaction=nonstopmode", "-halt-on-error", "-no-shell-escape", "-jobname=resume", tex_path],
+                cwd=tmpdir,
+                timeout=settings.PDFLATEX_TIMEOUT_SECONDS,
+                limits=LIMITS,
+                env=PDFLATEX_ENV
+            )
+        except FileNotFoundError:
+            # Only the spawn itself means a missing binary; other I/O errors are real failures
+            raise HTTPException(status_code=503, detail="pdflatex is not installed on this server")
+        compile_usage.record(result)
+        set_attributes(current, **{
+            "pdflatex.cpu_seconds": result.cpu_seconds,
+            "pdflatex.max_rss_bytes": result.max_rss_bytes,
+            "pdflatex.limit_hit": result.limit_hit,
+        })
+        logger.info("pdflatex finished", extra=result.as_dict())
+        if result.timed_out:
+            raise compile_error(tmpdir, f"LaTeX compilation timed out after {settings.PDFLATEX_TIMEOUT_SECONDS}s")
+        if result.limit_hit:
+            raise compile_error(tmpdir, f"LaTeX compilation exceeded its resource limits ({result.limit_hit})")
+        if result.returncode != 0:
+            raise compile_error(tmpdir, "LaTeX compilation failed")
+    if not os.path.exists(pdf_path):
+        raise compile_error(tmpdir, "PDF not generated")
+    # Read PDF into memory
+    with open(pdf_path, "rb") as pdf_file:
+        return pdf_file.read()
+
+
+def compile_error(tmpdir: str, message: str) -> HTTPException:
+    """422 carrying the error locations parsed from the pdflatex log (never the raw log)"""
+    log_path = os.path.join(tmpdir, "resume.log")
+    errors = []
+    if os.path.exists(log_path):
+        with open(log_path, "r", errors="replace") as f:
+            errors = parse_latex_log(f.read())
+    logger.warning(message, extra={"errors": errors})
+    return HTTPException(status_code=422, detail={"message": message, "errors": errors})
+
+
+class PdfCompiler:
+    """Runs at most PDFLATEX_MAX_CONCURRENCY compiles per worker; the rest queue"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.waiting = 0
+        self.active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _compile_queued(self, latex_code: str, workdir: Optional[str] = None) -> bytes:
+        queued = time.perf_counter()
+        self.waiting += 1
+        COMPILE_QUEUE_DEPTH.inc()
+        try:
+            await self._slots().acquire()
+        finally:
+            self.waiting -= 1
+            COMPILE_QUEUE_DEPTH.dec()
+        COMPILE_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued)
+        # to_thread copies the context, so the compile span nests under the request span
+        self.active += 1
+        try:
+            return await asyncio.to_thread(compile_latex_to_pdf, latex_code, workdir)
+        finally:
+            self.active -= 1
+            self._slots().release()
+
+    async def compile(self, latex_code: str, workdir: Optional[str] = None) -> bytes:
+        """Compile off the event loop; identical concurrent sources share one pdflatex run.
+
+        `workdir` compiles inside a persistent session workspace; the caller
+        serializes access to it, so those runs are not coalesced.
+        """
+        # Reject malformed or unsafe sources before they take a compile slot
+        issues = validate_latex(latex_code)
+        if issues:
+            raise HTTPException(status_code=422, detail={"message": "LaTeX validation failed", "errors": issues})
+        if workdir is not None:
+            return await self._compile_queued(latex_code, workdir)
+        return await single_flight.do(
+            flight_key("pdf", latex_code),
+            lambda: self._compile_queued(latex_code),
+            encode=lambda pdf: base64.b64encode(pdf).decode(),
+            decode=base64.b64decode
+        )
+
+    def snapshot(self) -> dict:
+        return {"active": self.active, "waiting": self.waiting, "max_concurrency": self.max_concurrency}
+
+    def usage(self) -> dict:
+        """Sandbox limits, spool location and per-job resource usage of this worker's compiles"""
+        return {
+            "spool_dir": SPOOL_DIR or tempfile.gettempdir(),
+            "limits": {
+                "cpu_seconds": LIMITS.cpu_seconds,
+                "memory_bytes": LIMITS.memory_bytes,
+                "file_size_bytes": LIMITS.file_size_bytes,
+                "timeout_seconds": settings.PDFLATEX_TIMEOUT_SECONDS,
+                "enforced": SANDBOX_SUPPORTED,
+            },
+            **compile_usage.snapshot(),
+        }
+
+
+# Global compiler instance
+pdf_compiler = PdfCompiler(settings.PDFLATEX_MAX_CONCURRENCY)
@@ -0,0 +1,229 @@
+"""
+Page previews: compile once, rasterize pages with pdftoppm or mutool, cache on disk
+"""
+
+import asyncio
+import base64
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from config import settings
+from blob_store import content_hash
+from metrics import PREVIEW_CACHE, PREVIEW_RENDER_SECONDS, observe
+from services.pdf_compiler import pdf_compiler, LIMITS, SPOOL_DIR
+from services.sandbox import run_sandboxed
+from services.single_flight import single_flight, flight_key
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+# pdfinfo prints "Pages: N"; `mutool show ... trailer/Root/Pages/Count` prints just N
+PAGE_COUNT = {"pdftoppm": re.compile(rb"^Pages:\s+(\d+)", re.M), "mutool": re.compile(rb"^\s*(\d+)\s*$", re.M)}
+# pdftoppm's own complaint about a page past the end, used when the page count is unavailable
+OUT_OF_RANGE = re.compile(rb"Wrong page range|out of range", re.I)
+
+
+class PreviewRenderer:
+    """Disk-cached page images keyed by (LaTeX hash, page, DPI, format).
+
+    The compiled PDF is cached under the LaTeX hash as well, so previewing
+    another page or DPI of the same source never recompiles.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_concurrency: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._size: Optional[int] = None
+        # Writes run on to_thread workers, so the running total is shared between threads
+        self._size_lock = threading.Lock()
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @staticmethod
+    def renderer() -> Optional[str]:
+        """Name of the installed rasterizer, preferring poppler's pdftoppm"""
+        for tool in ("pdftoppm", "mutool"):
+            if shutil.which(tool):
+                return tool
+        return None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _read(self, name: str) -> Optional[bytes]:
+        path = self._path(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # mtime doubles as last-use time for eviction
+        os.utime(path)
+        return data
+
+    def _write(self, name: str, data: bytes) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+        with self._size_lock:
+            if self._size is None:
+                self._size = self._scan()[0]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> Tuple[int, list]:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith(".tmp-"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sum(size for _, size, _ in entries), entries
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache is at 80% of its budget (caller holds _size_lock)"""
+        total, entries = self._scan()
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.8:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+    async def _pdf(self, latex_code: str, source_hash: str) -> bytes:
+        name = f"{source_hash}.pdf"
+        pdf = await asyncio.to_thread(self._read, name)
+        if pdf is not None:
+            return pdf
+        pdf = await pdf_compiler.compile(latex_code)
+        await asyncio.to_thread(self._write, name, pdf)
+        return pdf
+
+    def _page_count(self, tool: str, pdf_path: str, tmpdir: str) -> Optional[int]:
+        """Number of pages in the PDF, or None when it cannot be read"""
+        cmd = ["pdfinfo", pdf_path] if tool == "pdftoppm" else ["mutool", "show", pdf_path, "trailer/Root/Pages/Count"]
+        output_path = os.path.join(tmpdir, "info.txt")
+        try:
+            result = run_sandboxed(cmd, cwd=tmpdir, timeout=settings.PREVIEW_TIMEOUT_SECONDS, limits=LIMITS,
+                                   output_path=output_path)
+        except FileNotFoundError:
+            # pdfinfo ships with pdftoppm, but is not guaranteed to be installed alongside it
+            return None
+        if result.returncode != 0:
+            return None
+        with open(output_path, "rb") as f:
+            match = PAGE_COUNT[tool].search(f.read())
+        return int(match.group(1)) if match else None
+
+    def _rasterize(self, pdf: bytes, page: int, dpi: int, fmt: str) -> Optional[bytes]:
+        """PNG/WebP bytes of one page, or None when the page does not exist.
+
+        Any other renderer failure (crash, sandbox limit, missing program) is a 5xx.
+        """
+        tool = self.renderer()
+        if tool is None:
+            raise HTTPException(status_code=503, detail="No PDF renderer (pdftoppm or mutool) is installed on this server")
+        with tempfile.TemporaryDirectory(dir=SPOOL_DIR, prefix="preview-") as tmpdir:
+            pdf_path = os.path.join(tmpdir, "in.pdf")
+            out_path = os.path.join(tmpdir, "page.png")
+            log_path = os.path.join(tmpdir, "render.txt")
+            with open(pdf_path, "wb") as f:
+                f.write(pdf)
+            pages = self._page_count(tool, pdf_path, tmpdir)
+            if pages is not None and page > pages:
+                return None
+            if tool == "pdftoppm":
+                cmd = ["pdftoppm", "-f", str(page), "-l", str(page), "-r", str(dpi), "-png", "-singlefile", pdf_path, out_path[:-4]]
+            else:
+                cmd = ["mutool", "draw", "-q", "-r", str(dpi), "-o", out_path, pdf_path, str(page)]
+            try:
+                with observe(PREVIEW_RENDER_SECONDS, renderer=tool):
+                    result = run_sandboxed(cmd, cwd=tmpdir, timeout=settings.PREVIEW_TIMEOUT_SECONDS, limits=LIMITS,
+                                           output_path=log_path)
+            except FileNotFoundError:
+                raise HTTPException(status_code=503, detail=f"PDF renderer {tool} is not installed on this server")
+            if result.limit_hit:
+                raise HTTPException(status_code=503, detail=f"Preview rendering exceeded its limits ({result.limit_hit})")
+            if result.returncode == 0 and os.path.exists(out_path):
+                with open(out_path, "rb") as f:
+                    image = f.read()
+            else:
+                with open(log_path, "rb") as f:
+                    log = f.read()
+                if pages is None and OUT_OF_RANGE.search(log):
+                    return None
+                raise HTTPException(status_code=500, detail=f"Preview renderer {tool} failed (exit code {result.returncode})")
+        if fmt == "webp":
+            buffer = io.BytesIO()
+            Image.open(io.BytesIO(image)).save(buffer, format="WEBP", quality=80)
+            image = buffer.getvalue()
+        return image
+
+    def cache_key(self, latex_code: str, page: int = 1, dpi: int = 72, fmt: str = "png") -> str:
+        """Validated request parameters as the deterministic cache key (usable as an ETag); renders nothing"""
+        if fmt not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}' (use png or webp)")
+        if fmt == "webp" and not HAS_PILLOW:
+            raise HTTPException(status_code=400, detail="WebP previews need Pillow installed on the server; use png")
+        if page < 1:
+            raise HTTPException(status_code=400, detail="Pages are numbered from 1")
+        if not settings.PREVIEW_MIN_DPI <= dpi <= settings.PREVIEW_MAX_DPI:
+            raise HTTPException(status_code=400, detail=f"dpi must be between {settings.PREVIEW_MIN_DPI} and {settings.PREVIEW_MAX_DPI}")
+        return f"{content_hash(latex_code)}-p{page}-{dpi}dpi.{fmt}"
+
+    async def render(self, latex_code: str, page: int = 1, dpi: int = 72, fmt: str = "png") -> Tuple[bytes, str]:
+        """Image bytes and cache key for one page of the compiled source"""
+        key = self.cache_key(latex_code, page, dpi, fmt)
+        source_hash = key.split("-", 1)[0]
+        cached = await asyncio.to_thread(self._read, key)
+        if cached is not None:
+            PREVIEW_CACHE.labels(result="hit").inc()
+            return cached, key
+        PREVIEW_CACHE.labels(result="miss").inc()
+
+        async def render_page() -> bytes:
+            pdf = await self._pdf(latex_code, source_hash)
+            async with self._slots():
+                image = await asyncio.to_thread(self._rasterize, pdf, page, dpi, fmt)
+            if image is None:
+                raise HTTPException(status_code=404, detail=f"Page {page} not found")
+            await asyncio.to_thread(self._write, key, image)
+            return image
+
+        image = await single_flight.do(
+            flight_key("preview", key),
+            render_page,
+            encode=lambda data: base64.b64encode(data).decode(),
+            decode=base64.b64decode
+        )
+        return image, key
+
+
+# Global preview renderer instance
+preview_renderer = PreviewRenderer(
+    settings.PREVIEW_CACHE_DIR,
+    settings.PREVIEW_CACHE_MAX_MB * 1024 * 1024,
+    settings.PREVIEW_MAX_CONCURRENCY
+)
@@ -0,0 +1,269 @@
+"""
+Admission control for LLM calls: cluster-wide token buckets plus a fair per-session queue
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional
+from fastapi import HTTPException
+from config import settings
+from redis_client import get_redis
+from metrics import LLM_QUEUE_ACTIVE, LLM_QUEUE_WAITING, LLM_REJECTED
+
+ANONYMOUS_LANE = "anonymous"
+
+# Refills both buckets from Redis server time and takes from them only if both have room.
+# Returns 0 when admitted, otherwise the number of milliseconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local function level(key, rate, capacity)
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    return math.min(capacity, tokens + math.max(0, now - ts) * rate)
+end
+local req_rate, req_cap = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tok_rate, tok_cap = tonumber(ARGV[3]), tonumber(ARGV[4])
+local needed = tonumber(ARGV[5])
+local requests = level(KEYS[1], req_rate, req_cap)
+local tokens = level(KEYS[2], tok_rate, tok_cap)
+local wait = 0
+if requests < 1 then wait = math.max(wait, (1 - requests) / req_rate) end
+if tokens < needed then wait = math.max(wait, (needed - tokens) / tok_rate) end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - needed
+end
+redis.call('HSET', KEYS[1], 'tokens', requests, 'ts', now)
+redis.call('HSET', KEYS[2], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return math.ceil(wait * 1000)
+"""
+
+# Credits back (or charges) the difference between estimated and actual token usage
+TOKEN_ADJUST_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[2]), tokens + tonumber(ARGV[1])))
+end
+return 0
+"""
+
+
+class RateLimitExceeded(HTTPException):
+    """429 raised when the LLM queue is full or a caller would wait too long"""
+
+    def __init__(self, retry_after: float, detail: str = "LLM capacity exceeded, please retry later"):
+        super().__init__(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+class TokenBucket:
+    """Requests-per-minute and tokens-per-minute buckets, shared through Redis when available"""
+
+    REQUESTS_KEY = "ratelimit:llm:requests"
+    TOKENS_KEY = "ratelimit:llm:tokens"
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self._local_requests = self.request_capacity
+        self._local_tokens = self.token_capacity
+        self._local_ts = time.monotonic()
+        self._acquire_script = None
+        self._adjust_script = None
+
+    def try_acquire(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; returns 0 on success or seconds to wait"""
+        tokens = min(tokens, self.token_capacity)
+        r = get_redis()
+        if r is not None:
+            if self._acquire_script is None:
+                self._acquire_script = r.register_script(TOKEN_BUCKET_SCRIPT)
+            wait_ms = self._acquire_script(
+                keys=[self.REQUESTS_KEY, self.TOKENS_KEY],
+                args=[self.request_rate, self.request_capacity, self.token_rate, self.token_capacity, tokens]
+            )
+            return int(wait_ms) / 1000.0
+
+        now = time.monotonic()
+        elapsed = now - self._local_ts
+        self._local_ts = now
+        self._local_requests = min(self.request_capacity, self._local_requests + elapsed * self.request_rate)
+        self._local_tokens = min(self.token_capacity, self._local_tokens + elapsed * self.token_rate)
+        wait = 0.0
+        if self._local_requests < 1:
+            wait = max(wait, (1 - self._local_requests) / self.request_rate)
+        if self._local_tokens < tokens:
+            wait = max(wait, (tokens - self._local_tokens) / self.token_rate)
+        if wait == 0:
+            self._local_requests -= 1
+            self._local_tokens -= tokens
+        return wait
+
+    def adjust_tokens(self, delta: int) -> None:
+        """Return unused estimated tokens (positive delta) or charge extra usage (negative delta)"""
+        if delta == 0:
+            return
+        r = get_redis()
+        if r is not None:
+            if self._adjust_script is None:
+                self._adjust_script = r.register_script(TOKEN_ADJUST_SCRIPT)
+            self._adjust_script(keys=[self.TOKENS_KEY], args=[delta, self.token_capacity])
+        else:
+            self._local_tokens = min(self.token_capacity, self._local_tokens + delta)
+
+
+class FairQueue:
+    """Per-worker concurrency slots handed out round-robin across session lanes"""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.lanes: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def _publish(self) -> None:
+        LLM_QUEUE_ACTIVE.set(self.active)
+        LLM_QUEUE_WAITING.set(self.waiting)
+
+    async def acquire(self, lane: str, timeout: float, retry_after: float) -> None:
+        try:
+            await self._acquire(lane, timeout, retry_after)
+        finally:
+            self._publish()
+
+    async def _acquire(self, lane: str, timeout: float, retry_after: float) -> None:
+        if self.active < self.max_concurrency and self.waiting == 0:
+            self.active += 1
+            return
+        if self.waiting >= self.max_queue:
+            raise RateLimitExceeded(retry_after, detail="LLM queue is full, please retry later")
+
+        future = asyncio.get_running_loop().create_future()
+        self.lanes.setdefault(lane, deque()).append(future)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._forget(lane, future)
+            raise RateLimitExceeded(retry_after, detail="Timed out waiting for LLM capacity")
+        except asyncio.CancelledError:
+            if not self._forget(lane, future):
+                # The slot was handed over just as the caller went away
+                self._release()
+            raise
+
+    def _forget(self, lane: str, future: asyncio.Future) -> bool:
+        """Drop a waiter that gave up; False if it had already been granted a slot"""
+        waiters = self.lanes.get(lane)
+        if waiters is None or future not in waiters:
+            return False
+        waiters.remove(future)
+        if not waiters:
+            del self.lanes[lane]
+        self.waiting -= 1
+        return True
+
+    def release(self) -> None:
+        self._release()
+        self._publish()
+
+    def _release(self) -> None:
+        while self.lanes:
+            lane, waiters = self.lanes.popitem(last=False)
+            future = waiters.popleft()
+            if waiters:
+                # Move the lane to the back so other sessions get the next slots
+                self.lanes[lane] = waiters
+            self.waiting -= 1
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class LLMLimiter:
+    """Admission control wrapped around every provider call"""
+
+    def __init__(self):
+        self.bucket = TokenBucket(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        self.queue = FairQueue(settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE)
+        self.timeout = settings.LLM_QUEUE_TIMEOUT_SECONDS
+        self.avg_call_seconds = 5.0
+        self.rejected = 0
+
+    def _queue_retry_after(self) -> float:
+        return self.avg_call_seconds * (self.queue.waiting + 1) / max(1, self.queue.max_concurrency)
+
+    @staticmethod
+    def estimate_tokens(messages: list, max_tokens: int) -> int:
+        """Rough prompt size (~4 chars per token) plus the completion budget"""
+        return sum(len(m.get("content") or "") for m in messages) // 4 + max_tokens
+
+    @asynccontextmanager
+    async def admit(self, session_id: Optional[str], estimated_tokens: int):
+        """Hold a concurrency slot and rate-limit budget for one LLM call.
+
+        The yielded dict accepts `actual_tokens` so the token bucket can be reconciled.
+        A call that raises without reporting usage gets its whole estimate back.
+        """
+        try:
+            await self.queue.acquire(session_id or ANONYMOUS_LANE, self.timeout, self._queue_retry_after())
+        except RateLimitExceeded:
+            self.rejected += 1
+            LLM_REJECTED.labels(reason="queue").inc()
+            raise
+
+        started = time.monotonic()
+        usage = {"actual_tokens": None}
+        try:
+            while True:
+                wait = self.bucket.try_acquire(estimated_tokens)
+                if wait == 0:
+                    break
+                if time.monotonic() - started + wait > self.timeout:
+                    self.rejected += 1
+                    LLM_REJECTED.labels(reason="rate_limit").inc()
+                    raise RateLimitExceeded(wait, detail="LLM rate limit reached, please retry later")
+                await asyncio.sleep(wait)
+
+            call_started = time.monotonic()
+            completed = False
+            try:
+                yield usage
+                completed = True
+            finally:
+                # Failed calls hold the slot too, so they count towards the queue's retry estimate
+                self.avg_call_seconds = 0.8 * self.avg_call_seconds + 0.2 * (time.monotonic() - call_started)
+                if usage["actual_tokens"] is not None:
+                    self.bucket.adjust_tokens(estimated_tokens - usage["actual_tokens"])
+                elif not completed:
+                    self.bucket.adjust_tokens(estimated_tokens)
+        finally:
+            self.queue.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self.queue.active,
+            "waiting": self.queue.waiting,
+            "max_concurrency": self.queue.max_concurrency,
+            "max_queue": self.queue.max_queue,
+            "rejected": self.rejected,
+            "avg_call_seconds": round(self.avg_call_seconds, 3),
+        }
+
+
+# Global limiter instance
+llm_limiter = LLMLimiter()
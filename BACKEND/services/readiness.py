@@ -0,0 +1,129 @@
+"""
+Readiness probes: dependency health and local saturation, for load-balancer shedding
+"""
+
+import asyncio
+import logging
+import shutil
+import time
+from typing import Dict, Optional
+from config import settings
+from redis_client import redis_clients
+from services.ai_service import ai_service
+from services.pdf_compiler import pdf_compiler
+from services.rate_limiter import llm_limiter
+
+
+class ReadinessProbe:
+    """Refreshes dependency probes in the background; /ready reads the cached results.
+
+    Remote checks (Redis ping, LLM provider reachability, pdflatex on PATH) run on an
+    interval so a burst of /ready calls never fans out to dependencies. Saturation of the
+    LLM admission queue and compile pool is local state and is read live.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("Readiness")
+        self.checks: Dict[str, dict] = {}
+        self.refreshed_at: Optional[float] = None
+        self._llm_checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _probe_redis(self) -> dict:
+        started = time.perf_counter()
+        up = redis_clients.check()
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        if not up:
+            return {"ok": not settings.READY_REQUIRE_REDIS, "storage": "memory", "error": redis_clients.last_error}
+        return {"ok": latency_ms <= settings.READY_REDIS_MAX_LATENCY_MS, "storage": "redis", "latency_ms": latency_ms}
+
+    async def _probe_llm(self) -> dict:
+        """A provider counts as reachable if it answers GET /models at all (any HTTP status)"""
+        import openai
+        providers = {}
+        for name, (client, _) in ai_service.router.providers.items():
+            started = time.perf_counter()
+            try:
+                await client.with_options(timeout=settings.READY_LLM_TIMEOUT_SECONDS, max_retries=0).models.list()
+                reachable, error = True, None
+            except openai.APIStatusError as e:
+                reachable, error = True, f"HTTP {e.status_code}"
+            except Exception as e:
+                reachable, error = False, type(e).__name__
+            providers[name] = {
+                "reachable": reachable,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                **({"error": error} if error else {}),
+            }
+        return {"ok": any(p["reachable"] for p in providers.values()), "providers": providers}
+
+    def _probe_compiler(self) -> dict:
+        path = shutil.which("pdflatex")
+        return {"ok": path is not None or not settings.READY_REQUIRE_PDFLATEX, "pdflatex": path}
+
+    async def refresh(self, include_llm: bool = True) -> None:
+        """Run the remote probes once (blocking ones off the event loop)"""
+        checks = dict(self.checks)
+        checks["redis"] = await asyncio.to_thread(self._probe_redis)
+        checks["compiler"] = self._probe_compiler()
+        if include_llm:
+            checks["llm"] = await self._probe_llm()
+            self._llm_checked_at = time.monotonic()
+        self.checks = checks
+        self.refreshed_at = time.time()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                due = time.monotonic() - self._llm_checked_at >= settings.READY_LLM_PROBE_INTERVAL_SECONDS
+                await self.refresh(include_llm=due)
+            except Exception as e:
+                self.logger.warning("Readiness refresh failed", extra={"error": str(e)})
+            await asyncio.sleep(settings.READY_PROBE_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _saturation(self) -> Dict[str, dict]:
+        limiter = llm_limiter.snapshot()
+        llm_queue_limit = max(1, int(limiter["max_queue"] * settings.READY_LLM_QUEUE_SATURATION))
+        compiler = pdf_compiler.snapshot()
+        compile_queue_limit = max(1, compiler["max_concurrency"] * settings.READY_COMPILE_QUEUE_PER_SLOT)
+        return {
+            "llm_queue": {
+                "ok": limiter["waiting"] < llm_queue_limit,
+                "active": limiter["active"],
+                "waiting": limiter["waiting"],
+                "limit": llm_queue_limit,
+            },
+            "compile_queue": {
+                "ok": compiler["waiting"] < compile_queue_limit,
+                "active": compiler["active"],
+                "waiting": compiler["waiting"],
+                "limit": compile_queue_limit,
+            },
+        }
+
+    def status(self) -> dict:
+        """Cached dependency checks plus live saturation; ready only if every check is ok"""
+        checks = {**self.checks, **self._saturation()}
+        ready = self.refreshed_at is not None and all(check["ok"] for check in checks.values())
+        return {
+            "status": "ready" if ready else "degraded",
+            "checked_at": self.refreshed_at,
+            "checks": checks,
+        }
+
+
+# Global readiness probe instance
+readiness = ReadinessProbe()
@@ -0,0 +1,175 @@
+"""
+Local TF-IDF relevance scoring of resume items against job-post requirements
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Union
+from config import settings
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Keeps tech tokens like c++, c#, node.js and ci/cd together
+WORD = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+LATEX_COMMAND = re.compile(r"\\[a-zA-Z]+\*?|\\.|[{}$&~^_%]")
+BULLET = re.compile(r"^\s*(?:[-*•·]|\d+[.)])\s*")
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could did do does
+doing during each either etc for from had has have having he her here his how i if in into is it its
+just may me more most must my no not of on one or other our out over own per plus preferred
+required requirements responsibilities role same she should so some such than that the their them then
+there these they this those through to under until up us using very via was we well were what when
+where which while who will with within would you your years year experience work working team ability
+strong skills knowledge including include includes familiarity familiar
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased unigrams plus adjacent-word bigrams (so "machine learning" is one feature)"""
+    words = [w for w in WORD.findall(text.lower()) if w not in STOPWORDS and re.search("[a-z]", w)]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def strip_latex(text: str) -> str:
+    return re.sub(r"\s+", " ", LATEX_COMMAND.sub(" ", text)).strip()
+
+
+def resume_units(parsed_resume: list, resume_text: str) -> List[dict]:
+    """Scorable resume pieces: each parsed item/subheading, or non-empty lines for non-LaTeX resumes"""
+    units = []
+    for section in parsed_resume:
+        for sub in section["subheadings"]:
+            if sub["type"] == "item":
+                text = sub["content"]
+            else:
+                text = " ".join(sub[k] for k in ("title", "role", "location"))
+            units.append({"section": section["section"], "text": strip_latex(text)})
+    if not units:
+        section = "Resume"
+        for line in resume_text.splitlines():
+            line = strip_latex(line)
+            if line:
+                units.append({"section": section, "text": line})
+    return [u for u in units if u["text"]]
+
+
+def job_requirements(job_post: str) -> List[str]:
+    """Bullets and sentences of the job post that carry at least two content words"""
+    requirements = []
+    for line in job_post.splitlines():
+        line = BULLET.sub("", line).strip()
+        for sentence in re.split(r"(?<=[.;!?])\s+", line):
+            sentence = sentence.strip()
+            if len([t for t in tokenize(sentence) if " " not in t]) >= 2:
+                requirements.append(sentence)
+    return requirements[:settings.RELEVANCE_MAX_REQUIREMENTS]
+
+
+class JobProfile:
+    """A job post's requirements and their tokens; built once and reused for every resume scored against it"""
+
+    def __init__(self, job_post: str):
+        self.job_post = job_post
+        self.requirements = job_requirements(job_post)
+        self.docs = [tokenize(r) for r in self.requirements]
+
+
+def tfidf_matrix(docs: List[List[str]]):
+    """Rows are L2-normalised TF-IDF vectors (smoothed idf, sublinear tf); also returns the vocabulary"""
+    vocabulary: Dict[str, int] = {}
+    for doc in docs:
+        for term in doc:
+            vocabulary.setdefault(term, len(vocabulary))
+    matrix = np.zeros((len(docs), max(1, len(vocabulary))), dtype=np.float32)
+    for row, doc in enumerate(docs):
+        for term, count in Counter(doc).items():
+            matrix[row, vocabulary[term]] = 1.0 + math.log(count)
+    df = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(docs)) / (1 + df)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    return matrix, vocabulary
+
+
+class RelevanceScorer:
+    """Cosine similarity between every job requirement and every resume unit, in one matrix product"""
+
+    def __init__(self, coverage_threshold: float, max_keywords: int):
+        self.coverage_threshold = coverage_threshold
+        self.max_keywords = max_keywords
+
+    def _scores(self, units: List[dict], job: JobProfile):
+        docs = job.docs + [tokenize(u["text"]) for u in units]
+        matrix, vocabulary = tfidf_matrix(docs)
+        req_vectors, unit_vectors = matrix[:len(job.docs)], matrix[len(job.docs):]
+        return req_vectors @ unit_vectors.T, req_vectors, vocabulary, docs
+
+    def report(self, parsed_resume: list, resume_text: str, job_post: Union[str, JobProfile]) -> dict:
+        """Coverage of each requirement, per-section relevance and job keywords missing from the resume"""
+        if not HAS_NUMPY:
+            return {"available": False, "detail": "numpy is not installed"}
+        job = job_post if isinstance(job_post, JobProfile) else JobProfile(job_post)
+        units = resume_units(parsed_resume, resume_text)
+        requirements = job.requirements
+        if not units or not requirements:
+            return {"available": True, "coverage": 0.0, "requirements": [], "sections": [], "missing_keywords": []}
+
+        similarity, req_vectors, vocabulary, docs = self._scores(units, job)
+        best = similarity.argmax(axis=1)
+        best_scores = similarity[np.arange(len(requirements)), best]
+        covered = best_scores >= self.coverage_threshold
+
+        # A section is as relevant as its best unit, averaged over requirements
+        sections: Dict[str, List[int]] = {}
+        for index, unit in enumerate(units):
+            sections.setdefault(unit["section"], []).append(index)
+        section_scores = [
+            {"section": name, "score": round(float(similarity[:, idx].max(axis=1).mean()), 4)}
+            for name, idx in sections.items()
+        ]
+        section_scores.sort(key=lambda s: s["score"], reverse=True)
+
+        # Single job words weighted by summed TF-IDF that never occur in the resume
+        resume_terms = set().union(*docs[len(requirements):])
+        weights = req_vectors.sum(axis=0)
+        terms = sorted((t for t in vocabulary if " " not in t), key=lambda t: weights[vocabulary[t]], reverse=True)
+        missing = [t for t in terms if t not in resume_terms and weights[vocabulary[t]] > 0][:self.max_keywords]
+
+        return {
+            "available": True,
+            "coverage": round(float(covered.mean()), 4),
+            "requirements": [
+                {
+                    "text": requirement,
+                    "score": round(float(best_scores[i]), 4),
+                    "covered": bool(covered[i]),
+                    "best_match": {"section": units[best[i]]["section"], "text": units[best[i]]["text"]} if best_scores[i] > 0 else None,
+                }
+                for i, requirement in enumerate(requirements)
+            ],
+            "sections": section_scores,
+            "missing_keywords": missing,
+        }
+
+    def prefilter_sections(self, parsed_resume: list, job_post: Union[str, JobProfile], max_sections: Optional[int] = None) -> list:
+        """The `max_sections` most job-relevant sections, in resume order (unchanged without numpy)"""
+        max_sections = max_sections or settings.RELEVANCE_MAX_SECTIONS
+        if not HAS_NUMPY or len(parsed_resume) <= max_sections:
+            return parsed_resume
+        report = self.report(parsed_resume, "", job_post)
+        if not report.get("sections"):
+            return parsed_resume
+        keep = {s["section"] for s in report["sections"][:max_sections]}
+        # Sections without scorable items (e.g. a header block) have no score; keep them too
+        scored = {s["section"] for s in report["sections"]}
+        return [s for s in parsed_resume if s["section"] in keep or s["section"] not in scored]
+
+
+# Global relevance scorer instance
+relevance_scorer = RelevanceScorer(settings.RELEVANCE_COVERAGE_THRESHOLD, settings.RELEVANCE_MAX_KEYWORDS)
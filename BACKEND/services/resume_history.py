@@ -0,0 +1,54 @@
+"""
+Line deltas for resume version history (delta chains with periodic full snapshots)
+"""
+
+import difflib
+from typing import List, Optional
+
+
+def make_delta(old: str, new: str) -> List[list]:
+    """Changed line ranges of `old` as [start, end, replacement_lines]; equal runs are not stored"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [i1, i2, new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_delta(old: str, delta: List[list]) -> str:
+    lines = old.splitlines(keepends=True)
+    # Back to front, so earlier ranges keep their line numbers
+    for start, end, replacement in reversed(delta):
+        lines[start:end] = replacement
+    return "".join(lines)
+
+
+def delta_size(delta: List[list]) -> int:
+    return sum(len(line) for _, _, replacement in delta for line in replacement) + 16 * len(delta)
+
+
+def new_record(version: int, text: str, parent_text: Optional[str], source: str, created_at: str,
+               snapshot_interval: int) -> dict:
+    """Version record: a full snapshot every `snapshot_interval` versions (or when a delta would not be smaller)"""
+    record = {"version": version, "source": source, "created_at": created_at, "chars": len(text)}
+    if parent_text is not None and (version - 1) % snapshot_interval:
+        delta = make_delta(parent_text, text)
+        if delta_size(delta) < len(text) // 2:
+            record["delta"] = delta
+            return record
+    record["snapshot"] = text
+    return record
+
+
+def materialize(records: dict, version: int) -> str:
+    """Text of `version`: the nearest snapshot at or before it, then each delta forward"""
+    base = version
+    while "snapshot" not in records[base]:
+        base -= 1
+    text = records[base]["snapshot"]
+    for v in range(base + 1, version + 1):
+        text = apply_delta(text, records[v]["delta"])
+    return text
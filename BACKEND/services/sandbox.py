@@ -0,0 +1,150 @@
+"""
+Resource-limited subprocess execution for untrusted compile jobs
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Per-process rlimits (prlimit, Linux) and per-child rusage; elsewhere jobs run with a timeout only
+SANDBOX_SUPPORTED = resource is not None and hasattr(resource, "prlimit") and hasattr(os, "wait4")
+
+# The child shell blocks on stdin until the parent has set its limits, then execs the job
+# (rlimits survive exec). This replaces preexec_fn, which can deadlock in a threaded parent.
+GATE = ["/bin/sh", "-c", 'read _ && exec "$@"', "sandbox"]
+
+# Resident set size is reported in KiB on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class SandboxLimits:
+    """Per-job resource ceilings; 0 disables a limit"""
+
+    def __init__(self, cpu_seconds: int = 0, memory_bytes: int = 0, file_size_bytes: int = 0):
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.file_size_bytes = file_size_bytes
+
+    def apply(self, pid: int) -> None:
+        """Set the limits on a running (gated, not yet exec'd) child from the parent"""
+        resource.prlimit(pid, resource.RLIMIT_CORE, (0, 0))
+        if self.cpu_seconds:
+            # Soft limit sends SIGXCPU; the hard limit one second later is SIGKILL
+            resource.prlimit(pid, resource.RLIMIT_CPU, (self.cpu_seconds, self.cpu_seconds + 1))
+        if self.memory_bytes:
+            resource.prlimit(pid, resource.RLIMIT_AS, (self.memory_bytes, self.memory_bytes))
+        if self.file_size_bytes:
+            resource.prlimit(pid, resource.RLIMIT_FSIZE, (self.file_size_bytes, self.file_size_bytes))
+
+
+class SandboxResult:
+    """Exit status and resource usage of one job"""
+
+    def __init__(self, returncode: int, timed_out: bool, wall_seconds: float,
+                 cpu_seconds: Optional[float] = None, max_rss_bytes: Optional[int] = None):
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.max_rss_bytes = max_rss_bytes
+
+    @property
+    def limit_hit(self) -> Optional[str]:
+        """Which limit ended the job, if any"""
+        if self.timed_out:
+            return "timeout"
+        if not SANDBOX_SUPPORTED:
+            return None
+        if self.returncode == -signal.SIGXCPU:
+            return "cpu"
+        if self.returncode == -signal.SIGXFSZ:
+            return "file_size"
+        if self.returncode == -signal.SIGKILL:
+            # The RLIMIT_CPU hard limit (or the kernel OOM killer)
+            return "killed"
+        return None
+
+    def as_dict(self) -> dict:
+        return {
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "limit_hit": self.limit_hit,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3) if self.cpu_seconds is not None else None,
+            "max_rss_bytes": self.max_rss_bytes,
+        }
+
+
+def run_sandboxed(cmd: List[str], cwd: str, timeout: float, limits: SandboxLimits, env: Optional[dict] = None,
+                  output_path: Optional[str] = None) -> SandboxResult:
+    """Run cmd in its own process group under `limits`; the whole group is killed at `timeout`.
+
+    stdout and stderr are discarded, or written to `output_path` when given.
+    """
+    # Same contract as a direct spawn: a missing program is FileNotFoundError, not exit code 127
+    if shutil.which(cmd[0], path=(env or os.environ).get("PATH")) is None:
+        raise FileNotFoundError(cmd[0])
+    if output_path is None:
+        return _run(cmd, cwd, timeout, limits, env, subprocess.DEVNULL)
+    with open(output_path, "wb") as output:
+        return _run(cmd, cwd, timeout, limits, env, output)
+
+
+def _run(cmd: List[str], cwd: str, timeout: float, limits: SandboxLimits, env: Optional[dict], output) -> SandboxResult:
+    started = time.perf_counter()
+    if not SANDBOX_SUPPORTED:
+        try:
+            completed = subprocess.run(cmd, cwd=cwd, env=env, stdin=subprocess.DEVNULL, stdout=output,
+                                       stderr=subprocess.STDOUT, timeout=timeout)
+            return SandboxResult(completed.returncode, False, time.perf_counter() - started)
+        except subprocess.TimeoutExpired:
+            return SandboxResult(-1, True, time.perf_counter() - started)
+
+    proc = subprocess.Popen(
+        GATE + list(cmd), cwd=cwd, env=env,
+        stdin=subprocess.PIPE, stdout=output, stderr=subprocess.STDOUT,
+        start_new_session=True
+    )
+    try:
+        limits.apply(proc.pid)
+        # Release the gate; the job then sees EOF on stdin, like DEVNULL
+        proc.stdin.write(b"\n")
+        proc.stdin.close()
+    except BaseException:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+        raise
+    timed_out = threading.Event()
+
+    def kill_group():
+        timed_out.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(timeout, kill_group)
+    timer.start()
+    try:
+        # wait4 reaps this child and returns its own rusage, unlike getrusage(RUSAGE_CHILDREN)
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return SandboxResult(
+        proc.returncode,
+        timed_out.is_set(),
+        time.perf_counter() - started,
+        cpu_seconds=usage.ru_utime + usage.ru_stime,
+        max_rss_bytes=usage.ru_maxrss * RSS_UNIT,
+    )
@@ -0,0 +1,184 @@
+"""
+Similarity-keyed cache: MinHash signatures with an LSH index for near-duplicate inputs
+"""
+
+import re
+import struct
+import time
+import hashlib
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from config import settings
+from metrics import SEMANTIC_CACHE_ENTRIES, SEMANTIC_CACHE_EVICTIONS, SEMANTIC_CACHE_LOOKUPS
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Mersenne prime modulus for the (a * x + b) mod p permutations; products stay below 2**62
+PRIME = (1 << 31) - 1
+WORD = re.compile(r"\w+")
+LATEX_COMMENT = re.compile(r"(?<!\\)%[^\n]*")
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """31-bit hashes of overlapping word n-grams of the normalized text (case, spacing and comments ignored)"""
+    words = WORD.findall(LATEX_COMMENT.sub(" ", text).lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {
+        struct.unpack("<I", hashlib.blake2b(" ".join(words[i:i + size]).encode("utf-8"), digest_size=4).digest())[0] % PRIME
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """`num_perm` universal-hash permutations; signature[i] is the minimum hash under permutation i"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        # Deterministic coefficients, so signatures are comparable across restarts and workers
+        coefficients = [
+            int.from_bytes(hashlib.blake2b(f"minhash-{seed}-{i}".encode(), digest_size=4).digest(), "little") % (PRIME - 1) + 1
+            for i in range(2 * num_perm)
+        ]
+        self.num_perm = num_perm
+        self.a = coefficients[:num_perm]
+        self.b = coefficients[num_perm:2 * num_perm]
+        if HAS_NUMPY:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: Set[int]) -> Tuple[int, ...]:
+        if HAS_NUMPY:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))[None, :]
+            return tuple(int(v) for v in ((self._a * values + self._b) % PRIME).min(axis=1))
+        return tuple(min((a * h + b) % PRIME for h in hashes) for a, b in zip(self.a, self.b))
+
+
+def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+class CacheEntry:
+    def __init__(self, resume_sig: Tuple[int, ...], job_sig: Tuple[int, ...], value: Any):
+        self.resume_sig = resume_sig
+        self.job_sig = job_sig
+        self.value = value
+        self.created = time.monotonic()
+
+
+class SemanticCache:
+    """In-memory LRU of results keyed by (resume, job post) similarity.
+
+    The resume signature is split into `bands` LSH bands; entries sharing any band
+    with the query are candidates, and a candidate is a hit only if both the
+    resume and the job post are at least `threshold` similar.
+    """
+
+    def __init__(self, threshold: float, num_perm: int, bands: int, max_entries: int, ttl: float, shingle_size: int):
+        if num_perm % bands:
+            raise ValueError("SEMANTIC_CACHE_NUM_PERM must be a multiple of SEMANTIC_CACHE_BANDS")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = {}
+        self._ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+
+    def signatures(self, resume_text: str, job_post: str) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        return (
+            self.hasher.signature(shingles(resume_text, self.shingle_size)),
+            self.hasher.signature(shingles(job_post, self.shingle_size)),
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _remove(self, entry_id: int, reason: str) -> None:
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.resume_sig):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        SEMANTIC_CACHE_EVICTIONS.labels(reason=reason).inc()
+        SEMANTIC_CACHE_ENTRIES.set(len(self._entries))
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        # Least recently used first; an expired entry behind a fresher one is caught on lookup
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if entry.created >= cutoff:
+                break
+            self._remove(entry_id, "ttl")
+
+    def get(self, resume_text: str, job_post: str, signatures=None) -> Optional[Any]:
+        """Cached value for a near-identical (resume, job post), or None"""
+        self._expire()
+        resume_sig, job_sig = signatures or self.signatures(resume_text, job_post)
+        candidates: Set[int] = set()
+        for key in self._band_keys(resume_sig):
+            candidates |= self._buckets.get(key, set())
+        best_id, best_score = None, 0.0
+        cutoff = time.monotonic() - self.ttl
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.created < cutoff:
+                self._remove(entry_id, "ttl")
+                continue
+            score = min(similarity(resume_sig, entry.resume_sig), similarity(job_sig, entry.job_sig))
+            if score >= self.threshold and score > best_score:
+                best_id, best_score = entry_id, score
+        if best_id is None:
+            self.misses += 1
+            SEMANTIC_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        self.hits += 1
+        SEMANTIC_CACHE_LOOKUPS.labels(result="hit").inc()
+        # Re-inserting would reset the TTL; only bump the entry's LRU position
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id].value
+
+    def put(self, resume_text: str, job_post: str, value: Any, signatures=None) -> None:
+        resume_sig, job_sig = signatures or self.signatures(resume_text, job_post)
+        entry_id = next(self._ids)
+        self._entries[entry_id] = CacheEntry(resume_sig, job_sig, value)
+        for key in self._band_keys(resume_sig):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)), "capacity")
+        SEMANTIC_CACHE_ENTRIES.set(len(self._entries))
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Global semantic cache instance (per worker process)
+semantic_cache = SemanticCache(
+    settings.SEMANTIC_CACHE_THRESHOLD,
+    settings.SEMANTIC_CACHE_NUM_PERM,
+    settings.SEMANTIC_CACHE_BANDS,
+    settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    settings.SEMANTIC_CACHE_TTL_SECONDS,
+    settings.SEMANTIC_CACHE_SHINGLE_SIZE
+)
@@ -0,0 +1,125 @@
+"""
+Single-flight request coalescing: concurrent identical work runs once
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+from redis_client import get_redis
+
+# Deletes the lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def flight_key(operation: str, *parts: Any) -> str:
+    """Stable key for an operation and its inputs"""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{operation}:{digest}"
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one execution.
+
+    Within a worker, duplicates await the leader's future. Across workers, a Redis
+    lock elects one leader and followers pick its result up from a short-lived key.
+    """
+
+    def __init__(self, lock_ttl: float = 120.0, result_ttl: float = 10.0, poll_interval: float = 0.05):
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._release_script = None
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], str] = json.dumps,
+        decode: Callable[[str], Any] = json.loads
+    ) -> Any:
+        """Run fn once per key; concurrent callers with the same key share its result or error.
+
+        The work runs in its own task and every caller (the first one included) awaits
+        it through shield, so a caller that is cancelled (e.g. its client disconnected)
+        never cancels the work for the others.
+        """
+        while True:
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                task = asyncio.ensure_future(self._run_cluster(key, fn, encode, decode))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done: self._finished(key, done))
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # Only our own cancellation propagates; if the shared work itself was cancelled, run it again
+                if not task.cancelled():
+                    raise
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody was left waiting on it
+            task.exception()
+
+    def _release(self, r, lock_key: str, token: str) -> None:
+        if self._release_script is None:
+            self._release_script = r.register_script(RELEASE_LOCK_SCRIPT)
+        self._release_script(keys=[lock_key], args=[token])
+
+    @staticmethod
+    def _poll(r, lock_key: str, result_key: str):
+        """(lock still held, cached result) in one round trip"""
+        pipe = r.pipeline(transaction=False)
+        pipe.exists(lock_key)
+        pipe.get(result_key)
+        held, cached = pipe.execute()
+        return bool(held), cached
+
+    async def _run_cluster(self, key: str, fn, encode, decode) -> Any:
+        r = get_redis()
+        if r is None:
+            return await fn()
+
+        # The Redis client is synchronous: every call goes through a thread so the loop never blocks
+        lock_key = f"singleflight:{key}:lock"
+        result_key = f"singleflight:{key}:result"
+        token = str(uuid.uuid4())
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            if await asyncio.to_thread(r.set, lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                try:
+                    result = await fn()
+                    await asyncio.to_thread(r.set, result_key, encode(result), px=int(self.result_ttl * 1000))
+                    return result
+                finally:
+                    await asyncio.to_thread(self._release, r, lock_key, token)
+
+            # Another worker is leading: wait for its result, or take over if it gave up
+            while True:
+                held, cached = await asyncio.to_thread(self._poll, r, lock_key, result_key)
+                if cached is not None:
+                    self.coalesced += 1
+                    return decode(cached)
+                if not held:
+                    break
+                if time.monotonic() > deadline:
+                    return await fn()
+                await asyncio.sleep(self.poll_interval)
+
+
+# Global single-flight group for expensive LLM and compile work
+single_flight = SingleFlight()
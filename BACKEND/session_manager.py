@@ -3,27 +3,50 @@ Session management for the resume assistant
 """
 
 import uuid
-import json
 from datetime import datetime
 from typing import List, Optional
 from fastapi import HTTPException
+from models import Suggestion
+import codec
+from compression import session_compressor
+from redis_client import get_redis
+from blob_store import blob_store, content_hash
+from config import settings
+from services.resume_history import materialize, new_record
+from metrics import STORE_OP_SECONDS, timed
+from tracing import traced
 
-# Try to use Redis, fallback to in-memory storage
-try:
-    import redis
-    r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    # Test Redis connection
-    r.ping()
-    USE_REDIS = True
-    print("✅ Redis connection successful - using Redis for session storage")
-except (ImportError, redis.ConnectionError, Exception) as e:
-    print(f"⚠️ Redis not available ({e}) - falling back to in-memory storage")
-    USE_REDIS = False
-    sessions = {}
+SESSION_TTL_SECONDS = 3600
+
+# Large text fields kept in the shared blob store; sessions only hold their hashes
+BLOB_FIELDS = (("resume_text", "resume_hash"), ("job_post", "job_post_hash"))
+
+# In-memory fallback storage (session bodies as stored, i.e. without blob texts)
+sessions = {}
+
+# In-memory suggestion records: session_id -> {suggestion_id: (position, data)}
+suggestion_store = {}
+
+# In-memory resume history: session_id -> {version: record, VERSION_COUNTER: last allocated}
+version_store = {}
+
+# History hash field holding the last allocated version number
+VERSION_COUNTER = "head"
+
+def store_op(op: str):
+    """Time (metrics) and trace a SessionManager storage operation.
+
+    Only public entry points are decorated. They call the undecorated private helpers
+    (_get_session, _set_session, _version_text), so each logical operation is recorded once.
+    """
+    def decorator(fn):
+        return traced(f"session_store.{op}")(timed(STORE_OP_SECONDS, op=op)(fn))
+    return decorator
 
 class SessionManager:
     """Manages session storage and operations using Redis with fallback to in-memory"""
     
+    @store_op("create_session")
     def create_session(self, resume_text: str, job_post: str, questions: List[str]) -> str:
         session_id = str(uuid.uuid4())
         session_data = {
@@ -32,37 +55,45 @@ class SessionManager:
             "questions": questions,
             "answers": [],
             "current_question_index": 0,
-            "created_at": datetime.now().isoformat()
+            "created_at": datetime.now().isoformat(),
+            "resume_version": 1,
+            "first_version": 1
         }
         
-        if USE_REDIS:
-            r.set(session_id, json.dumps(session_data))
-            r.expire(session_id, 3600)  # 1 hour expiration
-        else:
-            sessions[session_id] = session_data
-            
+        self._save_versions(session_id, {1: new_record(1, resume_text, None, "start", session_data["created_at"], settings.RESUME_SNAPSHOT_INTERVAL)})
+        self._set_session(session_id, session_data)
         return session_id
     
+    def _load_stored(self, session_id: str) -> Optional[dict]:
+        """Session body as stored, with blob hashes instead of texts"""
+        r = get_redis(binary=True)
+        if r is not None:
+            stored = r.get(session_id)
+            return codec.loads(session_compressor.decode(stored)) if stored else None
+        stored = sessions.get(session_id)
+        return dict(stored) if stored is not None else None
+
+    @store_op("get_session")
     def get_session(self, session_id: str) -> dict:
-        if USE_REDIS:
-            session_json = r.get(session_id)
-            if not session_json:
-                raise HTTPException(status_code=404, detail="Session not found")
-            return json.loads(session_json)
-        else:
-            if session_id not in sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-            return sessions[session_id]
+        return self._get_session(session_id)
+
+    def _get_session(self, session_id: str) -> dict:
+        session = self._load_stored(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        for text_field, hash_field in BLOB_FIELDS:
+            if hash_field in session:
+                text = blob_store.get(session[hash_field])
+                if text is None:
+                    raise HTTPException(status_code=404, detail="Session data expired")
+                session[text_field] = text
+        return session
     
+    @store_op("add_answer")
     def add_answer(self, session_id: str, answer: str) -> dict:
-        session = self.get_session(session_id)
+        session = self._get_session(session_id)
         session["answers"].append(answer)
-        
-        if USE_REDIS:
-            r.set(session_id, json.dumps(session))
-        else:
-            sessions[session_id] = session
-            
+        self._set_session(session_id, session)
         return session
     
     def is_complete(self, session: dict) -> bool:
@@ -81,38 +112,239 @@ class SessionManager:
             "answers": session["answers"],
             "current_question": self.get_next_question(session),
             "progress": f"{len(session['answers'])}/{len(session['questions'])}",
-            "created_at": session["created_at"]
+            "created_at": session["created_at"],
+            "resume_version": session.get("resume_version")
         }
     
+    @store_op("delete_session")
     def delete_session(self, session_id: str) -> None:
-        if USE_REDIS:
-            if not r.delete(session_id):
-                raise HTTPException(status_code=404, detail="Session not found")
-        else:
-            if session_id not in sessions:
-                raise HTTPException(status_code=404, detail="Session not found")
-            del sessions[session_id]
+        stored = self._load_stored(session_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        self._remove(session_id, stored)
 
+    @store_op("cleanup_session")
     def cleanup_session(self, session_id: str) -> None:
-        if USE_REDIS:
-            r.delete(session_id)
+        stored = self._load_stored(session_id)
+        if stored is not None:
+            self._remove(session_id, stored)
+
+    def _remove(self, session_id: str, stored: dict) -> None:
+        r = get_redis()
+        if r is not None:
+            r.delete(session_id, self._suggestions_key(session_id), self._versions_key(session_id))
         else:
-            if session_id in sessions:
-                del sessions[session_id]
+            sessions.pop(session_id, None)
+            suggestion_store.pop(session_id, None)
+            version_store.pop(session_id, None)
+        for _, hash_field in BLOB_FIELDS:
+            if hash_field in stored:
+                blob_store.release(stored[hash_field])
 
     def _set_session(self, session_id: str, session_data: dict) -> None:
-        if USE_REDIS:
-            r.set(session_id, json.dumps(session_data))
-            r.expire(session_id, 3600)
+        # Texts go to the blob store; the stored body references them by hash.
+        # The hashes are written back into session_data so later saves can tell what changed.
+        stored = dict(session_data)
+        for text_field, hash_field in BLOB_FIELDS:
+            text = stored.pop(text_field, None)
+            if text is None:
+                continue
+            previous = session_data.get(hash_field)
+            blob_hash = content_hash(text)
+            if blob_hash == previous:
+                blob_store.refresh(blob_hash, SESSION_TTL_SECONDS)
+            else:
+                blob_store.acquire(text, SESSION_TTL_SECONDS, blob_hash)
+                if previous:
+                    blob_store.release(previous)
+            stored[hash_field] = session_data[hash_field] = blob_hash
+
+        r = get_redis(binary=True)
+        if r is not None:
+            pipe = r.pipeline()
+            pipe.set(session_id, session_compressor.encode(codec.dumps(stored)), ex=SESSION_TTL_SECONDS)
+            pipe.expire(self._suggestions_key(session_id), SESSION_TTL_SECONDS)
+            pipe.expire(self._versions_key(session_id), SESSION_TTL_SECONDS)
+            pipe.execute()
         else:
-            sessions[session_id] = session_data
+            sessions[session_id] = stored
 
-    def get_suggestions(self, session_id: str):
-        session = self.get_session(session_id)
-        import json
-        from models import Suggestion
-        suggestions_json = session.get('suggestions', '[]')
-        return [Suggestion(**s) for s in json.loads(suggestions_json)]
+    # Suggestions live in their own hash (field = suggestion id) so a lookup or
+    # removal touches one record instead of decoding the whole list.
+
+    @staticmethod
+    def _suggestions_key(session_id: str) -> str:
+        return f"suggestions:{session_id}"
+
+    @staticmethod
+    def _to_suggestion(record) -> Suggestion:
+        # Records were validated when stored, so skip re-validation on read
+        return Suggestion.model_construct(**record[1])
+
+    @store_op("set_suggestions")
+    def set_suggestions(self, session_id: str, suggestions: List[Suggestion]) -> None:
+        """Replace the session's suggestions"""
+        r = get_redis()
+        if r is not None:
+            key = self._suggestions_key(session_id)
+            pipe = r.pipeline()
+            pipe.delete(key)
+            if suggestions:
+                pipe.hset(key, mapping={s.id: codec.dumps([i, s.dict()]) for i, s in enumerate(suggestions)})
+                pipe.expire(key, SESSION_TTL_SECONDS)
+            pipe.execute()
+        else:
+            suggestion_store[session_id] = {s.id: (i, s.dict()) for i, s in enumerate(suggestions)}
+
+    @store_op("get_suggestions")
+    def get_suggestions(self, session_id: str) -> List[Suggestion]:
+        """All suggestions for the session, in the order they were generated"""
+        r = get_redis()
+        if r is not None:
+            records = [codec.loads(v) for v in r.hvals(self._suggestions_key(session_id))]
+        else:
+            records = list(suggestion_store.get(session_id, {}).values())
+        return [self._to_suggestion(rec) for rec in sorted(records, key=lambda rec: rec[0])]
+
+    @store_op("get_suggestion")
+    def get_suggestion(self, session_id: str, suggestion_id: str) -> Optional[Suggestion]:
+        r = get_redis()
+        if r is not None:
+            value = r.hget(self._suggestions_key(session_id), suggestion_id)
+            return self._to_suggestion(codec.loads(value)) if value else None
+        record = suggestion_store.get(session_id, {}).get(suggestion_id)
+        return self._to_suggestion(record) if record else None
+
+    @store_op("remove_suggestion")
+    def remove_suggestion(self, session_id: str, suggestion_id: str) -> bool:
+        r = get_redis()
+        if r is not None:
+            return bool(r.hdel(self._suggestions_key(session_id), suggestion_id))
+        return suggestion_store.get(session_id, {}).pop(suggestion_id, None) is not None
+
+    @store_op("clear_suggestions")
+    def clear_suggestions(self, session_id: str) -> None:
+        r = get_redis()
+        if r is not None:
+            r.delete(self._suggestions_key(session_id))
+        else:
+            suggestion_store.pop(session_id, None)
+
+    # Resume history: one record per version in a hash (field = version number). Most
+    # records are line deltas against the previous version; every RESUME_SNAPSHOT_INTERVAL-th
+    # one (and the oldest kept) is a full snapshot, so a version is rebuilt from at most
+    # RESUME_SNAPSHOT_INTERVAL records fetched in one round trip.
+
+    @staticmethod
+    def _versions_key(session_id: str) -> str:
+        return f"versions:{session_id}"
+
+    def _allocate_version(self, session_id: str, head: Optional[int]) -> int:
+        """Next version number from a counter in the history hash, so concurrent edits never share one"""
+        r = get_redis()
+        if r is not None:
+            # MULTI/EXEC; sessions without a counter (e.g. created before it existed) seed it from their head
+            pipe = r.pipeline()
+            pipe.hsetnx(self._versions_key(session_id), VERSION_COUNTER, head or 0)
+            pipe.hincrby(self._versions_key(session_id), VERSION_COUNTER, 1)
+            return pipe.execute()[1]
+        store = version_store.setdefault(session_id, {})
+        store[VERSION_COUNTER] = store.get(VERSION_COUNTER, head or 0) + 1
+        return store[VERSION_COUNTER]
+
+    def _load_versions(self, session_id: str, numbers: List[int]) -> dict:
+        r = get_redis(binary=True)
+        if r is not None:
+            values = r.hmget(self._versions_key(session_id), [str(n) for n in numbers])
+            return {n: codec.loads(session_compressor.decode(v)) for n, v in zip(numbers, values) if v}
+        store = version_store.get(session_id, {})
+        return {n: store[n] for n in numbers if n in store}
+
+    def _save_versions(self, session_id: str, records: dict, removed: Optional[List[int]] = None) -> None:
+        r = get_redis(binary=True)
+        if r is not None:
+            key = self._versions_key(session_id)
+            pipe = r.pipeline()
+            if records:
+                pipe.hset(key, mapping={str(n): session_compressor.encode(codec.dumps(rec)) for n, rec in records.items()})
+            if removed:
+                pipe.hdel(key, *[str(n) for n in removed])
+            pipe.expire(key, SESSION_TTL_SECONDS)
+            pipe.execute()
+        else:
+            store = version_store.setdefault(session_id, {})
+            store.update(records)
+            for n in removed or []:
+                store.pop(n, None)
+
+    @store_op("get_version")
+    def get_version_text(self, session_id: str, session: dict, version: int) -> str:
+        """Resume LaTeX of one version of the session's history"""
+        return self._version_text(session_id, session, version)
+
+    def _version_text(self, session_id: str, session: dict, version: int) -> str:
+        head = session.get("resume_version")
+        if version == head:
+            return session["resume_text"]
+        first = session.get("first_version", 1)
+        if head is None or not first <= version <= head:
+            raise HTTPException(status_code=404, detail=f"Version {version} not found")
+        # Versions at snapshot boundaries are always snapshots
+        boundary = version - (version - 1) % settings.RESUME_SNAPSHOT_INTERVAL
+        records = self._load_versions(session_id, list(range(max(first, boundary), version + 1)))
+        try:
+            return materialize(records, version)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Version {version} is no longer available")
+
+    @store_op("list_versions")
+    def list_versions(self, session_id: str) -> List[dict]:
+        """Metadata of every kept version, oldest first"""
+        session = self._load_stored(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        head = session.get("resume_version")
+        if head is None:
+            return []
+        records = self._load_versions(session_id, list(range(session.get("first_version", 1), head + 1)))
+        return [
+            {
+                "version": n,
+                "source": rec["source"],
+                "created_at": rec["created_at"],
+                "chars": rec["chars"],
+                "stored_as": "snapshot" if "snapshot" in rec else "delta",
+            }
+            for n, rec in sorted(records.items())
+        ]
+
+    @store_op("update_resume")
+    def update_resume(self, session_id: str, session: dict, resume_text: str, source: str) -> int:
+        """Make resume_text the session's current resume as a new version; returns its number"""
+        head = session.get("resume_version")
+        version = self._allocate_version(session_id, head)
+        # A delta is only valid against the version right before it. Without a head (sessions
+        # created before versioning), or when a concurrent edit took head + 1, store a snapshot.
+        parent_text = session.get("resume_text") if head and version == head + 1 else None
+        records = {version: new_record(version, resume_text, parent_text, source, datetime.now().isoformat(), settings.RESUME_SNAPSHOT_INTERVAL)}
+        removed = []
+        first = session.get("first_version", 1) if head else version
+        if version - first + 1 > settings.RESUME_MAX_VERSIONS:
+            # Drop the oldest versions; the new oldest becomes a snapshot so it stays readable
+            new_first = version - settings.RESUME_MAX_VERSIONS + 1
+            oldest = self._load_versions(session_id, [new_first]).get(new_first)
+            if oldest is not None and "snapshot" not in oldest:
+                oldest["snapshot"] = self._version_text(session_id, session, new_first)
+                del oldest["delta"]
+                records[new_first] = oldest
+            removed = list(range(first, new_first))
+            first = new_first
+        self._save_versions(session_id, records, removed)
+        session["resume_text"] = resume_text
+        session["resume_version"] = version
+        session["first_version"] = first
+        self._set_session(session_id, session)
+        return version
 
 # Global session manager instance
 session_manager = SessionManager() 
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Unit tests for the service modules; run from BACKEND with `python -m pytest tests -q`.
+Nothing here needs a running Redis or LLM.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings reads these at import; the LLM clients are built lazily and never called here
+os.environ.setdefault("OPEN_ROUTER_URL", "http://127.0.0.1:8900")
+os.environ.setdefault("LLM_API_KEY", "test")
+
+from redis_client import redis_clients  # noqa: E402
+
+
+@pytest.fixture
+def fake_redis():
+    """fakeredis installed as the shared clients (Lua scripting needs the fakeredis[lua] extra)"""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    redis_clients.use(
+        fakeredis.FakeRedis(server=server, decode_responses=True),
+        fakeredis.FakeRedis(server=server),
+    )
+    yield redis_clients.r
+    redis_clients.r = redis_clients.rb = None
+    redis_clients.available = redis_clients.checked = False
+
+
+@pytest.fixture
+def no_redis():
+    """Force the in-memory fallback"""
+    redis_clients.available, redis_clients.checked = False, True
+    yield
+    redis_clients.checked = False
+
+
+@pytest.fixture(params=["fake_redis", "no_redis"])
+def store(request):
+    """Run a test against Redis (fakeredis) and against the in-memory fallback"""
+    request.getfixturevalue(request.param)
+    return request.param
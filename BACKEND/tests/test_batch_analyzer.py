@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from routers import batch_router
+from services import batch_analyzer as module
+from services.ai_service import ai_service
+from services.rate_limiter import RateLimitExceeded
+from services.relevance import HAS_NUMPY
+
+JOB = "Backend engineer.\n- Python and Redis experience\n- Kubernetes deployments on AWS\n"
+RESUME = "\\documentclass{article}\n\\begin{document}\n\\section{Experience}\n\\item Built Python services backed by Redis\n\\end{document}\n"
+
+
+@pytest.fixture
+def client(no_redis, monkeypatch):
+    calls = []
+
+    async def generate_questions(resume_text, job_post, session_id=None):
+        calls.append(resume_text)
+        if "fails" in resume_text:
+            raise HTTPException(status_code=502, detail="LLM returned malformed questions")
+        return [f"Q{i} about {resume_text[-20:].strip()}?" for i in range(3)]
+
+    monkeypatch.setattr(ai_service, "generate_questions", generate_questions)
+    app = FastAPI()
+    app.include_router(batch_router.router)
+    test_client = TestClient(app)
+    test_client.calls = calls
+    return test_client
+
+
+def ndjson(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_batch_streams_one_line_per_resume_then_summary(client):
+    response = client.post("/batch/analyze", json={
+        "job_post": JOB,
+        "resumes": [RESUME, {"id": "bob", "resume_text": RESUME + "% bob"}, RESUME],
+    })
+    lines = ndjson(response)
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(r["index"] for r in results) == [0, 1, 2]
+    assert {r["id"] for r in results} == {"0", "bob", "2"}
+    assert all(r["status"] == "ok" and len(r["questions"]) == 3 for r in results)
+    assert summary["type"] == "summary" and summary["total"] == 3 and summary["succeeded"] == 3
+    if HAS_NUMPY:
+        assert 0 <= results[0]["relevance"]["coverage"] <= 1
+
+
+def test_llm_failures_are_errors_not_fallback_questions(client):
+    lines = ndjson(client.post("/batch/analyze", json={"job_post": JOB, "resumes": [RESUME, RESUME + "% fails"]}))
+    by_index = {line.get("index"): line for line in lines}
+    assert by_index[0]["status"] == "ok"
+    assert by_index[1]["status"] == "error" and by_index[1]["error"]["status_code"] == 502
+    assert "questions" not in by_index[1]
+    assert lines[-1]["failed"] == 1
+
+
+def test_zip_upload_expands_resume_members(client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("alice.tex", RESUME)
+        z.writestr("notes/bob.md", "Bob: Python, Redis, Kubernetes")
+        z.writestr("photo.png", b"\x89PNG")
+        z.writestr("__MACOSX/._alice.tex", "junk")
+    response = client.post(
+        "/batch/analyze",
+        data={"job_post": JOB},
+        files=[("resumes", ("batch.zip", archive.getvalue(), "application/zip")),
+               ("resumes", ("carol.txt", b"Carol: Go and AWS", "text/plain"))],
+    )
+    ids = {line["id"] for line in ndjson(response) if line["type"] == "result"}
+    assert ids == {"alice.tex", "notes/bob.md", "carol.txt"}
+
+
+def test_bad_requests_are_rejected_before_streaming(client):
+    assert client.post("/batch/analyze", json={"job_post": " ", "resumes": [RESUME]}).status_code == 400
+    assert client.post("/batch/analyze", json={"job_post": JOB, "resumes": []}).status_code == 400
+    assert client.post("/batch/analyze", json={"job_post": JOB, "resumes": [42]}).status_code == 400
+    bad_zip = [("resumes", ("batch.zip", b"not a zip", "application/zip"))]
+    assert client.post("/batch/analyze", data={"job_post": JOB}, files=bad_zip).status_code == 400
+
+
+def test_rate_limited_items_are_retried(client, monkeypatch):
+    attempts = []
+
+    async def flaky(resume_text, job_post, session_id=None):
+        attempts.append(session_id)
+        if len(attempts) == 1:
+            raise RateLimitExceeded(0.1)
+        return ["a?", "b?", "c?"]
+
+    monkeypatch.setattr(ai_service, "generate_questions", flaky)
+    lines = ndjson(client.post("/batch/analyze", json={"job_post": JOB, "resumes": [RESUME]}))
+    assert lines[0]["status"] == "ok" and len(attempts) == 2
+    # Every call of a batch runs in the batch's own fair-queue lane
+    assert attempts[0].startswith("batch:")
+
+
+def test_job_post_is_prepared_once(client, monkeypatch):
+    built = []
+    real = module.JobProfile
+
+    def counting(job_post):
+        built.append(job_post)
+        return real(job_post)
+
+    monkeypatch.setattr(module, "JobProfile", counting)
+    ndjson(client.post("/batch/analyze", json={"job_post": JOB, "resumes": [RESUME, RESUME + "%2", RESUME + "%3"]}))
+    assert len(built) == 1
+
+
+def test_batch_question_call_raises_where_sessions_fall_back(monkeypatch):
+    async def malformed(*args, **kwargs):
+        return "Sure! Here are some questions."
+
+    monkeypatch.setattr(ai_service, "_make_api_call", malformed)
+    monkeypatch.setattr(module.settings, "SEMANTIC_CACHE_ENABLED", False)
+    assert asyncio.run(ai_service.analyze_resume_and_job(RESUME, JOB)) == ai_service._get_fallback_questions()
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(ai_service.generate_questions(RESUME, JOB))
+    assert e.value.status_code == 502
@@ -0,0 +1,36 @@
+from blob_store import BlobStore, content_hash
+
+TEXT = "\\documentclass{article}\n" + "\\item shared line\n" * 200
+
+
+def test_refcount_keeps_blob_until_last_release(store):
+    blobs = BlobStore()
+    blob_hash = blobs.acquire(TEXT, 60)
+    assert blob_hash == content_hash(TEXT)
+    assert blobs.acquire(TEXT, 60) == blob_hash
+
+    def reader():
+        # With Redis, read as another worker would: an instance caches every text it has seen
+        return BlobStore() if store == "fake_redis" else blobs
+
+    blobs.release(blob_hash)
+    assert reader().get(blob_hash) == TEXT
+    blobs.release(blob_hash)
+    assert reader().get(blob_hash) is None
+
+
+def test_refresh_extends_ttl_without_counting(fake_redis):
+    blobs = BlobStore()
+    blob_hash = blobs.acquire(TEXT, 60)
+    blobs.refresh(blob_hash, 600)
+    assert fake_redis.ttl(f"blob:{blob_hash}") > 60
+    assert int(fake_redis.get(f"blobref:{blob_hash}")) == 1
+
+
+def test_blob_is_stored_compressed_once(fake_redis):
+    blobs = BlobStore()
+    blob_hash = blobs.acquire(TEXT, 60)
+    blobs.acquire(TEXT, 60)
+    stored = fake_redis.strlen(f"blob:{blob_hash}")
+    assert stored < len(TEXT) / 4
+    assert int(fake_redis.get(f"blobref:{blob_hash}")) == 2
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import export_router
+from services import compile_workspace
+from services.compile_workspace import CompileWorkspaces
+from session_manager import session_manager
+
+
+def make_registry(tmp_path, monkeypatch, max_workspaces=1):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def fake_compile(latex_code, workdir=None):
+        started.set()
+        await release.wait()
+        assert os.path.isdir(workdir)
+        return latex_code.encode()
+
+    monkeypatch.setattr(compile_workspace.pdf_compiler, "compile", fake_compile)
+    return CompileWorkspaces(str(tmp_path), ttl=3600, max_workspaces=max_workspaces), started, release
+
+
+def test_busy_workspace_is_not_evicted(tmp_path, monkeypatch):
+    async def scenario():
+        registry, started, release = make_registry(tmp_path, monkeypatch)
+        first = asyncio.create_task(registry.compile("a", "one"))
+        await started.wait()
+        # Over the cap while "a" compiles: "a" is kept, nothing is removed from under it
+        registry._acquire("b")
+        assert set(registry._workspaces) == {"a", "b"}
+        release.set()
+        assert await first == b"one"
+
+    asyncio.run(scenario())
+
+
+def test_discard_waits_for_the_running_export(tmp_path, monkeypatch):
+    async def scenario():
+        registry, started, release = make_registry(tmp_path, monkeypatch, max_workspaces=4)
+        first = asyncio.create_task(registry.compile("a", "one"))
+        await started.wait()
+        path = registry._workspaces["a"].path
+        registry.discard("a")
+        assert os.path.isdir(path)
+        # A new export for the same session gets a fresh directory
+        assert registry._acquire("a").path != path
+        release.set()
+        await first
+        assert not os.path.exists(path)
+
+    asyncio.run(scenario())
+
+
+def test_export_with_unknown_session_creates_no_workspace(tmp_path, monkeypatch, no_redis):
+    async def fake_compile(latex_code, workdir=None):
+        return b"%PDF"
+
+    monkeypatch.setattr(compile_workspace.pdf_compiler, "compile", fake_compile)
+    registry = CompileWorkspaces(str(tmp_path), ttl=3600, max_workspaces=4)
+    monkeypatch.setattr(export_router, "compile_workspaces", registry)
+    app = FastAPI()
+    app.include_router(export_router.router)
+    client = TestClient(app)
+
+    response = client.post("/export/pdf", json={"latex_code": "x", "session_id": "missing"})
+    assert response.status_code == 404
+    assert registry._workspaces == {}
+
+    session_id = session_manager.create_session("\\begin{document}\\end{document}", "job", ["q1"])
+    response = client.post("/export/pdf", json={"latex_code": "x", "session_id": session_id})
+    assert response.status_code == 200 and response.content == b"%PDF"
+    assert set(registry._workspaces) == {session_id}
@@ -0,0 +1,193 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from redis_client import get_redis
+from routers import job_router, session_router
+from services import job_queue as job_queue_module
+from services.job_queue import HEARTBEAT_PREFIX, QUEUE_KEY, TERMINAL_STATUSES, JobQueue
+from session_manager import session_manager
+
+
+def make_queue(**handlers):
+    queue = JobQueue(lease_seconds=30, max_attempts=3, result_ttl=3600)
+    for job_type, handler in handlers.items():
+        queue.register(job_type, handler)
+    return queue
+
+
+async def echo(payload):
+    return {"echo": payload["value"]}
+
+
+async def drain(queue, job_id):
+    """Run one worker until the job is finished and has left the processing list"""
+    worker = asyncio.create_task(queue.run_worker())
+    r = get_redis()
+    while queue.get_job(job_id)["status"] not in TERMINAL_STATUSES or (r is not None and r.llen(queue.processing_key)):
+        await asyncio.sleep(0.01)
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+    return queue.get_job(job_id)
+
+
+def test_enqueued_job_runs_to_completion(store):
+    async def scenario():
+        queue = make_queue(echo=echo)
+        job_id = await queue.enqueue("echo", {"value": 1})
+        queued = dict(queue.get_job(job_id))
+        return queued, await drain(queue, job_id)
+
+    queued, job = asyncio.run(scenario())
+    assert queued["status"] == "queued" and queued["attempts"] == 0
+    assert job["status"] == "completed" and job["result"] == {"echo": 1} and job["attempts"] == 1
+    r = get_redis()
+    if r is not None:
+        assert r.llen(QUEUE_KEY) == 0
+
+
+def test_handler_errors_fail_the_job(store):
+    async def conflict(payload):
+        raise HTTPException(status_code=409, detail="busy")
+
+    async def crash(payload):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        queue = make_queue(conflict=conflict, crash=crash)
+        first = await drain(queue, await queue.enqueue("conflict", {}))
+        second = await drain(queue, await queue.enqueue("crash", {}))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == "failed" and first["error"] == {"status_code": 409, "detail": "busy"}
+    assert second["status"] == "failed" and second["error"] == {"status_code": 500, "detail": "boom"}
+
+
+def test_watch_yields_each_status_change(store):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(payload):
+            await release.wait()
+            return {}
+
+        queue = make_queue(slow=slow)
+        job_id = await queue.enqueue("slow", {})
+        seen = []
+
+        async def follow():
+            async for job in queue.watch(job_id, poll_interval=0.01):
+                seen.append(job["status"])
+                if job["status"] == "running":
+                    release.set()
+
+        await asyncio.gather(follow(), drain(queue, job_id))
+        return seen
+
+    assert asyncio.run(scenario()) == ["queued", "running", "completed"]
+
+
+def test_unknown_job_is_404(store):
+    with pytest.raises(HTTPException) as e:
+        make_queue().get_job("missing")
+    assert e.value.status_code == 404
+
+
+def test_jobs_of_a_stopped_worker_are_reclaimed(fake_redis):
+    async def scenario():
+        crashed = make_queue(echo=echo)
+        job_id = await crashed.enqueue("echo", {"value": 2})
+        # The worker takes the job and dies before finishing it
+        assert await crashed._next_job_id() == job_id
+        job = crashed.get_job(job_id)
+        job.update(status="running", attempts=1)
+        crashed._save(job)
+
+        survivor = make_queue(echo=echo)
+        assert survivor.reclaim() == 0  # the lease is still live
+        fake_redis.delete(HEARTBEAT_PREFIX + crashed.worker_id)
+        assert survivor.reclaim() == 1
+        requeued = dict(survivor.get_job(job_id))
+        assert fake_redis.llen(crashed.processing_key) == 0
+        return requeued, await drain(survivor, job_id)
+
+    requeued, job = asyncio.run(scenario())
+    assert requeued["status"] == "queued"
+    assert job["status"] == "completed" and job["result"] == {"echo": 2} and job["attempts"] == 2
+
+
+def test_repeatedly_interrupted_job_is_failed(fake_redis):
+    async def scenario():
+        crashed = make_queue(echo=echo)
+        job_id = await crashed.enqueue("echo", {"value": 3})
+        await crashed._next_job_id()
+        job = crashed.get_job(job_id)
+        job.update(status="running", attempts=3)
+        crashed._save(job)
+        fake_redis.delete(HEARTBEAT_PREFIX + crashed.worker_id)
+        assert make_queue(echo=echo).reclaim() == 0
+        return job_id
+
+    job = make_queue().get_job(asyncio.run(scenario()))
+    assert job["status"] == "failed" and job["error"]["status_code"] == 500
+    assert fake_redis.llen(QUEUE_KEY) == 0 and not list(fake_redis.scan_iter(match="jobs:processing:*"))
+
+
+def test_in_memory_records_expire(no_redis, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    queue = JobQueue(lease_seconds=30, max_attempts=3, result_ttl=60)
+
+    async def scenario():
+        old = await queue.enqueue("echo", {"value": 1})
+        now[0] += 30
+        recent = await queue.enqueue("echo", {"value": 2})
+        return old, recent
+
+    queue.register("echo", echo)
+    old, recent = asyncio.run(scenario())
+    now[0] += 45
+    assert queue.get_job(recent)["status"] == "queued"
+    with pytest.raises(HTTPException):
+        queue.get_job(old)
+    assert list(queue._jobs) == [recent]
+
+
+def test_async_mode_suggestions_return_202_and_a_pollable_job(store, monkeypatch):
+    queue = make_queue(**session_router.job_queue.handlers)
+    monkeypatch.setattr(session_router, "job_queue", queue)
+    monkeypatch.setattr(job_router, "job_queue", queue)
+
+    async def generate(session_id):
+        return {"session_id": session_id, "suggestions": []}
+
+    monkeypatch.setattr(session_router, "generate_session_suggestions", generate)
+    app = FastAPI()
+    app.include_router(session_router.router)
+    app.include_router(job_router.router)
+    client = TestClient(app)
+    session_id = session_manager.create_session("\\begin{document}\\end{document}", "job", ["q1"])
+
+    accepted = client.post(f"/session/suggestions/{session_id}?async_mode=true")
+    assert accepted.status_code == 202
+    body = accepted.json()
+    job_id = body["job_id"]
+    assert body["status"] == "queued" and body["status_url"] == f"/jobs/{job_id}"
+    status = client.get(body["status_url"]).json()
+    assert status["status"] == "queued" and "payload" not in status
+
+    asyncio.run(drain(queue, job_id))
+    status = client.get(body["status_url"]).json()
+    assert status["status"] == "completed" and status["result"] == {"session_id": session_id, "suggestions": []}
+    with client.stream("GET", body["events_url"]) as events:
+        assert events.headers["content-type"].startswith("text/event-stream")
+        stream = "".join(events.iter_text())
+    assert stream.startswith("event: completed\ndata: ") and stream.endswith("\n\n")
+
+    assert client.post("/session/suggestions/missing?async_mode=true").status_code == 404
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/events").status_code == 404
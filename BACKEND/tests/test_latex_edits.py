@@ -0,0 +1,82 @@
+import pytest
+
+from services.latex_edits import EditConflict, apply_edit_ops, number_lines, parse_edit_ops
+
+RESUME = (
+    "\\documentclass{article}\n"
+    "\\begin{document}\n"
+    "\\section{Experience}\n"
+    "  \\resumeItem{Built a cache}\n"
+    "\n"
+    "  \\resumeItem{Led a team}\n"
+    "\\end{document}\n"
+)
+
+
+def test_number_lines_covers_only_the_body():
+    assert number_lines(RESUME) == (
+        "3| \\section{Experience}\n"
+        "4|   \\resumeItem{Built a cache}\n"
+        "6|   \\resumeItem{Led a team}\n"
+        "7| \\end{document}"
+    )
+
+
+def test_parse_tolerates_code_fences():
+    ops = parse_edit_ops('```json\n[{"op": "delete", "line": 4}]\n```')
+    assert ops == [{"op": "delete", "line": 4}]
+
+
+@pytest.mark.parametrize("response", ["not json", '{"op": "delete"}', '[{"op": "move", "line": 1}]', '[{"op": "replace", "line": 4}]'])
+def test_parse_rejects_malformed_responses(response):
+    with pytest.raises(EditConflict):
+        parse_edit_ops(response)
+
+
+def test_untouched_lines_are_kept_and_indent_is_inherited():
+    ops = [
+        {"op": "replace", "line": 4, "text": "\\resumeItem{Built a Redis cache}", "original": "\\resumeItem{Built a cache}"},
+        {"op": "insert_after", "line": 6, "text": "\\resumeItem{Mentored two interns}"},
+    ]
+    assert apply_edit_ops(RESUME, ops) == RESUME.replace("Built a cache", "Built a Redis cache").replace(
+        "  \\resumeItem{Led a team}\n", "  \\resumeItem{Led a team}\n  \\resumeItem{Mentored two interns}\n"
+    )
+
+
+def test_stale_line_number_is_reanchored_by_original_text():
+    ops = [{"op": "delete", "line": 3, "original": "\\resumeItem{Led a team}"}]
+    assert "Led a team" not in apply_edit_ops(RESUME, ops)
+
+
+def test_ambiguous_or_missing_anchor_is_a_conflict():
+    doubled = RESUME.replace("\\end{document}", "  \\resumeItem{Led a team}\n\\end{document}")
+    with pytest.raises(EditConflict):
+        apply_edit_ops(doubled, [{"op": "delete", "line": 3, "original": "\\resumeItem{Led a team}"}])
+    with pytest.raises(EditConflict):
+        apply_edit_ops(RESUME, [{"op": "delete", "line": 3, "original": "\\resumeItem{Not there}"}])
+
+
+def test_preamble_and_double_edits_are_rejected():
+    with pytest.raises(EditConflict):
+        apply_edit_ops(RESUME, [{"op": "delete", "line": 1}])
+    with pytest.raises(EditConflict):
+        apply_edit_ops(RESUME, [{"op": "delete", "line": 4}, {"op": "replace", "line": 4, "text": "x"}])
+
+
+def test_crlf_line_endings_are_preserved():
+    crlf = RESUME.replace("\n", "\r\n")
+    ops = [
+        {"op": "replace", "line": 4, "text": "\\resumeItem{Built a Redis cache}"},
+        {"op": "insert_after", "line": 6, "text": "\\resumeItem{One}\n\\resumeItem{Two}"},
+    ]
+    result = apply_edit_ops(crlf, ops)
+    assert "\n" not in result.replace("\r\n", "")
+    assert result.splitlines()[3:8] == [
+        "  \\resumeItem{Built a Redis cache}", "", "  \\resumeItem{Led a team}", "  \\resumeItem{One}", "  \\resumeItem{Two}",
+    ]
+
+
+def test_insert_after_last_line_without_newline():
+    crlf = RESUME.replace("\n", "\r\n").rstrip("\r\n")
+    result = apply_edit_ops(crlf, [{"op": "insert_after", "line": 7, "text": "% end"}])
+    assert result.endswith("\\end{document}\r\n% end")
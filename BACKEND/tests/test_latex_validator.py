@@ -0,0 +1,52 @@
+from services.latex_validator import strip_comments, validate_latex
+
+PREAMBLE = "\\documentclass{article}\n\\begin{document}\n"
+END = "\\end{document}\n"
+
+
+def messages(source):
+    return [issue["message"] for issue in validate_latex(source)]
+
+
+def test_clean_document_has_no_issues():
+    assert validate_latex(PREAMBLE + "\\section{Skills}\nPython, \\LaTeX\n" + END) == []
+
+
+def test_forbidden_command_reports_its_line():
+    issues = validate_latex(PREAMBLE + "\\immediate\\write18{ls}\n" + END)
+    assert [(i["line"], i["message"]) for i in issues] == [(3, "shell escape (\\write18) is not allowed")]
+
+
+def test_commented_out_forbidden_commands_are_ignored():
+    source = PREAMBLE + "% \\input{/etc/passwd}\ntext % \\write18{ls}\n" + END
+    assert validate_latex(source) == []
+
+
+def test_escaped_percent_is_not_a_comment():
+    source = PREAMBLE + "50\\% \\input{/etc/passwd}\n" + END
+    assert messages(source) == ["files may not be read from absolute or parent paths"]
+
+
+def test_strip_comments_keeps_line_numbers():
+    source = "a % one\n% two\n\\% three % four\n"
+    assert strip_comments(source) == "a \n\n\\% three \n"
+
+
+def test_percent_inside_verb_is_not_a_comment():
+    assert strip_comments("\\verb|50%| \\input{/x} % gone") == "\\verb|50%| \\input{/x} "
+
+
+def test_braces_inside_verb_are_not_counted():
+    source = PREAMBLE + "Use \\verb|{| and \\verb*+}}+ to group.\n" + END
+    assert validate_latex(source) == []
+
+
+def test_unclosed_brace_outside_verb_is_reported():
+    issues = validate_latex(PREAMBLE + "\\verb|}| \\textbf{bold\n" + END)
+    assert [(i["line"], i["message"]) for i in issues] == [(3, "Unclosed brace")]
+
+
+def test_mismatched_environment():
+    assert messages(PREAMBLE + "\\begin{itemize}\n\\end{enumerate}\n" + END) == [
+        "\\end{enumerate} closes \\begin{itemize} from line 3"
+    ]
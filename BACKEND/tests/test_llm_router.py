@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import settings
+from routers import health_router
+from services.llm_router import FALLBACK, PRIMARY, LLMRouter
+from services.rate_limiter import RateLimitExceeded
+
+MESSAGES = [{"role": "user", "content": "Generate exactly 3 questions"}]
+
+
+class StubClient:
+    """Stands in for openai.AsyncOpenAI: answers with `content` or raises `error`"""
+
+    def __init__(self, content="ok", error=None, prompt_tokens=100, completion_tokens=20):
+        self.calls = []
+        self.content, self.error = content, error
+        self.usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                     total_tokens=prompt_tokens + completion_tokens)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        self.calls.append(request)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))], usage=self.usage)
+
+
+def make_router(primary, fallback=None):
+    router = LLMRouter()
+    router._providers = {PRIMARY: (primary, "primary-model")}
+    if fallback is not None:
+        router._providers[FALLBACK] = (fallback, "fallback-model")
+    return router
+
+
+def rate_limited(retry_after="7"):
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=httpx.Request("POST", "http://llm.test"))
+    return openai.RateLimitError("Too many requests", response=response, body=None)
+
+
+def stats(router, provider):
+    return next(s for s in router.get_stats()["stats"] if s["provider"] == provider)
+
+
+def test_primary_error_falls_back(no_redis):
+    primary, fallback = StubClient(error=RuntimeError("connection reset")), StubClient("from fallback")
+    router = make_router(primary, fallback)
+    assert asyncio.run(router.complete("questions", MESSAGES, 0.7)) == "from fallback"
+    assert len(primary.calls) == 1 and fallback.calls[0]["model"] == "fallback-model"
+    assert stats(router, PRIMARY)["failures"] == 1
+    assert stats(router, FALLBACK)["failures"] == 0 and stats(router, FALLBACK)["prompt_tokens"] == 100
+
+
+def test_last_error_is_raised_when_every_provider_fails(no_redis):
+    router = make_router(StubClient(error=RuntimeError("down")), StubClient(error=ValueError("also down")))
+    with pytest.raises(ValueError, match="also down"):
+        asyncio.run(router.complete("questions", MESSAGES, 0.7))
+
+
+def test_provider_429_is_not_retried_on_the_fallback(no_redis):
+    primary, fallback = StubClient(error=rate_limited("7")), StubClient("from fallback")
+    router = make_router(primary, fallback)
+    with pytest.raises(RateLimitExceeded) as e:
+        asyncio.run(router.complete("questions", MESSAGES, 0.7))
+    assert e.value.status_code == 429 and e.value.headers["Retry-After"] == "7"
+    assert fallback.calls == [] and stats(router, PRIMARY)["failures"] == 1
+
+
+def test_health_reports_cost_and_tokens_without_building_clients(no_redis, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MODEL_PRICES", {"primary-model": {"prompt": 0.01, "completion": 0.03}})
+    router = make_router(StubClient(prompt_tokens=1000, completion_tokens=500))
+    router.routes["questions"].model = "primary-model"
+    router.routes["questions"].provider = PRIMARY
+    asyncio.run(router.complete("questions", MESSAGES, 0.7))
+    asyncio.run(router.complete("questions", MESSAGES, 0.7))
+
+    monkeypatch.setattr(health_router.ai_service, "router", router)
+    app = FastAPI()
+    app.include_router(health_router.router)
+    body = TestClient(app).get("/health/llm").json()
+    route = next(s for s in body["stats"] if s["operation"] == "questions")
+    assert route["calls"] == 2 and route["failures"] == 0
+    assert route["prompt_tokens"] == 2000 and route["completion_tokens"] == 1000
+    # (1000 * 0.01 + 500 * 0.03) / 1000 per call
+    assert route["cost_usd"] == pytest.approx(0.05)
+    assert {"limiter", "semantic_cache", "routes"} <= set(body)
+
+    fresh = LLMRouter()
+    monkeypatch.setattr(health_router.ai_service, "router", fresh)
+    assert TestClient(app).get("/health/llm").status_code == 200
+    assert fresh._providers is None
+
+
+def test_clients_are_built_on_first_use(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_FALLBACK_API_URL", None)
+    router = LLMRouter()
+    assert router._providers is None
+    assert set(router.providers) == {PRIMARY}
+    asyncio.run(router.close())
+    monkeypatch.setattr(settings, "LLM_FALLBACK_API_URL", "http://fallback.test/v1")
+    monkeypatch.setattr(settings, "LLM_FALLBACK_API_KEY", "test")
+    router = LLMRouter()
+    assert set(router.providers) == {PRIMARY, FALLBACK}
+    asyncio.run(router.close())
+    assert router._providers is None
@@ -0,0 +1,140 @@
+import os
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from routers import export_router
+from services import preview_renderer as preview_module
+from services.preview_renderer import PreviewRenderer
+from services.sandbox import SandboxResult
+
+LATEX = "\\documentclass{article}\\begin{document}Hi\\end{document}"
+
+
+def test_cache_key_covers_every_parameter():
+    renderer = PreviewRenderer("unused", max_bytes=1024, max_concurrency=1)
+    key = renderer.cache_key(LATEX, page=1, dpi=72, fmt="png")
+    assert key == renderer.cache_key(LATEX, page=1, dpi=72, fmt="png")
+    assert key.endswith("-p1-72dpi.png")
+    others = [
+        renderer.cache_key(LATEX + " ", page=1, dpi=72, fmt="png"),
+        renderer.cache_key(LATEX, page=2, dpi=72, fmt="png"),
+        renderer.cache_key(LATEX, page=1, dpi=100, fmt="png"),
+    ]
+    assert len({key, *others}) == 4
+
+
+@pytest.mark.parametrize("params", [{"page": 0}, {"dpi": 10_000}, {"fmt": "gif"}])
+def test_invalid_parameters_are_400(params):
+    with pytest.raises(HTTPException) as e:
+        PreviewRenderer("unused", max_bytes=1024, max_concurrency=1).cache_key(LATEX, **params)
+    assert e.value.status_code == 400
+
+
+def test_etag_revalidation_skips_rendering(tmp_path, monkeypatch, no_redis):
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1 << 20, max_concurrency=1)
+    rendered = []
+
+    async def compile_pdf(latex_code):
+        return b"%PDF"
+
+    def rasterize(pdf, page, dpi, fmt):
+        rendered.append(page)
+        return b"image"
+
+    monkeypatch.setattr(preview_module.pdf_compiler, "compile", compile_pdf)
+    monkeypatch.setattr(renderer, "_rasterize", rasterize)
+    monkeypatch.setattr(export_router, "preview_renderer", renderer)
+    app = FastAPI()
+    app.include_router(export_router.router)
+    client = TestClient(app)
+
+    first = client.post("/export/preview?page=1", json={"latex_code": LATEX})
+    assert first.status_code == 200 and first.content == b"image"
+    etag = first.headers["etag"]
+    assert etag == f'"{renderer.cache_key(LATEX)}"'
+
+    again = client.post("/export/preview?page=1", headers={"If-None-Match": etag}, json={"latex_code": LATEX})
+    assert again.status_code == 304 and again.headers["etag"] == etag
+    cached = client.post("/export/preview?page=1", json={"latex_code": LATEX})
+    assert cached.status_code == 200 and cached.content == b"image"
+    other_page = client.post("/export/preview?page=2", headers={"If-None-Match": etag}, json={"latex_code": LATEX})
+    assert other_page.status_code == 200
+    assert rendered == [1, 2]
+
+
+def test_cache_is_trimmed_least_recently_used_first(tmp_path):
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1000, max_concurrency=1)
+    for name in ("a", "b", "c"):
+        renderer._write(name, b"x" * 300)
+        os.utime(tmp_path / name, (0, {"a": 100, "b": 300, "c": 200}[name]))
+    # A cache hit counts as a use
+    assert renderer._read("a") == b"x" * 300
+    renderer._write("d", b"x" * 300)
+    # 1200 bytes > 1000: the least recently used go until at most 800 remain
+    assert sorted(os.listdir(tmp_path)) == ["a", "d"]
+    assert renderer._size == 600
+
+
+def test_concurrent_writes_keep_the_size_exact(tmp_path):
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1 << 30, max_concurrency=1)
+    renderer._write("seed", b"x")
+    threads = [threading.Thread(target=lambda i=i: [renderer._write(f"{i}-{n}", b"x" * 10) for n in range(50)])
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert renderer._size == renderer._scan()[0] == 1 + 8 * 50 * 10
+
+
+def fake_tools(monkeypatch, pages, render_exit=0, render_output=b""):
+    """Stand-in for the sandboxed pdfinfo/pdftoppm runs; returns the commands that were run"""
+    ran = []
+
+    def run(cmd, cwd, timeout, limits, env=None, output_path=None):
+        ran.append(cmd[0])
+        with open(output_path, "wb") as f:
+            if cmd[0] == "pdfinfo":
+                if pages is None:
+                    raise FileNotFoundError("pdfinfo")
+                f.write(f"Title: resume\nPages:          {pages}\n".encode())
+            else:
+                f.write(render_output)
+                if render_exit == 0:
+                    with open(cmd[-1] + ".png", "wb") as image:
+                        image.write(b"png")
+        return SandboxResult(render_exit if cmd[0] == "pdftoppm" else 0, False, 0.0)
+
+    monkeypatch.setattr(PreviewRenderer, "renderer", staticmethod(lambda: "pdftoppm"))
+    monkeypatch.setattr(preview_module, "run_sandboxed", run)
+    return ran
+
+
+def test_page_past_the_end_is_missing(tmp_path, monkeypatch):
+    ran = fake_tools(monkeypatch, pages=2)
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1 << 20, max_concurrency=1)
+    assert renderer._rasterize(b"%PDF", page=2, dpi=72, fmt="png") == b"png"
+    assert renderer._rasterize(b"%PDF", page=3, dpi=72, fmt="png") is None
+    assert ran == ["pdfinfo", "pdftoppm", "pdfinfo"]
+
+
+def test_renderer_crash_is_a_server_error(tmp_path, monkeypatch):
+    fake_tools(monkeypatch, pages=2, render_exit=-11)
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1 << 20, max_concurrency=1)
+    with pytest.raises(HTTPException) as e:
+        renderer._rasterize(b"%PDF", page=1, dpi=72, fmt="png")
+    assert e.value.status_code == 500
+
+
+def test_renderer_message_decides_without_a_page_count(tmp_path, monkeypatch):
+    renderer = PreviewRenderer(str(tmp_path), max_bytes=1 << 20, max_concurrency=1)
+    message = b"Wrong page range given: the first page (3) can not be after the last page (2).\n"
+    fake_tools(monkeypatch, pages=None, render_exit=99, render_output=message)
+    assert renderer._rasterize(b"%PDF", page=3, dpi=72, fmt="png") is None
+    fake_tools(monkeypatch, pages=None, render_exit=1, render_output=b"Syntax Error: Couldn't read xref table\n")
+    with pytest.raises(HTTPException) as e:
+        renderer._rasterize(b"%PDF", page=1, dpi=72, fmt="png")
+    assert e.value.status_code == 500
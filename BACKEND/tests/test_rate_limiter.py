@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from services.rate_limiter import FairQueue, LLMLimiter, RateLimitExceeded, TokenBucket
+
+
+@pytest.fixture
+def lua_redis(fake_redis):
+    pytest.importorskip("lupa")
+    return fake_redis
+
+
+def test_lua_bucket_is_shared_across_workers(lua_redis):
+    # Two instances stand in for two workers: the budget lives in Redis, not in the process
+    first, second = TokenBucket(requests_per_minute=2, tokens_per_minute=6000), TokenBucket(2, 6000)
+    assert first.try_acquire(100) == 0
+    assert second.try_acquire(100) == 0
+    wait = first.try_acquire(100)
+    # One request refills every 30s at 2/minute
+    assert 29 < wait <= 30
+
+
+def test_lua_bucket_limits_tokens_and_credits_unused(lua_redis):
+    bucket = TokenBucket(requests_per_minute=100, tokens_per_minute=1000)
+    assert bucket.try_acquire(900) == 0
+    assert bucket.try_acquire(500) > 0
+    bucket.adjust_tokens(800)
+    assert bucket.try_acquire(500) == 0
+    assert float(lua_redis.hget(TokenBucket.TOKENS_KEY, "tokens")) < 500
+
+
+def test_local_bucket_without_redis(no_redis):
+    bucket = TokenBucket(requests_per_minute=1, tokens_per_minute=1000)
+    assert bucket.try_acquire(10) == 0
+    assert 59 < bucket.try_acquire(10) <= 60
+
+
+def test_fair_queue_round_robins_lanes():
+    async def scenario():
+        queue = FairQueue(max_concurrency=1, max_queue=10)
+        await queue.acquire("busy", 1, 1)
+        order = []
+
+        async def call(lane, name):
+            await queue.acquire(lane, 1, 1)
+            order.append(name)
+            queue.release()
+
+        tasks = [asyncio.create_task(call("busy", f"busy-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("quiet", "quiet-0")))
+        await asyncio.sleep(0)
+        queue.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    # The quiet session is served second, not behind every queued call of the busy one
+    assert asyncio.run(scenario()) == ["busy-0", "quiet-0", "busy-1", "busy-2"]
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        queue = FairQueue(max_concurrency=1, max_queue=0)
+        await queue.acquire("a", 1, 1)
+        with pytest.raises(RateLimitExceeded) as e:
+            await queue.acquire("b", 1, 2.5)
+        return e.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429 and error.headers["Retry-After"] == "3"
+
+
+def test_admit_reconciles_tokens_when_the_call_fails(no_redis):
+    limiter = LLMLimiter()
+    limiter.bucket = TokenBucket(requests_per_minute=100, tokens_per_minute=1000)
+    limiter.avg_call_seconds = 100.0
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with limiter.admit("s", 800):
+                raise RuntimeError("provider down")
+        # The failed call's estimate was refunded, so this fits
+        async with limiter.admit("s", 800) as usage:
+            usage["actual_tokens"] = 100
+
+    asyncio.run(scenario())
+    assert 850 <= limiter.bucket._local_tokens <= 1000
+    # Both calls, the failed one included, pulled the average down from 100s
+    assert limiter.avg_call_seconds < 70 and limiter.queue.active == 0
@@ -0,0 +1,87 @@
+import math
+
+import pytest
+
+from config import settings
+from services.relevance import HAS_NUMPY, JobProfile, RelevanceScorer, tokenize
+
+pytestmark = pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed")
+
+JOB_POST = """Senior Backend Engineer
+- Build Python microservices on Kubernetes
+- Stream events through Kafka pipelines
+- Design PostgreSQL schemas and tune slow queries
+"""
+
+
+def section(name, *items):
+    return {"section": name, "subheadings": [{"type": "item", "content": item} for item in items]}
+
+
+RESUME = [
+    {"section": "Header", "subheadings": []},
+    section("Hobbies", "Painting landscapes and hiking"),
+    section("Experience", "Built Python microservices deployed on Kubernetes", "Ran Kafka pipelines streaming events"),
+    section("Education", "BSc Computer Science"),
+    section("Projects", "Tuned slow PostgreSQL queries for a reporting tool"),
+]
+
+
+def scorer():
+    return RelevanceScorer(coverage_threshold=0.2, max_keywords=15)
+
+
+def test_tokenize_keeps_tech_tokens_and_adds_bigrams():
+    tokens = tokenize("Experience with C++, Node.js and machine learning")
+    assert "c++" in tokens and "node.js" in tokens and "machine learning" in tokens
+    assert "experience" not in tokens and "with" not in tokens
+
+
+def test_sections_are_ranked_by_relevance():
+    report = scorer().report(RESUME, "", JOB_POST)
+    order = [s["section"] for s in report["sections"]]
+    assert order[:2] == ["Experience", "Projects"]
+    assert order[-1] in ("Hobbies", "Education")
+    assert {s["section"]: s["score"] for s in report["sections"]}["Hobbies"] == 0.0
+    kafka = next(r for r in report["requirements"] if "Kafka" in r["text"])
+    assert kafka["covered"] and kafka["best_match"]["section"] == "Experience"
+    # The title line is a requirement too, and nothing in the resume matches it
+    assert [r["text"] for r in report["requirements"] if not r["covered"]] == ["Senior Backend Engineer"]
+    assert report["coverage"] == 0.75
+
+
+def test_missing_keywords_are_job_terms_absent_from_the_resume():
+    resume = [section("Experience", "Built Python microservices deployed on Kubernetes")]
+    report = scorer().report(resume, "", JOB_POST)
+    assert "kafka" in report["missing_keywords"] and "postgresql" in report["missing_keywords"]
+    assert "python" not in report["missing_keywords"]
+    assert 0 < report["coverage"] < 1
+
+
+def test_prefilter_keeps_the_most_relevant_sections_in_resume_order(monkeypatch):
+    monkeypatch.setattr(settings, "RELEVANCE_MAX_SECTIONS", 2)
+    kept = scorer().prefilter_sections(RESUME, JobProfile(JOB_POST))
+    # The header has nothing to score, so it is never dropped
+    assert [s["section"] for s in kept] == ["Header", "Experience", "Projects"]
+    monkeypatch.setattr(settings, "RELEVANCE_MAX_SECTIONS", len(RESUME))
+    assert scorer().prefilter_sections(RESUME, JOB_POST) is RESUME
+
+
+@pytest.mark.parametrize("resume, resume_text, job_post", [
+    ([], "", JOB_POST),
+    (RESUME, "", ""),
+    ([], "", ""),
+    # Units whose words are all stopwords give all-zero vectors
+    ([section("Other", "The team and the role")], "", JOB_POST),
+])
+def test_empty_inputs_give_finite_scores(resume, resume_text, job_post):
+    report = scorer().report(resume, resume_text, job_post)
+    assert report["available"] and report["coverage"] == 0.0
+    values = [report["coverage"]] + [s["score"] for s in report["sections"]] + [r["score"] for r in report["requirements"]]
+    assert all(math.isfinite(v) for v in values)
+    assert all(r["best_match"] is None for r in report["requirements"])
+
+
+def test_prefilter_without_job_requirements_keeps_everything(monkeypatch):
+    monkeypatch.setattr(settings, "RELEVANCE_MAX_SECTIONS", 2)
+    assert scorer().prefilter_sections(RESUME, "") is RESUME
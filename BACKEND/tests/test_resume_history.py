@@ -0,0 +1,48 @@
+import pytest
+
+from services.resume_history import apply_delta, make_delta, materialize, new_record
+
+BASE = "".join(f"\\resumeItem{{point {i}}}\n" for i in range(30))
+
+
+@pytest.mark.parametrize("old, new", [
+    (BASE, BASE.replace("point 3}", "point three}")),
+    (BASE, BASE + "\\resumeItem{added}\n"),
+    (BASE, BASE.replace("\\resumeItem{point 7}\n", "")),
+    (BASE, BASE.rstrip("\n")),
+    (BASE.replace("\n", "\r\n"), BASE.replace("\n", "\r\n").replace("point 9}", "point nine}")),
+    ("", BASE),
+])
+def test_delta_round_trip(old, new):
+    assert apply_delta(old, make_delta(old, new)) == new
+
+
+def test_delta_stores_only_changed_lines():
+    delta = make_delta(BASE, BASE.replace("point 3}", "point three}"))
+    assert delta == [[3, 4, ["\\resumeItem{point three}\n"]]]
+
+
+def test_snapshot_every_interval_and_for_large_changes():
+    edited = BASE.replace("point 1}", "point one}")
+    assert "delta" in new_record(2, edited, BASE, "edit", "t", snapshot_interval=10)
+    assert "snapshot" in new_record(11, edited, BASE, "edit", "t", snapshot_interval=10)
+    assert "snapshot" in new_record(2, edited, None, "edit", "t", snapshot_interval=10)
+    assert "snapshot" in new_record(2, "something else entirely\n", BASE, "edit", "t", snapshot_interval=10)
+
+
+def test_materialize_walks_from_the_nearest_snapshot():
+    texts = {1: BASE}
+    records = {1: new_record(1, BASE, None, "start", "t", 4)}
+    for v in range(2, 10):
+        texts[v] = texts[v - 1].replace(f"point {v}}}", f"point {v}!}}")
+        records[v] = new_record(v, texts[v], texts[v - 1], "edit", "t", 4)
+    assert [v for v, rec in records.items() if "snapshot" in rec] == [1, 5, 9]
+    for v, text in texts.items():
+        assert materialize(records, v) == text
+    # Only the records from the boundary snapshot on are needed
+    assert materialize({v: records[v] for v in (5, 6, 7)}, 7) == texts[7]
+
+
+def test_version_zero_has_no_record():
+    with pytest.raises(KeyError):
+        materialize({1: new_record(1, BASE, None, "start", "t", 10)}, 0)
@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+from services.sandbox import SANDBOX_SUPPORTED, SandboxLimits, run_sandboxed
+
+pytestmark = pytest.mark.skipif(not SANDBOX_SUPPORTED, reason="prlimit/wait4 not available")
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return "\nState:\tZ" not in f.read()
+    except FileNotFoundError:
+        return False
+
+
+def test_trivial_program_runs_through_the_gate(tmp_path):
+    output = tmp_path / "out.txt"
+    result = run_sandboxed(["sh", "-c", "echo out; echo err >&2; exit 3"], cwd=str(tmp_path), timeout=5,
+                           limits=SandboxLimits(), output_path=str(output))
+    assert result.returncode == 3 and result.limit_hit is None and not result.timed_out
+    assert output.read_text() == "out\nerr\n"
+    assert result.cpu_seconds is not None and result.max_rss_bytes > 0
+
+
+def test_file_size_limit_truncates_the_output(tmp_path):
+    limits = SandboxLimits(file_size_bytes=4096)
+    result = run_sandboxed(["dd", "if=/dev/zero", "of=big", "bs=1024", "count=64"], cwd=str(tmp_path),
+                           timeout=5, limits=limits)
+    assert result.limit_hit == "file_size"
+    assert os.path.getsize(tmp_path / "big") == 4096
+
+
+def test_cpu_limit_is_reported(tmp_path):
+    result = run_sandboxed(["sh", "-c", "while :; do :; done"], cwd=str(tmp_path), timeout=10,
+                           limits=SandboxLimits(cpu_seconds=1))
+    assert result.limit_hit == "cpu" and not result.timed_out
+    assert result.cpu_seconds >= 0.9
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path):
+    started = time.perf_counter()
+    result = run_sandboxed(["sh", "-c", "sleep 30 & echo $! > child.pid; wait"], cwd=str(tmp_path), timeout=0.5,
+                           limits=SandboxLimits())
+    assert result.timed_out and result.limit_hit == "timeout"
+    assert time.perf_counter() - started < 5
+    child = int((tmp_path / "child.pid").read_text())
+    deadline = time.monotonic() + 2
+    while alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(child)
+
+
+def test_missing_program_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_sandboxed(["no-such-renderer"], cwd=str(tmp_path), timeout=5, limits=SandboxLimits())
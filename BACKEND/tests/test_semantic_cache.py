@@ -0,0 +1,60 @@
+import pytest
+
+from services import semantic_cache as module
+from services.semantic_cache import MinHasher, SemanticCache, shingles, similarity
+
+RESUME = " ".join(f"\\resumeItem{{Built service {i} with Python and Redis for team {i % 7}}}" for i in range(40))
+JOB = "Backend engineer: Python, Redis, distributed systems, on-call rotation, code review, mentoring " * 3
+
+
+def make_cache(**overrides):
+    options = dict(threshold=0.8, num_perm=64, bands=16, max_entries=10, ttl=60, shingle_size=3)
+    options.update(overrides)
+    return SemanticCache(**options)
+
+
+def test_shingles_ignore_case_spacing_and_comments():
+    assert shingles("Built  a CACHE % secret note\nfast", 2) == shingles("built a cache\nfast", 2)
+
+
+def test_near_duplicate_hits_and_different_job_misses():
+    cache = make_cache()
+    cache.put(RESUME, JOB, ["q1"])
+    assert cache.get(RESUME.replace("team 3", "team three"), JOB) == ["q1"]
+    assert cache.get(RESUME, "Frontend designer: Figma, CSS, accessibility audits, user research " * 3) is None
+    assert cache.snapshot()["hits"] == 1 and cache.snapshot()["misses"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    cache = make_cache(ttl=10)
+    cache.put(RESUME, JOB, "value")
+    now[0] += 11
+    assert cache.get(RESUME, JOB) is None
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_capacity_evicts_least_recently_used():
+    cache = make_cache(max_entries=2)
+    jobs = [f"{JOB} role {name} with unique stack {name * 3}" for name in ("alpha", "beta", "gamma")]
+    cache.put(RESUME, jobs[0], 0)
+    cache.put(RESUME, jobs[1], 1)
+    assert cache.get(RESUME, jobs[0]) == 0
+    cache.put(RESUME, jobs[2], 2)
+    assert cache.get(RESUME, jobs[1]) is None
+    assert cache.get(RESUME, jobs[0]) == 0
+
+
+def test_numpy_and_pure_python_signatures_match(monkeypatch):
+    pytest.importorskip("numpy")
+    hashes = shingles(RESUME, 3)
+    with_numpy = MinHasher(64).signature(hashes)
+    monkeypatch.setattr(module, "HAS_NUMPY", False)
+    assert MinHasher(64).signature(hashes) == with_numpy
+    assert similarity(with_numpy, with_numpy) == 1.0
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        make_cache(num_perm=64, bands=10)
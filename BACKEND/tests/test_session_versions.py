@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+
+from config import settings
+from session_manager import session_manager
+
+RESUME = "\\documentclass{article}\n\\begin{document}\n" + "".join(f"\\item point {i}\n" for i in range(20)) + "\\end{document}\n"
+
+
+def edit(text, n):
+    return text.replace(f"point {n}\n", f"point {n} (edited)\n")
+
+
+def test_version_zero_is_not_found(store):
+    session_id = session_manager.create_session(RESUME, "job", ["q"])
+    session = session_manager.get_session(session_id)
+    assert session_manager.get_version_text(session_id, session, 1) == RESUME
+    with pytest.raises(HTTPException) as e:
+        session_manager.get_version_text(session_id, session, 0)
+    assert e.value.status_code == 404
+
+
+def test_versions_rebuild_from_deltas(store):
+    session_id = session_manager.create_session(RESUME, "job", ["q"])
+    texts = {1: RESUME}
+    for n in range(2, 8):
+        session = session_manager.get_session(session_id)
+        texts[n] = edit(texts[n - 1], n)
+        assert session_manager.update_resume(session_id, session, texts[n], "edit") == n
+    session = session_manager.get_session(session_id)
+    for n, text in texts.items():
+        assert session_manager.get_version_text(session_id, session, n) == text
+    stored = {v["version"]: v["stored_as"] for v in session_manager.list_versions(session_id)}
+    assert "delta" in stored.values()
+
+
+def test_concurrent_edits_get_distinct_versions(store):
+    session_id = session_manager.create_session(RESUME, "job", ["q"])
+    # Two requests read the session at version 1, then both save
+    first, second = session_manager.get_session(session_id), session_manager.get_session(session_id)
+    a, b = edit(RESUME, 3), edit(RESUME, 4)
+    assert session_manager.update_resume(session_id, first, a, "edit") == 2
+    assert session_manager.update_resume(session_id, second, b, "edit") == 3
+    session = session_manager.get_session(session_id)
+    assert session_manager.get_version_text(session_id, session, 2) == a
+    # Based on version 1, not 2: stored whole, so the chain through version 2 is not applied to it
+    assert session_manager.get_version_text(session_id, session, 3) == b
+    assert [v["stored_as"] for v in session_manager.list_versions(session_id)][-1] == "snapshot"
+
+
+def test_old_versions_are_pruned(store, monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_MAX_VERSIONS", 4)
+    session_id = session_manager.create_session(RESUME, "job", ["q"])
+    text = RESUME
+    for n in range(2, 10):
+        text = edit(text, n)
+        session_manager.update_resume(session_id, session_manager.get_session(session_id), text, "edit")
+    versions = session_manager.list_versions(session_id)
+    assert [v["version"] for v in versions] == [6, 7, 8, 9]
+    assert versions[0]["stored_as"] == "snapshot"
+    session = session_manager.get_session(session_id)
+    assert session_manager.get_version_text(session_id, session, 9) == text
+    with pytest.raises(HTTPException):
+        session_manager.get_version_text(session_id, session, 5)
+
+
+def test_each_public_operation_is_timed_once(store):
+    prometheus_client = pytest.importorskip("prometheus_client")
+
+    def count(op):
+        labels = {"op": op, "outcome": "success"}
+        return prometheus_client.REGISTRY.get_sample_value("session_store_op_duration_seconds_count", labels) or 0
+
+    ops = ("create_session", "add_answer", "update_resume", "get_session", "get_version")
+    before = {op: count(op) for op in ops}
+    session_id = session_manager.create_session(RESUME, "job", ["q1"])
+    session_manager.add_answer(session_id, "a1")
+    session = session_manager.get_session(session_id)
+    for n in range(settings.RESUME_MAX_VERSIONS + 1):
+        session_manager.update_resume(session_id, session, edit(session["resume_text"], n % 20), "test")
+    assert {op: count(op) - before[op] for op in ops} == {
+        "create_session": 1, "add_answer": 1, "update_resume": settings.RESUME_MAX_VERSIONS + 1,
+        "get_session": 1, "get_version": 0,
+    }
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from routers import session_router
+from session_manager import session_manager
+from services.single_flight import SingleFlight, flight_key
+
+
+def counting(result="done", delay=0.05, error=None):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return fn, calls
+
+
+def test_flight_key_depends_on_every_part():
+    assert flight_key("op", "a", [1, 2]) == flight_key("op", "a", [1, 2])
+    assert flight_key("op", "a", [1, 2]) != flight_key("op", "a", [1, 3])
+    assert flight_key("op", "a") != flight_key("other", "a")
+
+
+def test_concurrent_duplicates_run_once(no_redis):
+    async def scenario():
+        group = SingleFlight()
+        fn, calls = counting()
+        other, other_calls = counting("other")
+        results = await asyncio.gather(*[group.do("k", fn) for _ in range(5)], group.do("k2", other))
+        return results, calls, other_calls, group
+
+    results, calls, other_calls, group = asyncio.run(scenario())
+    assert results == ["done"] * 5 + ["other"]
+    assert len(calls) == 1 and len(other_calls) == 1 and group.coalesced == 4
+    assert group._inflight == {}
+
+
+def test_errors_reach_every_caller_and_are_not_cached(no_redis):
+    async def scenario():
+        group = SingleFlight()
+        fn, calls = counting(error=ValueError("boom"))
+        results = await asyncio.gather(group.do("k", fn), group.do("k", fn), return_exceptions=True)
+        again = await asyncio.gather(group.do("k", fn), return_exceptions=True)
+        return results + again, calls
+
+    results, calls = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers(no_redis):
+    async def scenario():
+        group = SingleFlight()
+        fn, calls = counting(delay=0.1)
+        leader = asyncio.create_task(group.do("k", fn))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(group.do("k", fn))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == "done" and len(calls) == 1
+
+
+def test_cross_worker_followers_read_the_leaders_result(fake_redis):
+    async def scenario():
+        # Two groups stand in for two workers sharing one Redis
+        first, second = SingleFlight(poll_interval=0.01), SingleFlight(poll_interval=0.01)
+        fn, calls = counting({"questions": ["a?"]}, delay=0.1)
+        return await asyncio.gather(first.do("k", fn), second.do("k", fn)), calls, second
+
+    results, calls, second = asyncio.run(scenario())
+    assert results == [{"questions": ["a?"]}] * 2
+    assert len(calls) == 1 and second.coalesced == 1
+    assert fake_redis.get("singleflight:k:lock") is None
+
+
+def test_cross_worker_follower_takes_over_after_leader_error(fake_redis):
+    async def scenario():
+        first, second = SingleFlight(poll_interval=0.01), SingleFlight(poll_interval=0.01)
+        failing, _ = counting(delay=0.05, error=RuntimeError("provider down"))
+        working, calls = counting("recovered")
+        results = await asyncio.gather(first.do("k", failing), second.do("k", working), return_exceptions=True)
+        return results, calls
+
+    (leader_result, follower_result), calls = asyncio.run(scenario())
+    assert isinstance(leader_result, RuntimeError)
+    assert follower_result == "recovered" and len(calls) == 1
+
+
+def test_session_suggestions_are_keyed_on_answers(no_redis, monkeypatch):
+    async def scenario():
+        session_id = session_manager.create_session("\\begin{document}\\end{document}", "job", ["q1", "q2"])
+        session_manager.add_answer(session_id, "a1")
+        release = asyncio.Event()
+        seen = []
+
+        async def generate(sid):
+            seen.append(list(session_manager.get_session(sid)["answers"]))
+            await release.wait()
+            return {"session_id": sid, "suggestions": []}
+
+        monkeypatch.setattr(session_router, "generate_session_suggestions", generate)
+        first = asyncio.create_task(session_router.coalesced_session_suggestions(session_id))
+        duplicate = asyncio.create_task(session_router.coalesced_session_suggestions(session_id))
+        await asyncio.sleep(0.01)
+        session_manager.add_answer(session_id, "a2")
+        after_answer = asyncio.create_task(session_router.coalesced_session_suggestions(session_id))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(first, duplicate, after_answer)
+        return seen
+
+    assert asyncio.run(scenario()) == [["a1"], ["a1", "a2"]]
@@ -0,0 +1,139 @@
+"""
+Optional OpenTelemetry tracing for requests, LLM calls, storage and compiles
+"""
+
+import inspect
+import json
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from config import settings
+from metrics import route_template
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter, SpanExportResult
+    )
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+    SpanExporter = object
+
+_tracer = None
+_provider = None
+
+
+class FileSpanExporter(SpanExporter):
+    """Writes finished spans as JSON lines, so traces need no collector"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock, open(self.path, "a") as f:
+            for s in spans:
+                f.write(json.dumps({
+                    "name": s.name,
+                    "trace_id": format(s.context.trace_id, "032x"),
+                    "span_id": format(s.context.span_id, "016x"),
+                    "parent_id": format(s.parent.span_id, "016x") if s.parent else None,
+                    "start_ns": s.start_time,
+                    "end_ns": s.end_time,
+                    "status": s.status.status_code.name,
+                    "attributes": dict(s.attributes or {}),
+                }) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing() -> bool:
+    """Install the tracer provider if tracing is enabled and OpenTelemetry is installed"""
+    global _tracer, _provider
+    if not settings.TRACING_ENABLED or _tracer is not None:
+        return _tracer is not None
+    if not OTEL_AVAILABLE:
+        print("⚠️ TRACING_ENABLED is set but opentelemetry-sdk is not installed - tracing disabled")
+        return False
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": settings.APP_NAME}))
+    if settings.TRACING_EXPORTER == "otlp":
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif settings.TRACING_EXPORTER == "console":
+        _provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    else:
+        _provider.add_span_processor(BatchSpanProcessor(FileSpanExporter(settings.TRACING_FILE)))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("resume-assistant")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Open a span (a no-op when tracing is off); yields the span or None"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+def set_attributes(current, **attributes) -> None:
+    """Set attributes on a span returned by span(); ignores None spans and values"""
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def traced(name: str):
+    """Decorator wrapping a sync or async function in a span"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware opening one server span per request, named after the route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        with span(f"{scope['method']} {route}", **{"http.method": scope["method"], "http.route": route}) as current:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    set_attributes(current, **{"http.status_code": message["status"]})
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Standalone background job worker for the AI Resume Assistant API
+
+Run one or more of these next to the API (with JOB_WORKERS=0 on the API)
+so long LLM operations do not compete with request handling.
+"""
+
+import asyncio
+import os
+from config import settings
+from services.job_queue import job_queue
+from redis_client import get_redis, redis_clients
+from logging_config import configure_logging, stop_logging
+# Importing the session router registers its job handlers
+import routers.session_router  # noqa: F401
+
+async def run(concurrency: int) -> None:
+    redis_clients.start_monitor(settings.REDIS_RECONNECT_INTERVAL_SECONDS)
+    await asyncio.gather(job_queue.run_heartbeat(), *(job_queue.run_worker() for _ in range(concurrency)))
+
+def main():
+    """Start the job worker"""
+    settings.validate()
+    configure_logging()
+    if get_redis() is None:
+        print("❌ Redis is required for a standalone worker (the in-memory queue is per-process)")
+        raise SystemExit(1)
+    concurrency = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    print(f"🛠️  Job worker started with concurrency {concurrency}")
+    try:
+        asyncio.run(run(concurrency))
+    except KeyboardInterrupt:
+        print("\n👋 Job worker stopped by user")
+    finally:
+        stop_logging()
+
+if __name__ == "__main__":
+    main()